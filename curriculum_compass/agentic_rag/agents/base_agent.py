@@ -1,23 +1,34 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator
+# Importing the naive_rag package puts its modules on the path. They are imported by their
+# flat names, like naive_rag imports its own siblings, so process-wide registries (models,
+# backends, schedulers) exist once
+from ... import naive_rag  # noqa: F401
+from streaming import aiter_stream
+from context_packer import ContextPacker
+from inference_backends import get_backend
 
 class BaseAgent(ABC):
     """
     Base class for all agents in the multi-agent system.
     All other agents will inherit from this base class.
     """
-    def __init__(self, model, tokenizer, system_prompt: str):
+    def __init__(self, model, tokenizer, system_prompt: str, context_token_budget: int = 2048):
         """
         Initialize base agent.
         
         Args:
-            model: The LLM model
+            model: The LLM model (a transformers model or a loaded inference backend)
             tokenizer: The model's tokenizer
             system_prompt: Specific instructions for this agent's role
+            context_token_budget: Token budget for retrieved documents in prompts
         """
         self.model = model
         self.tokenizer = tokenizer
         self.system_prompt = system_prompt
+        self.context_packer = ContextPacker(tokenizer, context_token_budget)
+        # Chat templating, decoding settings and runtime optimizations live in the backend
+        self.backend = get_backend(model, tokenizer)
 
     @abstractmethod
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -33,33 +44,55 @@ class BaseAgent(ABC):
         """
         pass
 
-    async def generate_llm_response(self, user_prompt: str) -> str:
+    def _format_retrieved(self, retrieved_info: Dict[str, Any]) -> str:
+        """
+        Pack the retrieved course and review documents into the context token budget.
+
+        Course documents get up to half of the budget; reviews get the rest.
+
+        Args:
+            retrieved_info: Dictionary with "course_info" and "review_info" document lists
+
+        Returns:
+            The packed documents as numbered plain-text sections
+        """
+        budget = self.context_packer.token_budget
+        courses = self.context_packer.pack(retrieved_info.get("course_info", []), budget // 2)
+        reviews = self.context_packer.pack(retrieved_info.get("review_info", []), budget - courses["tokens"])
+        sections = []
+        for title, packed in (("Course Info", courses), ("Review Info", reviews)):
+            docs = "\n".join(f"[{i}] {doc}" for i, doc in enumerate(packed["docs"], 1)) or "None"
+            sections.append(f"{title}:\n{docs}")
+        return "\n\n".join(sections)
+
+    async def generate_llm_response(self, user_prompt: str, profile: str = "json",
+                                    temperature: Optional[float] = None) -> str:
         """
         Generate response using the LLM.
         
         Args:
             user_prompt: The prompt to send to the LLM
+            profile: Generation profile (token budget, sampling and stop rules); agents answer in JSON
+            temperature: Optional override of the profile's sampling temperature
             
         Returns:
             The LLM's response
         """
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        
-        text = self.tokenizer.apply_chat_template(
-            messages,
-            tokenize=False,
-            add_generation_prompt=True
-        )
-        
-        model_inputs = self.tokenizer([text], return_tensors="pt").to(self.model.device)
-        outputs = self.model.generate(
-            **model_inputs,
-            max_new_tokens=512,
-            temperature=0.2
-        )
-        
-        decoded = self.tokenizer.batch_decode(outputs[:, len(model_inputs.input_ids[0]):])
-        return decoded[0]
\ No newline at end of file
+        return await self.backend.agenerate(self.system_prompt, user_prompt, profile, temperature)
+
+    async def stream_llm_response(self, user_prompt: str, profile: str = "long_answer",
+                                  temperature: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Generate a response using the LLM, yielding text chunks as they are decoded.
+
+        Args:
+            user_prompt: The prompt to send to the LLM
+            profile: Generation profile (token budget, sampling and stop rules)
+            temperature: Optional override of the profile's sampling temperature
+
+        Yields:
+            Decoded text chunks of the LLM's response
+        """
+        chunks = self.backend.stream(self.system_prompt, user_prompt, profile, temperature)
+        async for chunk in aiter_stream(chunks):
+            yield chunk
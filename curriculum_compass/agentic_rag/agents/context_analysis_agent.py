@@ -13,7 +13,7 @@ class ContextAnalysisAgent(BaseAgent):
     3. Prevents infinite loops by forcing 'is_sufficient' if max_iterations are reached.
     """
 
-    def __init__(self, model, tokenizer, max_iterations: int = 2):
+    def __init__(self, model, tokenizer, max_iterations: int = 2, context_token_budget: int = 2048):
         system_prompt = """You are a context analysis specialist for a course information system.
         Your role is to:
         1. Analyze if the retrieved information answers the original query
@@ -36,7 +36,7 @@ class ContextAnalysisAgent(BaseAgent):
         Make sure to only respond with valid JSON and no additional commentary.
         """
 
-        super().__init__(model, tokenizer, system_prompt)
+        super().__init__(model, tokenizer, system_prompt, context_token_budget)
         self.max_iterations = max_iterations
 
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -82,15 +82,15 @@ class ContextAnalysisAgent(BaseAgent):
         # We instruct the LLM to carefully examine the retrieved data, see if it's partial, 
         # fully sufficient, or nonexistent, and decide if it's fixable or unanswerable.
 
-        retrieved_course_info = input_data["retrieved_info"].get("course_info", [])
-        retrieved_review_info = input_data["retrieved_info"].get("review_info", [])
+        # Retrieved documents are packed into the token budget, best-ranked first
+        retrieved_context = self._format_retrieved(input_data["retrieved_info"])
 
         analysis_prompt = f"""
         Original Query: {input_data.get('original_query', '')}
-        Intent Analysis: {json.dumps(input_data.get('intent_analysis', {}), indent=2)}
+        Intent Analysis: {json.dumps(input_data.get('intent_analysis', {}))}
 
-        Retrieved Course Info: {json.dumps(retrieved_course_info, indent=2)}
-        Retrieved Review Info: {json.dumps(retrieved_review_info, indent=2)}
+        Retrieved Information:
+        {retrieved_context}
 
         Please analyze the retrieval results. Consider:
         - Whether we have enough data to fully address the query
@@ -1,5 +1,5 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
 from .base_agent import BaseAgent
 
 class ResponseAgent(BaseAgent):
@@ -7,7 +7,7 @@ class ResponseAgent(BaseAgent):
     Final agent responsible for generating comprehensive responses based on 
     analyzed context and query intent.
     """
-    def __init__(self, model, tokenizer):
+    def __init__(self, model, tokenizer, context_token_budget: int = 2048):
         system_prompt = """You are a course advisor for Northeastern University students.
         Your role is to generate comprehensive, clear, and helpful responses using:
         1. The original query intent
@@ -19,7 +19,46 @@ class ResponseAgent(BaseAgent):
         this transparently while providing the best possible guidance with 
         available information."""
 
-        super().__init__(model, tokenizer, system_prompt)
+        super().__init__(model, tokenizer, system_prompt, context_token_budget)
+
+    def _context_prompt(self, input_data: Dict[str, Any]) -> str:
+        """Render the query, intent, packed retrieved information and context analysis for the prompt."""
+        return f"""Original Query: {input_data.get('original_query', '')}
+        Intent Analysis: {json.dumps(input_data.get('intent_analysis', {}))}
+        Retrieved Information:
+        {self._format_retrieved(input_data['retrieved_info'])}
+        Context Analysis: {json.dumps(input_data.get('context_analysis', {}))}"""
+
+    async def stream(self, input_data: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream the final response as plain text, chunk by chunk.
+
+        Unlike process, the model answers directly instead of wrapping the answer in JSON,
+        so every chunk can be shown to the student as soon as it is generated.
+
+        Args:
+            input_data: Dictionary containing all previous processing results
+
+        Yields:
+            Text chunks of the final response
+        """
+        if not input_data.get("retrieved_info") or not input_data.get("context_analysis"):
+            yield "I apologize, but I'm unable to provide a response due to missing information."
+            return
+
+        response_prompt = f"""
+        {self._context_prompt(input_data)}
+
+        Write the response to the student directly as plain text (no JSON). The response should:
+        1. Directly address the student's question
+        2. Incorporate both course information and student experiences
+        3. Acknowledge any limitations in available information
+        4. Provide additional relevant suggestions or considerations
+        5. Maintain a helpful and professional tone
+        """
+
+        async for chunk in self.stream_llm_response(response_prompt):
+            yield chunk
 
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -41,12 +80,7 @@ class ResponseAgent(BaseAgent):
 
         # Prepare context for response generation
         response_prompt = f"""
-        Original Query: {input_data.get('original_query', '')}
-        Intent Analysis: {json.dumps(input_data.get('intent_analysis', {}), indent=2)}
-        Retrieved Information:
-        Course Info: {json.dumps(input_data['retrieved_info']['course_info'], indent=2)}
-        Review Info: {json.dumps(input_data['retrieved_info']['review_info'], indent=2)}
-        Context Analysis: {json.dumps(input_data.get('context_analysis', {}), indent=2)}
+        {self._context_prompt(input_data)}
 
         Generate a comprehensive response that:
         1. Directly addresses the student's question
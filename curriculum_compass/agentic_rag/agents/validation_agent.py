@@ -7,7 +7,7 @@ class ValidationAgent(BaseAgent):
     Agent responsible for validating if queries are relevant to NEU course registration.
     First line of defense in the system.
     """
-    def __init__(self, model, tokenizer):
+    def __init__(self, model, tokenizer, relevance_classifier=None):
         system_prompt = """You are a specialized validator for Northeastern University course-related queries.
         Your role is to determine if a query is relevant to:
         1. NEU courses
@@ -19,6 +19,8 @@ class ValidationAgent(BaseAgent):
         You must be strict in validation to prevent irrelevant queries."""
 
         super().__init__(model, tokenizer, system_prompt)
+        # Embedding classifier that settles confident cases without an LLM call
+        self.relevance_classifier = relevance_classifier
 
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -34,6 +36,16 @@ class ValidationAgent(BaseAgent):
             - original_query: Original query text
         """
         query = input_data.get("query", "")
+
+        if self.relevance_classifier is not None:
+            verdict = self.relevance_classifier.predict(query)
+            if verdict is not None:
+                return {
+                    "valid": verdict,
+                    "reason": "" if verdict else "Query is not related to NEU courses or course selection",
+                    "original_query": query,
+                    "stage": "validation"
+                }
         
         validation_prompt = f"""
         Query: {query}
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
 from .agents.validation_agent import ValidationAgent
 from .agents.intent_agent import IntentAgent
 from .agents.query_enhancement_agent import QueryEnhancementAgent
@@ -11,16 +11,76 @@ class AgentOrchestrator:
     Orchestrates the flow between different agents in the multi-agent system.
     Manages the entire pipeline from query validation to final response generation.
     """
-    def __init__(self, model, tokenizer, course_rag, review_rag):
+    def __init__(self, model, tokenizer, course_rag, review_rag, context_token_budget: int = 2048,
+                 relevance_classifier=None):
         # Initialize all agents
-        self.validation_agent = ValidationAgent(model, tokenizer)
+        self.validation_agent = ValidationAgent(model, tokenizer, relevance_classifier=relevance_classifier)
         self.intent_agent = IntentAgent(model, tokenizer)
         self.query_enhancement_agent = QueryEnhancementAgent(model, tokenizer)
         self.dynamic_retrieval_agent = DynamicRetrievalAgent(
             model, tokenizer, course_rag, review_rag
         )
-        self.context_analysis_agent = ContextAnalysisAgent(model, tokenizer)
-        self.response_agent = ResponseAgent(model, tokenizer)
+        self.context_analysis_agent = ContextAnalysisAgent(
+            model, tokenizer, context_token_budget=context_token_budget
+        )
+        self.response_agent = ResponseAgent(model, tokenizer, context_token_budget=context_token_budget)
+
+    async def _prepare_response_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run every stage before response generation (validation through the retrieval loop).
+
+        Args:
+            state: Initial processing state containing the query
+
+        Returns:
+            The state ready for the response agent, or a standardized error response
+            (marked with "error") if a stage failed
+        """
+        # 1. Validation
+        state = await self.validation_agent.process(state)
+        if not state.get("valid", False):
+            return self._create_error_response(
+                state, "Invalid query: " + state.get("reason", "")
+            )
+
+        # 2. Intent Analysis
+        state = await self.intent_agent.process(state)
+        if state.get("error"):
+            return self._create_error_response(
+                state, "Error analyzing query intent"
+            )
+
+        # 3. Query Enhancement
+        state = await self.query_enhancement_agent.process(state)
+        if state.get("error"):
+            return self._create_error_response(
+                state, "Error enhancing query"
+            )
+
+        # 4. Initial Retrieval Loop
+        max_retrieval_attempts = 4
+        retrieval_attempt = 0
+
+        while retrieval_attempt < max_retrieval_attempts:
+            # 1. Dynamic Retrieval
+            state = await self.dynamic_retrieval_agent.process(state)
+            # 2. Context Analysis
+            state = await self.context_analysis_agent.process(state)
+
+            # If the context analysis sets unanswerable=True, break immediately
+            if state.get("unanswerable"):
+                break
+
+            # If no improvement needed or we are at the last attempt, break
+            if not state.get("needs_improvement", False) or retrieval_attempt >= max_retrieval_attempts - 1:
+                break
+
+            # Otherwise, refine queries
+            feedback = state["improvement_feedback"]
+            state = await self.query_enhancement_agent.process_feedback(state, feedback)
+            retrieval_attempt += 1
+
+        return state
 
     async def process_query(self, query: str) -> Dict[str, Any]:
         """
@@ -36,49 +96,9 @@ class AgentOrchestrator:
         state = {"query": query, "processing_history": []}
 
         try:
-            # 1. Validation
-            state = await self.validation_agent.process(state)
-            if not state.get("valid", False):
-                return self._create_error_response(
-                    state, "Invalid query: " + state.get("reason", "")
-                )
-
-            # 2. Intent Analysis
-            state = await self.intent_agent.process(state)
+            state = await self._prepare_response_state(state)
             if state.get("error"):
-                return self._create_error_response(
-                    state, "Error analyzing query intent"
-                )
-
-            # 3. Query Enhancement
-            state = await self.query_enhancement_agent.process(state)
-            if state.get("error"):
-                return self._create_error_response(
-                    state, "Error enhancing query"
-                )
-
-            # 4. Initial Retrieval Loop
-            max_retrieval_attempts = 4
-            retrieval_attempt = 0
-
-            while retrieval_attempt < max_retrieval_attempts:
-                # 1. Dynamic Retrieval
-                state = await self.dynamic_retrieval_agent.process(state)
-                # 2. Context Analysis
-                state = await self.context_analysis_agent.process(state)
-
-                # If the context analysis sets unanswerable=True, break immediately
-                if state.get("unanswerable"):
-                    break
-
-                # If no improvement needed or we are at the last attempt, break
-                if not state.get("needs_improvement", False) or retrieval_attempt >= max_retrieval_attempts - 1:
-                    break
-
-                # Otherwise, refine queries
-                feedback = state["improvement_feedback"]
-                state = await self.query_enhancement_agent.process_feedback(state, feedback)
-                retrieval_attempt += 1
+                return state
 
             # 5. Final Response Generation
             state = await self.response_agent.process(state)
@@ -94,6 +114,36 @@ class AgentOrchestrator:
                 state, f"System error: {str(e)}"
             )
 
+    async def stream_query(self, query: str) -> AsyncIterator[str]:
+        """
+        Process a query through the agent pipeline, streaming the final response.
+
+        All stages up to response generation run as in process_query; the response
+        agent's output is then yielded chunk by chunk as it is generated.
+
+        Args:
+            query: User's query string
+
+        Yields:
+            Text chunks of the final response (or the error message if a stage failed)
+        """
+        state = {"query": query, "processing_history": []}
+
+        try:
+            state = await self._prepare_response_state(state)
+        except Exception as e:
+            state = self._create_error_response(state, f"System error: {str(e)}")
+        if state.get("error"):
+            yield state["final_response"]
+            return
+
+        # 5. Final Response Generation (streamed)
+        try:
+            async for chunk in self.response_agent.stream(state):
+                yield chunk
+        except Exception as e:
+            yield self._create_error_response(state, f"System error: {str(e)}")["final_response"]
+
     def _create_error_response(self, state: Dict[str, Any], error_message: str) -> Dict[str, Any]:
         """Create a standardized error response."""
         return {
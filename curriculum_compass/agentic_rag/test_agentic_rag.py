@@ -1,15 +1,21 @@
 import weave
-from curriculum_compass.naive_rag.utils import (
+
+# Importing the package puts the naive_rag modules on the path under their flat names
+from curriculum_compass import naive_rag  # noqa: F401
+from utils import (
     load_model_and_tokenizer,
     initialize_chromadb_client,
     load_embedding_model,
     get_device,
     load_config
 )
-from curriculum_compass.naive_rag.course_retriever import CourseRAGPipeline
-from curriculum_compass.naive_rag.review_retriever import ReviewsRAGPipeline
-from curriculum_compass.naive_rag.reranker import Reranker
-from curriculum_compass.naive_rag.retriever_utils import load_course_data
+from generation_scheduler import enable_continuous_batching
+from speculative import enable_speculative_decoding
+from course_retriever import CourseRAGPipeline
+from review_retriever import ReviewsRAGPipeline
+from cascade_reranker import build_reranker
+from retriever_utils import load_course_records
+from relevance_classifier import load_relevance_classifier
 from curriculum_compass.agentic_rag.orchestrator import AgentOrchestrator
 
 # Initialize weave
@@ -27,16 +33,23 @@ def main():
     chromadb_client = initialize_chromadb_client("../naive_rag/chromadb")
     
     # Load model and tokenizer
-    model, tokenizer = load_model_and_tokenizer(config['llm'])
+    model, tokenizer = load_model_and_tokenizer(config['llm'], backend=config['llm_backend'],
+                                                gguf_model=config['gguf_model'])
+    hf_backend = config['llm_backend'] != "gguf"
+    if config['continuous_batching'] and hf_backend:
+        enable_continuous_batching(model, tokenizer, config['generation_batch_size'])
+    if config['speculative_decoding'] and hf_backend:
+        draft_model, _ = load_model_and_tokenizer(config['draft_llm'])
+        enable_speculative_decoding(model, draft_model, config['draft_num_tokens'], config['draft_schedule'])
     
     # Initialize Course RAG (reusing your existing setup)
-    reranker = Reranker(config['reranker_model_name'], device)
-    course_data = load_course_data(config['course_data_path'])
+    embedding_model = load_embedding_model(config['embedding_model_name'])
+    reranker = build_reranker(config, device, embedding_model=embedding_model)
+    course_records = load_course_records(config['course_data_path'])
     course_rag = CourseRAGPipeline(reranker)
-    course_rag.intiliaze_course_search_system(course_data)
+    course_rag.initialize_course_records(course_records)
     
     # Initialize Review RAG (reusing your existing setup)
-    embedding_model = load_embedding_model(config['embedding_model_name'])
     collection = chromadb_client.get_or_create_collection("naive_rag_embeddings")
     review_rag = ReviewsRAGPipeline(embedding_model, collection, reranker)
     
@@ -45,7 +58,9 @@ def main():
         model=model,
         tokenizer=tokenizer,
         course_rag=course_rag,
-        review_rag=review_rag
+        review_rag=review_rag,
+        context_token_budget=config['context_token_budget'],
+        relevance_classifier=load_relevance_classifier(config, embedding_model)
     )
 
     # Test the system
@@ -58,10 +73,19 @@ def main():
             print(f"- {stage}")
         print("\nFinal Response:", result.get("final_response"))
 
+    async def test_stream_query():
+        query = "Who teaches Algorithms and how are the reviews?"
+        print("\nQuery:", query)
+        print("\nStreamed Response: ", end="", flush=True)
+        async for chunk in orchestrator.stream_query(query):
+            print(chunk, end="", flush=True)
+        print()
+
     # Run with weave tracing
     with weave.attributes({'user_id': 'test_user', 'env': 'testing'}):
         import asyncio
         asyncio.run(test_query())
+        asyncio.run(test_stream_query())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
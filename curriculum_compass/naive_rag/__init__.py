@@ -0,0 +1,8 @@
+import os
+import sys
+
+# naive_rag modules import their siblings by flat name (they also run as scripts from this
+# directory), so importing the package puts the directory on the path for those imports
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+if _PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, _PACKAGE_DIR)
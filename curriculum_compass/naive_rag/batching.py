@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _BatchRequest:
+    __slots__ = ('items', 'future')
+
+    def __init__(self, items):
+        self.items = items
+        self.future = Future()
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of a batch function.
+
+    Requests from concurrent callers are queued; a single worker thread waits up to
+    `max_wait_ms` after the first request (or until `max_batch_size` items are queued),
+    runs `process_batch` once over everything collected and scatters the results back
+    to each caller's future in submission order.
+    """
+    def __init__(self, process_batch, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        """
+        Initialize the batcher and start its worker thread.
+
+        Args:
+            process_batch: Callable taking a list of items and returning a list of results of the same length.
+            max_batch_size: Item count at which a batch is dispatched without waiting further.
+            max_wait_ms: Maximum time to wait for more requests after the first one arrives.
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, items) -> Future:
+        """
+        Queue items for the next batch.
+
+        Args:
+            items: List of items belonging to one caller.
+
+        Returns:
+            Future resolving to the list of results for these items.
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        request = _BatchRequest(list(items))
+        if not request.items:
+            request.future.set_result([])
+        else:
+            self._queue.put(request)
+        return request.future
+
+    def __call__(self, items):
+        """Submit items and block until their results are available."""
+        return self.submit(items).result()
+
+    def _collect(self, first):
+        pending, count = [first], len(first.items)
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            pending.append(request)
+            count += len(request.items)
+        return pending
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = self._collect(first)
+            batch = [item for request in pending for item in request.items]
+            try:
+                results = self.process_batch(batch)
+            except Exception as e:
+                for request in pending:
+                    request.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            offset = 0
+            for request in pending:
+                request.future.set_result(results[offset:offset + len(request.items)])
+                offset += len(request.items)
+
+    def stats(self) -> dict:
+        """Return batching efficiency metrics."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0
+        }
+
+    def close(self) -> None:
+        """Stop the worker thread once queued requests have been processed."""
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
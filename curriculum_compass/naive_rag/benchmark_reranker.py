@@ -0,0 +1,121 @@
+import argparse
+import statistics
+import time
+
+import torch
+from scipy.stats import spearmanr
+
+from reranker import Reranker, RERANKER_BACKENDS
+from utils import load_config, get_device
+from retriever_utils import load_course_records
+
+BENCHMARK_QUERIES = [
+    "Who teaches Algorithms this semester?",
+    "Is CS5800 on Tuesdays and Fridays?",
+    "How heavy is the workload for Programming Design Paradigm?",
+    "Which machine learning courses are offered online?",
+    "What are the prerequisites for Database Management Systems?"
+]
+
+
+def baseline_scores(reranker: Reranker, pairs: list) -> list:
+    """Score pairs the previous way: one batch padded to the longest pair."""
+    inputs = reranker.tokenizer(pairs, padding=True, truncation=True, return_tensors="pt",
+                                max_length=reranker.max_length)
+    inputs = {key: value.to(reranker.device) for key, value in inputs.items()}
+    with torch.no_grad():
+        return reranker.model(**inputs).logits.view(-1).tolist()
+
+
+def padded_tokens(reranker: Reranker, pairs: list) -> tuple:
+    """Return (real tokens, padded tokens for one batch, padded tokens with length buckets)."""
+    lengths = [len(item["input_ids"]) for item in reranker._encode_pairs(pairs)]
+    bucketed = sum(len(batch) * max(lengths[idx] for idx in batch)
+                   for batch in reranker._length_buckets(lengths))
+    return sum(lengths), len(lengths) * max(lengths), bucketed
+
+
+def time_pairs_per_second(score_fn, queries, documents, repeats) -> float:
+    """Measure pairs/sec for scoring every query against every document."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for query in queries:
+            score_fn([[query, doc] for doc in documents])
+    return repeats * len(queries) * len(documents) / (time.perf_counter() - start)
+
+
+def compare_backends(reference: Reranker, candidates: dict, queries, documents, repeats, top_k=5):
+    """
+    Report rank parity against the reference backend and per-query latency for each backend.
+
+    Args:
+        reference: Full-precision PyTorch reranker.
+        candidates: Mapping of backend name to Reranker.
+        top_k: Cutoff used for the top-k overlap metric.
+    """
+    reference_scores = {query: reference._score_pairs([[query, doc] for doc in documents]) for query in queries}
+    print(f"{'backend':<10} {'spearman':>9} {'top-k overlap':>14} {'p50 ms/query':>13} {'mean ms/query':>14}")
+    for backend, reranker in candidates.items():
+        if reranker.backend != backend:
+            # A failed ONNX export falls back to PyTorch; its numbers would be mislabelled
+            print(f"{backend:<10} skipped (running on the '{reranker.backend}' backend)")
+            continue
+        correlations, overlaps, latencies = [], [], []
+        for query in queries:
+            pairs = [[query, doc] for doc in documents]
+            for _ in range(repeats):
+                start = time.perf_counter()
+                scores = reranker._score_pairs(pairs)
+                latencies.append((time.perf_counter() - start) * 1000)
+            expected = reference_scores[query]
+            correlations.append(spearmanr(expected, scores).correlation)
+            top = lambda values: set(sorted(range(len(values)), key=lambda idx: values[idx], reverse=True)[:top_k])
+            overlaps.append(len(top(expected) & top(scores)) / min(top_k, len(documents)))
+        print(f"{backend:<10} {statistics.mean(correlations):>9.4f} {statistics.mean(overlaps):>14.2f} "
+              f"{statistics.median(latencies):>13.1f} {statistics.mean(latencies):>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reranker throughput, padding and backends.")
+    parser.add_argument("--documents", type=int, default=30, help="Candidate documents per query")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the query set")
+    parser.add_argument("--backends", nargs="+", default=list(RERANKER_BACKENDS), choices=RERANKER_BACKENDS,
+                        help="Backends to compare against the full-precision PyTorch reference")
+    args = parser.parse_args()
+
+    config = load_config()
+    device = get_device()
+    reranker = Reranker(config['reranker_model_name'], device, cache_size=0,
+                        batch_size=config['reranker_batch_size'],
+                        max_batch_tokens=config['reranker_max_batch_tokens'],
+                        token_cache_size=config['reranker_token_cache_size'])
+
+    records = load_course_records(config['course_data_path'])
+    documents = [record.to_text() for record in list(records)[:args.documents]]
+    pairs = [[query, doc] for query in BENCHMARK_QUERIES for doc in documents]
+
+    real, single, bucketed = padded_tokens(reranker, pairs)
+    print(f"Pairs: {len(pairs)}, real tokens: {real}")
+    print(f"Padded tokens - single batch: {single}, length buckets: {bucketed}")
+
+    drift = max(abs(a - b) for a, b in zip(baseline_scores(reranker, pairs), reranker._score_pairs(pairs)))
+    print(f"Max score difference vs. baseline: {drift:.2e}")
+
+    before = time_pairs_per_second(lambda batch: baseline_scores(reranker, batch),
+                                   BENCHMARK_QUERIES, documents, args.repeats)
+    after = time_pairs_per_second(reranker._score_pairs, BENCHMARK_QUERIES, documents, args.repeats)
+    print(f"Before: {before:.1f} pairs/sec")
+    print(f"After:  {after:.1f} pairs/sec ({after / before:.2f}x)")
+    print(f"Token cache: {reranker.token_cache_stats()}")
+
+    print("\nBackend parity and latency (CPU):")
+    reference = reranker if device == "cpu" else Reranker(config['reranker_model_name'], "cpu", cache_size=0)
+    candidates = {backend: reference if backend == "torch" else
+                  Reranker(config['reranker_model_name'], "cpu", cache_size=0, backend=backend,
+                           onnx_dir=config['reranker_onnx_dir'])
+                  for backend in args.backends}
+    compare_backends(reference, candidates, BENCHMARK_QUERIES, documents, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
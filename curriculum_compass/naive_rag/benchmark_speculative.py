@@ -0,0 +1,117 @@
+import argparse
+import statistics
+import time
+
+import torch
+
+from generation_profiles import generation_kwargs
+from speculative import enable_speculative_decoding, with_draft_model
+from utils import load_config, load_model_and_tokenizer, build_chat_inputs
+from retriever_utils import load_course_records
+
+ANSWER_QUERIES = [
+    "Who teaches Algorithms this semester?",
+    "How heavy is the workload for Programming Design Paradigm?",
+    "Which machine learning courses are offered online?"
+]
+RELEVANCE_QUERIES = [
+    "What are the prerequisites for Database Management Systems?",
+    "How do I bake a chocolate cake?"
+]
+
+
+class ForwardCounter:
+    """Count forward passes of a model while the context is active."""
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def __enter__(self):
+        self._handle = self.model.register_forward_hook(self._count)
+        return self
+
+    def _count(self, module, inputs, outputs):
+        self.calls += 1
+
+    def __exit__(self, *exc):
+        self._handle.remove()
+
+
+def build_prompt_mix(config: dict, documents: list) -> list:
+    """
+    The kinds of generation the app serves: (kind, system prompt, query, context docs, profile).
+
+    Answers use the RAG system prompt with retrieved course documents, relevance checks use
+    the validator's classification prompt and explanations use the short-explanation profile.
+    """
+    mix = [("answer", config['system_prompt'], query, documents, "long_answer") for query in ANSWER_QUERIES]
+    mix += [("relevance", config['relavency_prompt'], query, [], "classification") for query in RELEVANCE_QUERIES]
+    mix += [("explanation", config['system_prompt'],
+             f"Explain briefly why this request cannot be answered: {query}", [], "short_explanation")
+            for query in RELEVANCE_QUERIES[1:]]
+    return mix
+
+
+def run_generation(model, tokenizer, draft_model, prompt, max_new_tokens: int, assisted: bool) -> dict:
+    """Generate greedily for one prompt and return output ids, latency and forward-pass counts."""
+    kind, system_prompt, query, documents, profile = prompt
+    model_inputs = build_chat_inputs(system_prompt, query, documents, model, tokenizer)
+    prompt_length = model_inputs["input_ids"].shape[1]
+    kwargs = generation_kwargs(profile, tokenizer, prompt_length, temperature=0)
+    kwargs["max_new_tokens"] = min(kwargs["max_new_tokens"], max_new_tokens)
+    if assisted:
+        kwargs = with_draft_model(model, kwargs)
+
+    with ForwardCounter(model) as target, ForwardCounter(draft_model) as draft, torch.no_grad():
+        start = time.perf_counter()
+        output_ids = model.generate(**model_inputs, **kwargs)
+        seconds = time.perf_counter() - start
+    generated = output_ids[0, prompt_length:]
+    return {"ids": generated.tolist(), "seconds": seconds, "tokens": len(generated),
+            "target_calls": target.calls, "draft_calls": draft.calls}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speculative decoding with the draft LLM.")
+    parser.add_argument("--documents", type=int, default=5, help="Course documents in the answer prompts")
+    parser.add_argument("--max-new-tokens", type=int, default=128, help="Cap on generated tokens per prompt")
+    parser.add_argument("--draft-tokens", type=int, nargs="+", default=None,
+                        help="Draft lengths to compare (default: draft_num_tokens from config)")
+    parser.add_argument("--repeats", type=int, default=1, help="Passes over the prompt mix")
+    args = parser.parse_args()
+
+    config = load_config()
+    model, tokenizer = load_model_and_tokenizer(config['llm'])
+    draft_model, _ = load_model_and_tokenizer(config['draft_llm'])
+    records = load_course_records(config['course_data_path'])
+    documents = [record.to_text() for record in list(records)[:args.documents]]
+    prompts = build_prompt_mix(config, documents) * args.repeats
+
+    baseline = [run_generation(model, tokenizer, draft_model, prompt, args.max_new_tokens, assisted=False)
+                for prompt in prompts]
+    baseline_seconds = sum(result["seconds"] for result in baseline)
+    print(f"Prompts: {len(prompts)}, generated tokens: {sum(result['tokens'] for result in baseline)}")
+    print(f"Baseline: {baseline_seconds:.2f}s")
+
+    print(f"{'draft k':>7} {'kind':<12} {'acceptance':>10} {'tokens/verify':>13} {'speedup':>8} {'identical':>9}")
+    for num_draft_tokens in args.draft_tokens or [config['draft_num_tokens']]:
+        # A constant schedule so each row measures the given draft length
+        enable_speculative_decoding(model, draft_model, num_draft_tokens, schedule="constant")
+        assisted = [run_generation(model, tokenizer, draft_model, prompt, args.max_new_tokens, assisted=True)
+                    for prompt in prompts]
+        kinds = sorted({prompt[0] for prompt in prompts}) + ["all"]
+        for kind in kinds:
+            rows = [(before, after) for prompt, before, after in zip(prompts, baseline, assisted)
+                    if kind in ("all", prompt[0])]
+            # Each verification pass accepts some drafted tokens and adds one of its own
+            accepted = sum(after["tokens"] - after["target_calls"] for _, after in rows)
+            drafted = sum(after["draft_calls"] for _, after in rows)
+            tokens_per_verify = statistics.mean(after["tokens"] / max(after["target_calls"], 1) for _, after in rows)
+            speedup = sum(before["seconds"] for before, _ in rows) / sum(after["seconds"] for _, after in rows)
+            identical = all(before["ids"] == after["ids"] for before, after in rows)
+            print(f"{num_draft_tokens:>7} {kind:<12} {max(accepted, 0) / max(drafted, 1):>10.2f} "
+                  f"{tokens_per_verify:>13.2f} {speedup:>7.2f}x {str(identical):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for use in cache keys (case, surrounding punctuation and whitespace)."""
+    return " ".join(query.lower().split()).strip(" ?!.,;:")
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a document's text for use in cache keys."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Thread-safe bounded cache with least-recently-used eviction, optional TTL
+    and hit-rate metrics.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries kept before the least recently used one is evicted.
+            ttl: Optional time-to-live in seconds; expired entries are treated as misses.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, record=False) is not _MISSING
+
+    def get(self, key, default=None, record: bool = True):
+        """
+        Look up a key, refreshing its recency on a hit.
+
+        Args:
+            key: Cache key.
+            default: Value returned on a miss.
+            record: Whether the lookup counts towards hit/miss metrics.
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is not None and expires_at < time.monotonic():
+                    del self._data[key]
+                    self.expirations += 1
+                    entry = _MISSING
+            if entry is _MISSING:
+                if record:
+                    self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            if record:
+                self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        """Insert or replace an entry, evicting the least recently used entries if full."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove an entry and return its value."""
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def items(self) -> list:
+        """Snapshot of the unexpired (key, value) pairs, without touching recency or metrics."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, expires_at) in self._data.items()
+                    if expires_at is None or expires_at >= now]
+
+    def clear(self) -> None:
+        """Drop all entries (metrics are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Return hit-rate and occupancy metrics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
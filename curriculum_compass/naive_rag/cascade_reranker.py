@@ -0,0 +1,144 @@
+import numpy as np
+from reranker import Reranker
+from cache import LRUCache
+from fusion import min_max_normalize
+from utils import load_embedding_model
+
+BI_ENCODER_STAGE = "bi-encoder"
+
+
+class BiEncoderScorer:
+    """
+    Cheap first-stage scorer: cosine similarity between sentence embeddings.
+
+    Document embeddings are cached by text, so candidates that recur across
+    queries are only encoded once.
+    """
+    def __init__(self, embedding_model, cache_size: int = 8192):
+        """
+        Args:
+            embedding_model: SentenceTransformer used by the retrieval pipelines.
+            cache_size: Number of document embeddings kept for reuse.
+        """
+        self.embedding_model = embedding_model
+        self.embedding_cache = LRUCache(maxsize=cache_size) if cache_size else None
+
+    def _embed_documents(self, documents):
+        embeddings = [self.embedding_cache.get(doc) if self.embedding_cache is not None else None
+                      for doc in documents]
+        missing = [idx for idx, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self.embedding_model.encode([documents[idx] for idx in missing], normalize_embeddings=True)
+            for idx, embedding in zip(missing, encoded):
+                embeddings[idx] = embedding
+                if self.embedding_cache is not None:
+                    self.embedding_cache.set(documents[idx], embedding)
+        return np.vstack(embeddings)
+
+    def score(self, query, documents):
+        """Return cosine similarities between the query and each document."""
+        if not documents:
+            return []
+        query_embedding = self.embedding_model.encode([query], normalize_embeddings=True)[0]
+        return (self._embed_documents(documents) @ query_embedding).tolist()
+
+
+class CascadeReranker:
+    """
+    Two-stage reranker: a cheap scorer ranks every candidate and only a shortlist
+    is passed to the expensive cross-encoder.
+
+    Candidates whose first-stage score trails the top_k-th best by more than
+    `early_exit_margin` are dropped without running the cross-encoder; when the
+    first stage is that confident, the second stage only orders the top_k.
+    First-stage scores are min-max normalized over the query's candidates before the
+    margin is applied, so the margin is a fraction of that score range and means the
+    same for bi-encoder cosines and small cross-encoder logits.
+    """
+    def __init__(self, first_stage, second_stage: Reranker, shortlist_size: int = 20,
+                 early_exit_margin: float = None):
+        """
+        Args:
+            first_stage: Any object with a `score(query, documents)` method (BiEncoderScorer or a small Reranker).
+            second_stage: The full cross-encoder Reranker.
+            shortlist_size: Maximum number of candidates passed to the second stage.
+            early_exit_margin: Margin below the top_k-th candidate, as a fraction (0-1) of the
+                               query's first-stage score range, beyond which candidates are
+                               dropped (None keeps the full shortlist).
+        """
+        self.first_stage = first_stage
+        self.second_stage = second_stage
+        self.shortlist_size = shortlist_size
+        self.early_exit_margin = early_exit_margin
+        self.candidates_seen = 0
+        self.candidates_reranked = 0
+
+    def _shortlist(self, first_scores, top_k):
+        order = sorted(range(len(first_scores)), key=lambda idx: first_scores[idx], reverse=True)
+        shortlist = order[:max(self.shortlist_size, top_k or 0)]
+        if self.early_exit_margin is not None and top_k and len(shortlist) > top_k:
+            normalized = min_max_normalize(first_scores)
+            cutoff = normalized[shortlist[top_k - 1]] - self.early_exit_margin
+            shortlist = shortlist[:top_k] + [idx for idx in shortlist[top_k:] if normalized[idx] >= cutoff]
+        return shortlist, order[len(shortlist):]
+
+    def rerank_with_scores(self, query, documents, top_k=None):
+        """
+        Rerank the documents through both stages.
+        Args:
+            query: The input query string.
+            documents: List of documents to rerank.
+            top_k: Number of top documents to return (default: all).
+        Returns:
+            List of (document, score) tuples sorted by descending score. Scores come from
+            the second stage; candidates cut by the first stage are scored -inf.
+        """
+        if not documents:
+            return []
+        shortlist, rest = self._shortlist(self.first_stage.score(query, documents), top_k)
+        self.candidates_seen += len(documents)
+        self.candidates_reranked += len(shortlist)
+
+        ranked = self.second_stage.rerank_with_scores(query, [documents[idx] for idx in shortlist])
+        ranked += [(documents[idx], float('-inf')) for idx in rest]
+        return ranked[:top_k] if top_k else ranked
+
+    def rerank(self, query, documents, top_k=None):
+        """Rerank the documents and return them without scores."""
+        return [doc for doc, _ in self.rerank_with_scores(query, documents, top_k)]
+
+    def score(self, query, documents):
+        """Score documents aligned with the input order (-inf for candidates cut by the first stage)."""
+        scores = dict(self.rerank_with_scores(query, documents))
+        return [scores[doc] for doc in documents]
+
+    def stats(self) -> dict:
+        """Return how much of the candidate pool reached the expensive second stage."""
+        return {
+            "candidates_seen": self.candidates_seen,
+            "candidates_reranked": self.candidates_reranked,
+            "rerank_fraction": self.candidates_reranked / self.candidates_seen if self.candidates_seen else 0.0
+        }
+
+
+def build_reranker(config: dict, device: str = "cpu", embedding_model=None):
+    """
+    Build the reranker described by config.json, wrapping it in a cascade when enabled.
+
+    Args:
+        config: Loaded configuration.
+        device: Device for the cross-encoder(s).
+        embedding_model: Optional already-loaded SentenceTransformer for the bi-encoder first stage.
+    """
+    reranker = Reranker.from_config(config, device)
+    if not config.get('reranker_cascade'):
+        return reranker
+
+    first_stage_name = config['cascade_first_stage']
+    if first_stage_name == BI_ENCODER_STAGE:
+        first_stage = BiEncoderScorer(embedding_model or load_embedding_model(config['embedding_model_name']))
+    else:
+        first_stage = Reranker.from_config(config, device, model_name=first_stage_name)
+    return CascadeReranker(first_stage, reranker,
+                           shortlist_size=config['cascade_shortlist_size'],
+                           early_exit_margin=config['cascade_early_exit_margin'])
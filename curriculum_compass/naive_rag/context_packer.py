@@ -0,0 +1,115 @@
+import re
+
+SECTION_MARKER = re.compile(r"===\s*([^=\n]*?)\s*===")
+
+# Section headers of the structured course documents (see CourseDataProcessor); the field
+# names that follow them already say what each line is, so the markers are dropped.
+COURSE_SECTIONS = {"course metadata", "location", "schedule", "instructor", "course details", "description"}
+
+
+class ContextPacker:
+    """
+    Fits retrieved documents into a token budget for the generation prompt.
+
+    Documents are taken in rank order and compacted first: course-section markers are
+    dropped (other markers such as "=== SCHEDULE OPTIONS ===" become "schedule options:"),
+    blank lines are removed, and long lines already included from a higher-ranked document
+    (shared course descriptions, prerequisite text) are not repeated. Each document is then
+    counted with the model tokenizer and kept whole, truncated to the remaining budget, or
+    dropped; the report records what was cut.
+    """
+    def __init__(self, tokenizer, token_budget: int = 2048, min_chunk_tokens: int = 32,
+                 dedupe_min_chars: int = 40, verbose: bool = False):
+        """
+        Args:
+            tokenizer: The generation model's tokenizer.
+            token_budget: Maximum number of context tokens.
+            min_chunk_tokens: A document is truncated only if at least this many tokens still fit.
+            dedupe_min_chars: Lines at least this long are included only once across documents.
+            verbose: Print a summary whenever documents are truncated or dropped (for debugging).
+        """
+        self.tokenizer = tokenizer
+        self.token_budget = token_budget
+        self.min_chunk_tokens = min_chunk_tokens
+        self.dedupe_min_chars = dedupe_min_chars
+        self.verbose = verbose
+
+    def compact(self, document: str, seen_lines: set = ()) -> str:
+        """Strip boilerplate markers, blank lines and long lines already included from other documents."""
+        lines = []
+        for line in str(document).splitlines():
+            marker = SECTION_MARKER.search(line)
+            if marker:
+                name = marker.group(1).strip().lower()
+                replacement = "" if name in COURSE_SECTIONS else f"{name}:"
+                line = SECTION_MARKER.sub(replacement, line, count=1)
+            line = line.strip()
+            if not line:
+                continue
+            if len(line) >= self.dedupe_min_chars and line in seen_lines:
+                continue
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _truncate(self, token_ids: list, max_tokens: int) -> tuple:
+        """
+        Cut a document to at most max_tokens, counted on the text that goes into the prompt.
+
+        Decoding a token prefix and encoding it again can yield more tokens than the prefix
+        (merges differ at the cut), so the prefix is shortened until the re-encoded text fits.
+
+        Returns:
+            (text, token count of the text)
+        """
+        cut = max_tokens
+        while True:
+            text = self.tokenizer.decode(token_ids[:cut])
+            length = len(self.tokenizer.encode(text, add_special_tokens=False))
+            if length <= max_tokens:
+                return text, length
+            cut -= length - max_tokens
+
+    def pack(self, documents: list, token_budget: int = None) -> dict:
+        """
+        Select and compact documents for the prompt.
+
+        Args:
+            documents: Context documents, best first.
+            token_budget: Optional override of the packer's budget.
+
+        Returns:
+            Dictionary with
+            - docs: The packed documents, in rank order
+            - tokens: Total tokens of the packed documents
+            - dropped: [{"index", "tokens", "reason"}] for documents left out
+            - truncated: Indices of documents that were cut to fit
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        packed, dropped, truncated = [], [], []
+        used = 0
+        seen_lines, seen_documents = set(), set()
+        for index, document in enumerate(documents):
+            full_text = self.compact(document)
+            text = self.compact(document, seen_lines) if full_text not in seen_documents else ""
+            if not text:
+                dropped.append({"index": index, "tokens": 0, "reason": "duplicate"})
+                continue
+            seen_documents.add(full_text)
+            token_ids = self.tokenizer.encode(text, add_special_tokens=False)
+            remaining = budget - used
+            if len(token_ids) <= remaining:
+                used += len(token_ids)
+            elif remaining >= self.min_chunk_tokens:
+                text, length = self._truncate(token_ids, remaining)
+                truncated.append(index)
+                used += length
+            else:
+                dropped.append({"index": index, "tokens": len(token_ids), "reason": "budget"})
+                continue
+            packed.append(text)
+            # Only lines that made it into the prompt suppress repeats further down
+            seen_lines.update(line for line in text.splitlines() if len(line) >= self.dedupe_min_chars)
+        if self.verbose and (dropped or truncated):
+            print(f"Context packing: kept {len(packed)}/{len(documents)} documents ({used}/{budget} tokens), "
+                  f"truncated {len(truncated)}, dropped {len(dropped)}")
+        return {"docs": packed, "tokens": used, "dropped": dropped, "truncated": truncated}
@@ -0,0 +1,189 @@
+import numpy as np
+from scipy.sparse import vstack
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+class CourseIndex:
+    """
+    Incrementally updatable TF-IDF index over course sections, keyed by CRN.
+
+    Documents are vectorised with a stateless hashing vectorizer, so a section
+    can be added, updated or deleted without refitting a vocabulary. Rows are
+    stored as l2-normalised term frequencies and IDF weights are applied to the
+    query at search time from live document-frequency counts, which means a
+    change to one section never forces the other rows to be re-weighted.
+
+    New rows go into a small delta segment that is merged into the main
+    segment once it grows past `merge_threshold`.
+    """
+    def __init__(self, n_features: int = 2 ** 20, merge_threshold: int = 64):
+        """
+        Initialize an empty course index.
+
+        Args:
+            n_features: Number of hash buckets for the vectorizer.
+            merge_threshold: Number of pending rows before the delta segment is merged.
+        """
+        self.vectorizer = HashingVectorizer(
+            lowercase=True,
+            token_pattern=r'(?u)\b\w+\b|===\s*\w+\s*===',
+            ngram_range=(1, 2),
+            n_features=n_features,
+            alternate_sign=False,
+            norm=None
+        )
+        self.merge_threshold = merge_threshold
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.version = 0
+
+        # Main segment: one row per CRN, deleted rows are tombstoned until the next merge
+        self._base = None
+        self._base_keys = []
+        self._base_alive = np.zeros(0, dtype=bool)
+        self._base_positions = {}
+
+        # Delta segment: rows added since the last merge
+        self._delta = {}
+
+    def __len__(self):
+        return len(self._base_positions) + len(self._delta)
+
+    def __contains__(self, crn):
+        return crn in self._base_positions or crn in self._delta
+
+    def _vectorize(self, documents):
+        counts = self.vectorizer.transform(documents)
+        return counts, normalize(counts, norm="l2", copy=True)
+
+    def build(self, items) -> None:
+        """
+        Replace the index contents with the given (crn, document) pairs.
+
+        A CRN that appears more than once keeps its last document, as with upsert.
+
+        Args:
+            items: Iterable of (crn, document) pairs.
+        """
+        items = list(dict(items).items())
+        self.doc_freq[:] = 0
+        self._delta = {}
+        if not items:
+            self._base = None
+            self._base_keys = []
+            self._base_alive = np.zeros(0, dtype=bool)
+            self._base_positions = {}
+        else:
+            keys = [crn for crn, _ in items]
+            counts, rows = self._vectorize([doc for _, doc in items])
+            np.add.at(self.doc_freq, counts.indices, 1)
+            self._base = rows.tocsr()
+            self._base_keys = keys
+            self._base_alive = np.ones(len(keys), dtype=bool)
+            self._base_positions = {crn: idx for idx, crn in enumerate(keys)}
+        self.version += 1
+
+    def upsert(self, crn, document: str) -> None:
+        """
+        Add a section to the index, replacing any existing row for the same CRN.
+
+        Args:
+            crn: Course reference number identifying the section.
+            document: Rendered course text for the section.
+        """
+        if crn in self:
+            self.remove(crn)
+        _, row = self._vectorize([document])
+        row = row.tocsr()
+        self.doc_freq[row.indices] += 1
+        self._delta[crn] = row
+        if len(self._delta) >= self.merge_threshold:
+            self.merge()
+        self.version += 1
+
+    def remove(self, crn) -> bool:
+        """
+        Delete a section from the index.
+
+        Args:
+            crn: Course reference number identifying the section.
+
+        Returns:
+            True if the section was indexed, False otherwise.
+        """
+        if crn in self._delta:
+            row = self._delta.pop(crn)
+        elif crn in self._base_positions:
+            idx = self._base_positions.pop(crn)
+            self._base_alive[idx] = False
+            row = self._base[idx]
+        else:
+            return False
+        self.doc_freq[row.indices] -= 1
+        self.version += 1
+        return True
+
+    def merge(self) -> None:
+        """Fold the delta segment and tombstones into a compacted main segment."""
+        segments, keys = [], []
+        if self._base is not None and self._base_alive.any():
+            segments.append(self._base[self._base_alive])
+            keys.extend(crn for crn, alive in zip(self._base_keys, self._base_alive) if alive)
+        if self._delta:
+            segments.append(vstack(list(self._delta.values())))
+            keys.extend(self._delta.keys())
+
+        self._base = vstack(segments).tocsr() if segments else None
+        self._base_keys = keys
+        self._base_alive = np.ones(len(keys), dtype=bool)
+        self._base_positions = {crn: idx for idx, crn in enumerate(keys)}
+        self._delta = {}
+
+    def search(self, query: str, n_results: int = 5, allowed_crns=None) -> list:
+        """
+        Score indexed sections against a query.
+
+        Args:
+            query: Query text.
+            n_results: Number of results to return.
+            allowed_crns: Optional collection of CRNs to restrict the search to.
+
+        Returns:
+            List of (crn, score) tuples sorted by descending score.
+        """
+        num_docs = len(self)
+        if num_docs == 0:
+            return []
+
+        query_counts = self.vectorizer.transform([query]).tocsr()
+        idf = np.log((1 + num_docs) / (1 + self.doc_freq[query_counts.indices])) + 1
+        query_counts.data = query_counts.data * idf
+        query_counts = normalize(query_counts, norm="l2", copy=False)
+        if query_counts.nnz == 0:
+            return []
+
+        keys, scores = [], []
+        if self._base is not None:
+            base_scores = (self._base @ query_counts.T).toarray().ravel()
+            alive = np.flatnonzero(self._base_alive)
+            keys.extend(self._base_keys[idx] for idx in alive)
+            scores.append(base_scores[alive])
+        if self._delta:
+            delta_scores = (vstack(list(self._delta.values())) @ query_counts.T).toarray().ravel()
+            keys.extend(self._delta.keys())
+            scores.append(delta_scores)
+        scores = np.concatenate(scores)
+
+        if allowed_crns is not None:
+            allowed_crns = set(allowed_crns)
+            mask = np.fromiter((crn in allowed_crns for crn in keys), dtype=bool, count=len(keys))
+            candidates = np.flatnonzero(mask)
+        else:
+            candidates = np.arange(len(keys))
+        if candidates.size == 0:
+            return []
+
+        n_results = min(n_results, candidates.size)
+        top = candidates[np.argpartition(-scores[candidates], n_results - 1)[:n_results]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(keys[idx], float(scores[idx])) for idx in top]
@@ -0,0 +1,140 @@
+import sys
+import pandas as pd
+from time_utils import DAY_BITS, clean_time, time_to_minutes, parse_days
+
+
+def _text(value) -> str:
+    """Normalize a CSV cell to an interned string ('' for missing values)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    return sys.intern(str(value))
+
+
+class CourseRecord:
+    """
+    Typed, compact record for a single course section.
+
+    Repeated strings (titles, descriptions, faculty, campus, term) are interned so
+    sections of the same course share one copy, and the meeting pattern is stored as
+    a day bitmask plus begin/end minutes rather than formatted text.
+    """
+    __slots__ = ('crn', 'course_code', 'title', 'faculty', 'campus', 'days', 'begin', 'end',
+                 'prerequisites', 'term', 'description')
+
+    def __init__(self, crn, course_code, title, faculty, campus, days, begin, end,
+                 prerequisites, term, description):
+        self.crn = crn
+        self.course_code = course_code
+        self.title = title
+        self.faculty = faculty
+        self.campus = campus
+        self.days = days
+        self.begin = begin
+        self.end = end
+        self.prerequisites = prerequisites
+        self.term = term
+        self.description = description
+
+    def __repr__(self):
+        return f"CourseRecord(crn={self.crn!r}, course_code={self.course_code!r}, title={self.title!r})"
+
+    @classmethod
+    def from_row(cls, row) -> "CourseRecord":
+        """Build a record from a row of the scraped course data."""
+        return cls(
+            crn=_text(row.get('CRN', '')),
+            course_code=_text(row.get('Subject Course', '')),
+            title=_text(row.get('Course Title', '')),
+            faculty=_text(row.get('Faculty Name', '')),
+            campus=_text(row.get('Campus Description', '')),
+            days=parse_days(row.get('Days', '')),
+            begin=time_to_minutes(clean_time(row.get('Begin Time', ''))),
+            end=time_to_minutes(clean_time(row.get('End Time', ''))),
+            prerequisites=_text(row.get('Prerequisites', '[]')) or '[]',
+            term=_text(row.get('Term', '')),
+            description=_text(row.get('Course Description', ''))
+        )
+
+    def to_row(self) -> dict:
+        """Reconstruct a course data row (same column names as courses.csv)."""
+        days = ', '.join(day.capitalize() for day, bit in DAY_BITS.items() if self.days & bit)
+        return {
+            'CRN': self.crn,
+            'Campus Description': self.campus,
+            'Course Title': self.title,
+            'Subject Course': self.course_code,
+            'Faculty Name': self.faculty,
+            'Course Description': self.description,
+            'Term': self.term,
+            'Begin Time': '' if self.begin is None else f"{self.begin // 60:02d}{self.begin % 60:02d}",
+            'End Time': '' if self.end is None else f"{self.end // 60:02d}{self.end % 60:02d}",
+            'Days': days,
+            'Prerequisites': self.prerequisites
+        }
+
+    def to_text(self) -> str:
+        """Render the structured, lowercased course document on demand."""
+        # Imported here to avoid a circular import with data_processor
+        from data_processor import CourseDataProcessor
+        return CourseDataProcessor.course_to_structured_text(self.to_row())
+
+
+class CourseRecordStore:
+    """
+    In-memory store of CourseRecords keyed by CRN, with a secondary index by course code.
+    """
+    def __init__(self, records=()):
+        self._records = {}
+        self._by_course = {}
+        for record in records:
+            self.upsert(record)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __contains__(self, crn):
+        return str(crn) in self._records
+
+    def get(self, crn, default=None):
+        """Look up a record by CRN."""
+        return self._records.get(str(crn), default)
+
+    def by_course(self, course_code: str) -> list:
+        """Return all sections of a course code (e.g. 'CS5800')."""
+        return [self._records[crn] for crn in self._by_course.get(course_code.upper(), ())]
+
+    def upsert(self, record: CourseRecord) -> None:
+        """Add a record, replacing any existing record with the same CRN."""
+        self.remove(record.crn)
+        self._records[record.crn] = record
+        self._by_course.setdefault(record.course_code.upper(), []).append(record.crn)
+
+    def remove(self, crn) -> bool:
+        """Remove a record by CRN."""
+        record = self._records.pop(str(crn), None)
+        if record is None:
+            return False
+        sections = self._by_course.get(record.course_code.upper(), [])
+        sections.remove(record.crn)
+        if not sections:
+            self._by_course.pop(record.course_code.upper(), None)
+        return True
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "CourseRecordStore":
+        """Build a store from the scraped course DataFrame (a repeated CRN keeps its last row)."""
+        store = cls()
+        for row in df.to_dict('records'):
+            record = CourseRecord.from_row(row)
+            if record.crn in store:
+                print(f"Warning: duplicate CRN {record.crn} in course data; keeping the later section")
+            store.upsert(record)
+        return store
+
+    @classmethod
+    def from_csv(cls, file_path) -> "CourseRecordStore":
+        """Build a store from the course data CSV file."""
+        return cls.from_dataframe(pd.read_csv(file_path, dtype={'CRN': str, 'Begin Time': str, 'End Time': str}))
@@ -3,6 +3,9 @@ import weave
 
 
 from search_system import CourseSearchSystem
+from data_processor import CourseDataProcessor
+from course_records import CourseRecord
+from schedule_index import ScheduleIndex, parse_schedule_constraints
 
 
 # # Initialize weave
@@ -24,11 +27,29 @@ class CourseRAGPipeline:
         # model_name = "Qwen/Qwen2.5-3B-Instruct"
         # self.model, self.tokenizer = load_model_and_tokenizer(model_name)
         self.re_ranker = re_ranker
+        self.schedule_index = None
+
+    @weave.op(name="filter_by_schedule")
+    def schedule_filter(self, query: str):
+        """Resolve day/time constraints in the query to the set of matching CRNs (None if unconstrained)"""
+        if self.schedule_index is None:
+            return None
+        constraints = parse_schedule_constraints(query)
+        if not constraints:
+            return None
+        allowed_crns = self.schedule_index.filter(**constraints)
+        print(f"Schedule constraints {constraints} matched {len(allowed_crns)} sections")
+        return allowed_crns
 
     @weave.op(name="retrieve_courses")
     def retrieve(self, query: str, top_k: int = 10):
         """Retrieve relevant course information"""
-        results = self.course_search_system.query_courses(query, top_k)
+        allowed_crns = self.schedule_filter(query)
+        if allowed_crns is not None and not allowed_crns:
+            # The constraints may be misread; answering from unfiltered results beats answering from nothing
+            print("No sections match the schedule constraints, retrieving without them")
+            allowed_crns = None
+        results = self.course_search_system.query_courses(query, top_k, allowed_crns=allowed_crns)
         # Flatten the nested list structure
         return [doc for sublist in results["documents"] for doc in sublist]  
 
@@ -64,8 +85,8 @@ class CourseRAGPipeline:
     #     return self.tokenizer.batch_decode(generated_ids, skip_special_tokens=True)[0]
     
     @weave.op(name="rerank_courses")
-    def rerank(self, query: str, retrieved_docs: list, top_k: int = 5):
-        """Cross-encoder reranking of retrieved documents"""
+    def rerank(self, query: str, retrieved_docs: list, top_k: int = 5, return_scores: bool = False):
+        """Cross-encoder reranking of retrieved documents (optionally as (document, score) tuples)"""
         try:
             if not retrieved_docs:
                 print("Warning: No documents to rerank")
@@ -75,17 +96,18 @@ class CourseRAGPipeline:
                 print(f"Warning: Requested top_k={top_k} but only {len(retrieved_docs)} documents available")
                 top_k = len(retrieved_docs)
                 
-            reranked_docs = self.re_ranker.rerank(query, retrieved_docs, top_k=top_k)
-            print(f"Successfully reranked {len(reranked_docs)} documents")
-            return reranked_docs
+            reranked = self.re_ranker.rerank_with_scores(query, retrieved_docs, top_k=top_k)
+            print(f"Successfully reranked {len(reranked)} documents")
+            return reranked if return_scores else [doc for doc, _ in reranked]
             
         except Exception as e:
             print(f"Error during reranking: {str(e)}")
             # Fall back to original documents if reranking fails
-            return retrieved_docs[:top_k]
+            fallback = retrieved_docs[:top_k]
+            return [(doc, None) for doc in fallback] if return_scores else fallback
         
     @weave.op(name="process_course_query")
-    def __call__(self, query: str, initial_k: int = 10, final_k: int = 5):
+    def __call__(self, query: str, initial_k: int = 10, final_k: int = 5, return_scores: bool = False):
         """Process a query through the RAG pipeline with nested weave tracing"""
         print(f"Processing query: {query}")
         
@@ -93,7 +115,7 @@ class CourseRAGPipeline:
         retrieved_docs = self.retrieve(query, top_k=initial_k)
 
         print("Cross-encoder reranking...")
-        reranked_docs = self.rerank(query, retrieved_docs, top_k=final_k)
+        reranked_docs = self.rerank(query, retrieved_docs, top_k=final_k, return_scores=return_scores)
         
         # print("Generating response...")
         # response = self.generate_response(query, reranked_docs)
@@ -103,6 +125,35 @@ class CourseRAGPipeline:
     def intiliaze_course_search_system(self, course_data):
         self.course_search_system.add_course_sentences_to_db(course_data)
 
+    def initialize_course_records(self, records):
+        """Index a CourseRecordStore and build the schedule index from the same records"""
+        self.course_search_system.add_course_records(records)
+        self.schedule_index = ScheduleIndex.from_records(records)
+
+    def initialize_schedule_index(self, schedule_index):
+        """Attach a ScheduleIndex so day/time constraints in queries are applied as hard filters"""
+        self.schedule_index = schedule_index
+
+    def update_course_section(self, row):
+        """Re-index a single course section (e.g. after an instructor or time change)"""
+        records = self.course_search_system.records
+        record = CourseRecord.from_row(row)
+        if records is not None:
+            self.course_search_system.upsert_course_record(record)
+        else:
+            document = CourseDataProcessor.course_to_structured_text(row)
+            self.course_search_system.upsert_course(row.get('CRN', ''), document)
+        # Patch the section's row in place instead of rebuilding the schedule index
+        if self.schedule_index is not None:
+            self.schedule_index.upsert(record)
+
+    def remove_course_section(self, crn):
+        """Drop a single course section from the search index"""
+        removed = self.course_search_system.remove_course(crn)
+        if self.schedule_index is not None:
+            self.schedule_index.remove(crn)
+        return removed
+
 # def main():
 #     # # Initialize processor and process course data
 #     # # course_data = CourseDataProcessor.process_course_data('/Users/pratheeshjp/Documents/course-registration-chatbot/curriculum_compass/data_pipeline/notebooks/data/courses.csv')
@@ -1,5 +1,7 @@
 import pandas as pd
 from time_utils import clean_time, format_time
+from course_records import CourseRecordStore
+from prerequisite_graph import parse_prerequisites, format_prerequisites
 
 class CourseDataProcessor:
     @staticmethod
@@ -39,7 +41,9 @@ class CourseDataProcessor:
         )
 
         prerequisites = row.get('Prerequisites', '[]')
+        prereq_groups = parse_prerequisites(prerequisites)
         prereq_text = ("None required" if prerequisites == '[]' or not prerequisites or prerequisites.strip() == '' 
+                      else format_prerequisites(prereq_groups) if prereq_groups
                       else prerequisites.strip('[]').replace("'", "").replace('"', ''))
         details_section = (
             "=== COURSE DETAILS ===\n"
@@ -64,4 +68,9 @@ class CourseDataProcessor:
     def process_course_data(file_path)->list:
         """Process entire course dataset and convert to structured text."""
         df = pd.read_csv(file_path)
-        return [CourseDataProcessor.course_to_structured_text(row) for _, row in df.iterrows()]
\ No newline at end of file
+        return [CourseDataProcessor.course_to_structured_text(row) for _, row in df.iterrows()]
+
+    @staticmethod
+    def process_course_records(file_path) -> CourseRecordStore:
+        """Load the course dataset into a compact record store; text is rendered lazily per record."""
+        return CourseRecordStore.from_csv(file_path)
@@ -0,0 +1,112 @@
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from relevance_classifier import RelevanceClassifier, load_relevance_training_data, train_relevance_classifier
+from utils import load_config, load_embedding_model
+
+DEFAULT_BANDS = [(0.5, 0.5), (0.8, 0.2), (0.9, 0.1), (0.95, 0.05), (0.99, 0.01)]
+
+
+def evaluate_band(probabilities: np.ndarray, labels: np.ndarray, relevant_threshold: float,
+                  irrelevant_threshold: float) -> dict:
+    """
+    Score one pair of thresholds on held-out queries.
+
+    Returns:
+        Dictionary with coverage (share decided without the LLM), accuracy on the decided
+        queries, and the counts of off-topic queries accepted and relevant queries rejected.
+    """
+    accepted = probabilities >= relevant_threshold
+    rejected = probabilities <= irrelevant_threshold
+    decided = accepted | rejected
+    correct = (accepted & (labels == 1)) | (rejected & (labels == 0))
+    return {
+        "coverage": decided.mean(),
+        "accuracy": correct.sum() / max(decided.sum(), 1),
+        "false_accepts": int((accepted & (labels == 0)).sum()),
+        "false_rejects": int((rejected & (labels == 1)).sum())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the embedding relevance classifier on held-out queries.")
+    parser.add_argument("--test-size", type=float, default=0.2, help="Share of labelled queries held out")
+    parser.add_argument("--regularization", type=float, default=1.0, help="Inverse regularization strength")
+    parser.add_argument("--target-precision", type=float, default=None,
+                        help="Precision the calibrated bands must reach (default: relevance_target_precision)")
+    parser.add_argument("--bands", type=float, nargs="+", default=None,
+                        help="Relevant/irrelevant threshold pairs to compare, e.g. 0.9 0.1 0.95 0.05")
+    parser.add_argument("--save", action="store_true",
+                        help="Retrain and calibrate on all queries and write the classifier to relevance_classifier_path")
+    args = parser.parse_args()
+
+    config = load_config()
+    embedding_model = load_embedding_model(config['embedding_model_name'])
+    queries, labels = load_relevance_training_data(config['relevance_training_queries'],
+                                                   config['relevance_off_topic_queries'],
+                                                   config['relevance_extra_queries'])
+    labels = np.asarray(labels)
+    embeddings = RelevanceClassifier(embedding_model).embed(queries)
+    train_idx, test_idx = train_test_split(np.arange(len(queries)), test_size=args.test_size,
+                                           stratify=labels, random_state=0)
+
+    target_precision = args.target_precision or config['relevance_target_precision']
+    # Thresholds are calibrated inside the training split, so the held-out numbers stay unbiased
+    classifier = train_relevance_classifier([queries[i] for i in train_idx], labels[train_idx], embedding_model,
+                                            target_precision, args.regularization, embeddings=embeddings[train_idx])
+    probabilities = classifier.probabilities(embeddings[test_idx])
+    test_labels = labels[test_idx]
+    print(f"Embedding model: {config['embedding_model_name']}")
+    print(f"Queries: {len(queries)} ({labels.sum()} relevant, {len(labels) - labels.sum()} off-topic), "
+          f"held out: {len(test_idx)}")
+    print(f"ROC AUC: {roc_auc_score(test_labels, probabilities):.4f}")
+
+    bands = list(zip(args.bands[::2], args.bands[1::2])) if args.bands else list(DEFAULT_BANDS)
+    calibrated = (classifier.relevant_threshold, classifier.irrelevant_threshold)
+    configured = (config['relevance_relevant_threshold'], config['relevance_irrelevant_threshold'])
+    # Config thresholds override the calibrated ones, one side at a time
+    effective = tuple(calibrated[i] if configured[i] is None else configured[i] for i in range(2))
+    markers = {effective: "  (in use)"}
+    markers[calibrated] = f"  (calibrated, precision >= {target_precision}){', in use' if calibrated == effective else ''}"
+    for band in markers:
+        if band not in bands:
+            bands.append(band)
+    print(f"{'relevant >=':>11} {'irrelevant <=':>13} {'coverage':>8} {'accuracy':>8} {'false acc':>9} {'false rej':>9}")
+    for relevant_threshold, irrelevant_threshold in bands:
+        result = evaluate_band(probabilities, test_labels, relevant_threshold, irrelevant_threshold)
+        marker = markers.get((relevant_threshold, irrelevant_threshold), "")
+        print(f"{relevant_threshold:>11.3f} {irrelevant_threshold:>13.3f} {result['coverage']:>8.1%} "
+              f"{result['accuracy']:>8.1%} {result['false_accepts']:>9} {result['false_rejects']:>9}{marker}")
+
+    # Confident mistakes are the ones the LLM never gets a chance to correct
+    classifier.relevant_threshold, classifier.irrelevant_threshold = effective
+    mistakes = [(probability, queries[i]) for i, probability in zip(test_idx, probabilities)
+                if classifier.decide(probability) is not None and classifier.decide(probability) != bool(labels[i])]
+    for probability, query in sorted(mistakes)[:10]:
+        print(f"  confident mistake p={probability:.3f}: {query}")
+
+    sample = [queries[i] for i in test_idx[:200]]
+    start = time.perf_counter()
+    for query in sample:
+        classifier.predict(query)
+    predict_ms = (time.perf_counter() - start) / len(sample) * 1000
+    start = time.perf_counter()
+    for row in embeddings[test_idx[:200]]:
+        classifier.decide(float(classifier.probabilities(row[None, :])[0]))
+    decide_ms = (time.perf_counter() - start) / len(sample) * 1000
+    print(f"Latency per query: {predict_ms:.2f} ms including embedding, {decide_ms:.4f} ms for the decision")
+
+    if args.save:
+        full = train_relevance_classifier(queries, labels, embedding_model, target_precision,
+                                          args.regularization, embeddings=embeddings)
+        full.save(config['relevance_classifier_path'], config['embedding_model_name'])
+        print(f"Saved classifier to {config['relevance_classifier_path']} (relevant >= {full.relevant_threshold:.3f}, "
+              f"irrelevant <= {full.irrelevant_threshold:.3f})")
+
+
+if __name__ == "__main__":
+    main()
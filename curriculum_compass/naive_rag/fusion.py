@@ -0,0 +1,67 @@
+import math
+
+FUSION_METHODS = ("score", "minmax", "rrf")
+
+
+def sigmoid(score: float) -> float:
+    """Map a cross-encoder logit to a (0, 1) relevance probability."""
+    if score >= 0:
+        return 1.0 / (1.0 + math.exp(-score))
+    exp_score = math.exp(score)
+    return exp_score / (1.0 + exp_score)
+
+
+def min_max_normalize(scores: list) -> list:
+    """
+    Rescale scores to [0, 1] within one source.
+
+    A single result or all-equal scores carry no information about relevance, so they get
+    the neutral 0.5 rather than 1.0 (which would rank a lone weak hit above every other source).
+    """
+    if not scores:
+        return []
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [0.5] * len(scores)
+    return [(score - low) / (high - low) for score in scores]
+
+
+def is_scored(score) -> bool:
+    """Whether a ranking score is usable for fusion (missing or cut-off candidates are not)."""
+    return score is not None and math.isfinite(score)
+
+
+def fuse_ranked_lists(ranked_lists: dict, final_k: int = None, method: str = "score", rrf_k: int = 60) -> list:
+    """
+    Merge per-source (document, score) rankings into one list without re-running a model.
+
+    Args:
+        ranked_lists: Mapping of source name to (document, score) tuples sorted by descending score.
+        final_k: Number of fused results to return (default: all).
+        method: "score" compares calibrated cross-encoder scores directly (valid when every source
+                was scored by the same model), "minmax" normalizes each source to [0, 1] first and
+                "rrf" uses reciprocal rank fusion, ignoring score scales entirely.
+        rrf_k: Rank offset for reciprocal rank fusion.
+
+    Returns:
+        List of (source, document, fused_score) tuples sorted by descending fused score.
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method '{method}', expected one of {FUSION_METHODS}")
+
+    fused = []
+    for source, ranked in ranked_lists.items():
+        if method != "rrf":
+            # Cut (-inf) or missing scores would swamp the normalization; those documents carry no score to fuse
+            ranked = [(doc, score) for doc, score in ranked if is_scored(score)]
+        scores = [score for _, score in ranked]
+        if method == "score":
+            fused_scores = [sigmoid(score) for score in scores]
+        elif method == "minmax":
+            fused_scores = min_max_normalize(scores)
+        else:
+            fused_scores = [1.0 / (rrf_k + rank) for rank in range(1, len(ranked) + 1)]
+        fused.extend((source, doc, score) for (doc, _), score in zip(ranked, fused_scores))
+
+    fused.sort(key=lambda item: item[2], reverse=True)
+    return fused[:final_k] if final_k else fused
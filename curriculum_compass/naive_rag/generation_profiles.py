@@ -0,0 +1,112 @@
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+# Decoding settings per kind of LLM call. Budgets are sized for the expected output:
+# a label, a JSON object, a three-line explanation or a full answer.
+GENERATION_PROFILES = {
+    "classification": {
+        "max_new_tokens": 6,
+        "do_sample": False,
+        "stop_strings": ["\n"]
+    },
+    "json": {
+        "max_new_tokens": 512,
+        "do_sample": False,
+        "stop_json": True
+    },
+    "short_explanation": {
+        "max_new_tokens": 128,
+        "do_sample": True,
+        "temperature": 0.7,
+        "top_p": 0.9,
+        "stop_strings": ["\n\n\n"]
+    },
+    "long_answer": {
+        "max_new_tokens": 1024,
+        "do_sample": True,
+        "temperature": 0.1,
+        "top_p": 0.9
+    }
+}
+
+
+class JsonCompleteCriteria(StoppingCriteria):
+    """
+    Stop generation once the first top-level JSON object or array is closed.
+
+    Tokens are scanned incrementally (string literals and escapes are tracked), so the
+    check costs one token decode per step.
+    """
+    def __init__(self, tokenizer, prompt_length: int):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.scanned = prompt_length
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str) -> int:
+        """
+        Scan generated text.
+
+        Returns:
+            Once the first top-level JSON value is closed, the length of `text` up to and
+            including the closing bracket; otherwise 0.
+        """
+        for position, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"' and self.started:
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+                self.started = True
+            elif char in "}]" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return position + 1
+        return 0
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        done = False
+        for position in range(self.scanned, input_ids.shape[1]):
+            done = bool(self.feed(self.tokenizer.decode(input_ids[0, position:position + 1]))) or done
+        self.scanned = input_ids.shape[1]
+        return done
+
+
+def generation_kwargs(profile: str, tokenizer, prompt_length: int, temperature: float = None) -> dict:
+    """
+    Build `model.generate` arguments for a named profile.
+
+    Args:
+        profile: One of GENERATION_PROFILES.
+        tokenizer: The model's tokenizer (needed for stop strings and JSON completion).
+        prompt_length: Number of prompt tokens, where generated text starts.
+        temperature: Optional override; 0 forces greedy decoding, a positive value enables sampling.
+
+    Returns:
+        Keyword arguments for `model.generate`.
+    """
+    if profile not in GENERATION_PROFILES:
+        raise ValueError(f"Unknown generation profile '{profile}', expected one of {list(GENERATION_PROFILES)}")
+    settings = dict(GENERATION_PROFILES[profile])
+    stop_json = settings.pop("stop_json", False)
+
+    if temperature is not None:
+        settings["do_sample"] = temperature > 0
+        if temperature > 0:
+            settings["temperature"] = temperature
+    if not settings["do_sample"]:
+        # Sampling parameters are ignored (and warned about) in greedy decoding
+        settings.update(temperature=None, top_p=None, top_k=None)
+    if settings.get("stop_strings"):
+        settings["tokenizer"] = tokenizer
+    if stop_json:
+        settings["stopping_criteria"] = StoppingCriteriaList([JsonCompleteCriteria(tokenizer, prompt_length)])
+    return settings
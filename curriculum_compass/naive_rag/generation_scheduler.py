@@ -0,0 +1,358 @@
+import inspect
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Iterator
+
+import torch
+from transformers import DynamicCache
+
+_END = object()
+
+
+class GenerationRequest:
+    """
+    A queued generation: a future for the final text and, if streaming, an iterator
+    over text chunks as they are decoded.
+    """
+    def __init__(self, prompt_ids: list, settings: dict, stream: bool = False):
+        self.prompt_ids = prompt_ids
+        self.settings = settings
+        self.generated = []
+        self.future = Future()
+        self._chunks = queue.Queue() if stream else None
+        self._token_cache = []
+        self._print_len = 0
+
+    def result(self, timeout: float = None) -> str:
+        """Block until generation finishes and return the generated text."""
+        return self.future.result(timeout)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._chunks is None:
+            raise RuntimeError("Request was not submitted with stream=True")
+        while True:
+            chunk = self._chunks.get()
+            if chunk is _END:
+                break
+            yield chunk
+        # Surface generation errors to the streaming consumer
+        self.future.result()
+
+    def _emit(self, tokenizer, token_id: int = None, final: bool = False) -> None:
+        """Push newly decoded text to the stream (same incremental scheme as TextIteratorStreamer)."""
+        if self._chunks is None:
+            return
+        if token_id is not None:
+            self._token_cache.append(token_id)
+        text = tokenizer.decode(self._token_cache, skip_special_tokens=True)
+        if final or text.endswith("\n"):
+            chunk = text[self._print_len:]
+            self._token_cache, self._print_len = [], 0
+        elif text.endswith("�"):
+            # Incomplete multi-byte character; wait for the next token
+            return
+        else:
+            chunk = text[self._print_len:]
+            self._print_len += len(chunk)
+        if chunk:
+            self._chunks.put(chunk)
+
+    def _finish(self, text: str = None, error: Exception = None) -> None:
+        if error is not None:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(text)
+        if self._chunks is not None:
+            self._chunks.put(_END)
+
+
+class GenerationScheduler:
+    """
+    Continuous batching of concurrent generation requests on one model.
+
+    A worker thread keeps a batch of active sequences and advances all of them with
+    one forward pass per decode step. Each new request is prefilled on its own and
+    merged into the running batch (KV caches are left-padded to a common length), and
+    finished sequences leave the batch immediately, so short requests never wait for
+    long ones and new requests do not wait for the batch to drain.
+
+    Scheduled requests bypass the other generation speedups: every prompt is prefilled
+    in full (the system-prompt prefix cache is not reused) and decoding is one token per
+    step without a draft model, so continuous batching cannot be combined with
+    speculative decoding.
+    """
+    def __init__(self, model, tokenizer, max_batch_size: int = 8):
+        """
+        Args:
+            model: The causal language model.
+            tokenizer: The model's tokenizer.
+            max_batch_size: Maximum number of sequences decoded together.
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.device = model.device
+
+        generation_config = model.generation_config
+        eos = generation_config.eos_token_id
+        self.eos_token_ids = set(eos if isinstance(eos, (list, tuple)) else [eos]) - {None}
+        self.defaults = {
+            "do_sample": generation_config.do_sample,
+            "temperature": generation_config.temperature,
+            "top_p": generation_config.top_p,
+            "top_k": generation_config.top_k,
+            "repetition_penalty": generation_config.repetition_penalty,
+        }
+
+        # Prefill only needs the logits of the last prompt position; computing them for every
+        # position would allocate prompt_length x vocab_size floats per admission
+        forward_parameters = inspect.signature(model.forward).parameters
+        self._prefill_kwargs = next(({name: 1} for name in ("logits_to_keep", "num_logits_to_keep")
+                                     if name in forward_parameters), {})
+
+        self.steps = 0
+        self.generated_tokens = 0
+        self._pending = queue.Queue()
+        self._active = []
+        self._cache = None
+        self._mask = None
+        self._next_tokens = []
+        self._positions = []
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="generation-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, input_ids, stream: bool = False, **generate_kwargs) -> GenerationRequest:
+        """
+        Queue a prompt for generation.
+
+        Args:
+            input_ids: Tokenized prompt (tensor of shape [1, n] or list of ids).
+            stream: Whether the returned request can be iterated for text chunks.
+            generate_kwargs: Generation settings as passed to `model.generate`
+                             (max_new_tokens, do_sample, temperature, top_p, top_k,
+                             repetition_penalty, stop_strings, stopping_criteria).
+
+        Returns:
+            GenerationRequest whose future resolves to the generated text.
+        """
+        if self._closed:
+            raise RuntimeError("GenerationScheduler is closed")
+        if isinstance(input_ids, torch.Tensor):
+            input_ids = input_ids[0].tolist()
+        settings = dict(self.defaults)
+        settings.update({key: value for key, value in generate_kwargs.items()
+                         if value is not None and key not in ("tokenizer", "attention_mask")})
+        request = GenerationRequest(list(input_ids), settings, stream=stream)
+        self._pending.put(request)
+        return request
+
+    def generate(self, input_ids, **generate_kwargs) -> str:
+        """Submit a prompt and block until its text is ready."""
+        return self.submit(input_ids, **generate_kwargs).result()
+
+    def stream(self, input_ids, **generate_kwargs) -> Iterator[str]:
+        """Submit a prompt and yield its text chunks as they are decoded."""
+        yield from self.submit(input_ids, stream=True, **generate_kwargs)
+
+    def stats(self) -> dict:
+        """Return throughput counters (decode steps and tokens generated)."""
+        return {
+            "steps": self.steps,
+            "generated_tokens": self.generated_tokens,
+            "avg_batch_size": self.generated_tokens / self.steps if self.steps else 0.0,
+            "active": len(self._active),
+            "pending": self._pending.qsize()
+        }
+
+    def close(self) -> None:
+        """Stop the worker after the active and queued requests finish."""
+        self._closed = True
+        self._pending.put(None)
+        self._worker.join()
+
+    # ===== Worker =====
+
+    def _run(self):
+        while True:
+            if not self._active:
+                request = self._pending.get()
+                if request is None:
+                    return
+                self._admit(request)
+            while len(self._active) < self.max_batch_size:
+                try:
+                    request = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    # Finish the current batch before stopping
+                    self._pending.put(None)
+                    break
+                self._admit(request)
+            if self._active:
+                try:
+                    self._step()
+                except Exception as e:
+                    for request in self._active:
+                        request._finish(error=e)
+                    self._reset_batch()
+            elif self._closed and self._pending.empty():
+                return
+
+    def _reset_batch(self):
+        self._active, self._next_tokens, self._positions = [], [], []
+        self._cache, self._mask = None, None
+
+    def _admit(self, request: GenerationRequest):
+        """Prefill a new request and merge its KV cache into the running batch."""
+        try:
+            prompt = torch.tensor([request.prompt_ids], device=self.device)
+            with torch.no_grad():
+                outputs = self.model(input_ids=prompt, past_key_values=DynamicCache(), use_cache=True,
+                                     **self._prefill_kwargs)
+            token = self._sample(outputs.logits[0, -1], request)
+        except Exception as e:
+            request._finish(error=e)
+            return
+        if self._record_token(request, token):
+            return
+
+        cache = outputs.past_key_values.to_legacy_cache()
+        mask = torch.ones((1, prompt.shape[1]), dtype=torch.long, device=self.device)
+        if self._cache is None:
+            self._cache, self._mask = cache, mask
+        else:
+            length = max(self._mask.shape[1], mask.shape[1])
+            batch_cache, batch_mask = self._left_pad(self._cache, self._mask, length)
+            cache, mask = self._left_pad(cache, mask, length)
+            self._cache = tuple((torch.cat([bk, k]), torch.cat([bv, v]))
+                                for (bk, bv), (k, v) in zip(batch_cache, cache))
+            self._mask = torch.cat([batch_mask, mask])
+        self._active.append(request)
+        self._next_tokens.append(token)
+        self._positions.append(prompt.shape[1])
+
+    @staticmethod
+    def _left_pad(cache, mask, length):
+        pad = length - mask.shape[1]
+        if pad == 0:
+            return cache, mask
+        padded = tuple((torch.nn.functional.pad(k, (0, 0, pad, 0)), torch.nn.functional.pad(v, (0, 0, pad, 0)))
+                       for k, v in cache)
+        return padded, torch.nn.functional.pad(mask, (pad, 0))
+
+    def _step(self):
+        """Run one decode step for every active sequence."""
+        batch_size = len(self._active)
+        input_ids = torch.tensor(self._next_tokens, device=self.device).view(batch_size, 1)
+        position_ids = torch.tensor(self._positions, device=self.device).view(batch_size, 1)
+        mask = torch.cat([self._mask, torch.ones((batch_size, 1), dtype=torch.long, device=self.device)], dim=1)
+        with torch.no_grad():
+            outputs = self.model(input_ids=input_ids, attention_mask=mask, position_ids=position_ids,
+                                 past_key_values=DynamicCache.from_legacy_cache(self._cache), use_cache=True)
+        self._cache = outputs.past_key_values.to_legacy_cache()
+        self._mask = mask
+        self.steps += 1
+
+        keep = []
+        for row, request in enumerate(self._active):
+            token = self._sample(outputs.logits[row, -1], request)
+            if not self._record_token(request, token):
+                keep.append(row)
+                self._next_tokens[row] = token
+                self._positions[row] += 1
+        if len(keep) < batch_size:
+            self._compact(keep)
+
+    def _compact(self, keep: list):
+        """Drop finished rows and the padding columns no remaining row needs."""
+        if not keep:
+            self._reset_batch()
+            return
+        index = torch.tensor(keep, device=self.device)
+        self._active = [self._active[row] for row in keep]
+        self._next_tokens = [self._next_tokens[row] for row in keep]
+        self._positions = [self._positions[row] for row in keep]
+        mask = self._mask.index_select(0, index)
+        start = int((mask.shape[1] - mask.sum(dim=1)).min())
+        self._mask = mask[:, start:]
+        self._cache = tuple((k.index_select(0, index)[:, :, start:], v.index_select(0, index)[:, :, start:])
+                            for k, v in self._cache)
+
+    def _record_token(self, request: GenerationRequest, token: int) -> bool:
+        """Append a sampled token to a request; finish it and return True if it is done."""
+        settings = request.settings
+        if token in self.eos_token_ids:
+            return self._complete(request)
+        request.generated.append(token)
+        self.generated_tokens += 1
+        request._emit(self.tokenizer, token)
+
+        if len(request.generated) >= settings.get("max_new_tokens", 512):
+            return self._complete(request)
+        stop_strings = settings.get("stop_strings")
+        if stop_strings:
+            if isinstance(stop_strings, str):
+                stop_strings = [stop_strings]
+            tail = self.tokenizer.decode(request.generated[-8:], skip_special_tokens=True)
+            if any(stop in tail for stop in stop_strings):
+                return self._complete(request)
+        criteria = settings.get("stopping_criteria")
+        if criteria:
+            ids = torch.tensor([request.prompt_ids + request.generated])
+            if any(bool(torch.as_tensor(criterion(ids, None)).any()) for criterion in criteria):
+                return self._complete(request)
+        return False
+
+    def _complete(self, request: GenerationRequest) -> bool:
+        request._emit(self.tokenizer, final=True)
+        request._finish(self.tokenizer.decode(request.generated, skip_special_tokens=True))
+        return True
+
+    def _sample(self, logits: torch.Tensor, request: GenerationRequest) -> int:
+        """Pick the next token with the request's penalty and sampling settings."""
+        settings = request.settings
+        logits = logits.float()
+        penalty = settings.get("repetition_penalty") or 1.0
+        if penalty != 1.0:
+            seen = torch.tensor(sorted(set(request.prompt_ids + request.generated)), device=logits.device)
+            scores = logits[seen]
+            logits[seen] = torch.where(scores > 0, scores / penalty, scores * penalty)
+        if not settings.get("do_sample"):
+            return int(torch.argmax(logits))
+
+        logits = logits / max(settings.get("temperature") or 1.0, 1e-5)
+        top_k = settings.get("top_k")
+        if top_k:
+            threshold = torch.topk(logits, min(top_k, logits.shape[-1])).values[-1]
+            logits[logits < threshold] = float("-inf")
+        top_p = settings.get("top_p")
+        if top_p and top_p < 1.0:
+            sorted_logits, sorted_indices = torch.sort(logits, descending=True)
+            cumulative = torch.softmax(sorted_logits, dim=-1).cumsum(dim=-1)
+            remove = cumulative > top_p
+            remove[1:] = remove[:-1].clone()
+            remove[0] = False
+            logits[sorted_indices[remove]] = float("-inf")
+        return int(torch.multinomial(torch.softmax(logits, dim=-1), 1))
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def enable_continuous_batching(model, tokenizer, max_batch_size: int = 8) -> GenerationScheduler:
+    """Start (or return) the shared scheduler for a model; later LLM calls on it are batched."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(id(model))
+        if scheduler is None or scheduler.model is not model:
+            scheduler = _schedulers[id(model)] = GenerationScheduler(model, tokenizer, max_batch_size)
+        return scheduler
+
+
+def get_generation_scheduler(model):
+    """Return the model's scheduler if continuous batching is enabled for it, else None."""
+    scheduler = _schedulers.get(id(model))
+    return scheduler if scheduler is not None and scheduler.model is model else None
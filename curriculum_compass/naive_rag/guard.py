@@ -1,33 +1,48 @@
 from typing import Tuple, Dict, Any, List
 import weave
-from llm_guard.input_scanners import Gibberish, BanSubstrings, PromptInjection, TokenLimit
+from llm_guard.input_scanners import Gibberish, PromptInjection, TokenLimit
 from llm_guard.output_scanners import Bias, NoRefusal, Gibberish as OutputGibberish
 
+from substring_matcher import BannedSubstringScanner
+from scanner_executor import ScannerExecutor
+
 class LLMGuard:
     """
     A class to handle input and output content scanning using LLM Guard library.
     """
-    def __init__(self,banned_substrings: List[str]):
+    def __init__(self,banned_substrings: List[str], scan_mode: str = "cost_ordered", banned_whole_words: List[str] = ()):
         """
         Initialize LLM Guard scanners for both input and output.
         
         Args:
             banned_substrings: List of substrings to ban in user input
+            scan_mode: "cost_ordered" runs scanners cheapest first and stops at the first failure,
+                       "concurrent" runs them in parallel and returns on the first failure
+            banned_whole_words: Banned terms that only match as whole words (they also occur inside innocent words)
         """
-        # Initialize input scanners
-        self.input_scanners = [
+        # Banned substrings are matched by an Aho-Corasick automaton before any model runs
+        self.banned_substrings = BannedSubstringScanner(banned_substrings, whole_words=banned_whole_words)
+
+        # Initialize input scanners (cheapest first)
+        self.input_scanners = ScannerExecutor([
+            TokenLimit(),
             Gibberish(threshold=0.50),
-            BanSubstrings(substrings=banned_substrings),
-            PromptInjection(),
-            TokenLimit()
-        ]
+            PromptInjection()
+        ], mode=scan_mode)
         
         # Initialize output scanners
-        self.output_scanners = [
-            Bias(),
+        self.output_scanners = ScannerExecutor([
             NoRefusal(),
+            Bias(),
             OutputGibberish()
-        ]
+        ], mode=scan_mode)
+
+    @staticmethod
+    def _verdict(results: Dict[str, Any]) -> Tuple[bool, str]:
+        failed_scanners = [name for name, result in results.items() if not result["is_valid"]]
+        if not failed_scanners:
+            return True, ""
+        return False, f"Failed scanners: {', '.join(failed_scanners)}"
 
     @weave.op(name="scan_input_with_guard")
     def validate_input(self, text: str) -> Tuple[bool, str, Dict[str, Any]]:
@@ -41,45 +56,22 @@ class LLMGuard:
             A tuple of:
             - Boolean indicating if input is safe
             - String containing reason if unsafe
-            - Dictionary containing detailed results from each scanner
+            - Dictionary containing detailed results from each scanner that ran
         """
         try:
-            # Each scanner returns a tuple: (sanitized_prompt, is_valid, score)
-            results = [scanner.scan(text) for scanner in self.input_scanners]
-            
-            # Collect each element in separate lists
-            all_sanitized_prompts = []
-            all_validities = []
-            all_scores = []
-
-            for sp, v, sc in results:
-                all_sanitized_prompts.append(sp)
-                all_validities.append(v)
-                all_scores.append(sc)
-
-            # Determine if all scanners marked it valid
-            is_valid = all(all_validities)
-
-            # Compile feedback if there's a failure
-            feedback = ""
-            if not is_valid:
-                failed_scanners = [
-                    type(scanner).__name__
-                    for scanner, (_, valid, _) in zip(self.input_scanners, results)
-                    if not valid
-                ]
-                feedback = f"Failed scanners: {', '.join(failed_scanners)}"
-            
-            # Build a dictionary of results for each scanner
-            results_dict = {}
-            for scanner, (sp, valid, sc) in zip(self.input_scanners, results):
-                # Adjust field names or structure according to your needs:
-                results_dict[type(scanner).__name__] = {
-                    "is_valid": valid,
-                    "risk_score": sc,
-                    "comment": sp
+            # Zero-model fast path: reject abusive input without running the model-based scanners
+            banned = self.banned_substrings.matcher.find_all(text)
+            if banned:
+                return False, "Failed scanners: BanSubstrings", {
+                    "BanSubstrings": {
+                        "is_valid": False,
+                        "risk_score": 1.0,
+                        "comment": f"Matched: {', '.join(banned)}"
+                    }
                 }
-            
+
+            results_dict = self.input_scanners.run(text)
+            is_valid, feedback = self._verdict(results_dict)
             return is_valid, feedback, results_dict
         
         except Exception as e:
@@ -98,32 +90,20 @@ class LLMGuard:
             Tuple containing:
             - Boolean indicating if output is safe
             - String containing reason if unsafe
-            - Dictionary containing detailed results from each scanner
+            - Dictionary containing detailed results from each scanner that ran
         """
         try:
-            results = [scanner.is_valid(text, prompt) for scanner in self.output_scanners]
-            is_valid = all(result.is_valid for result in results)
-            
-            # Compile detailed feedback from results
-            feedback = ""
-            if not is_valid:
-                failed_scanners = [
-                    type(scanner).__name__ for scanner, result in zip(self.output_scanners, results)
-                    if not result.is_valid
-                ]
-                feedback = f"Failed scanners: {', '.join(failed_scanners)}"
-            
-            # Convert results to dictionary for consistency
-            results_dict = {
-                type(scanner).__name__: {
-                    'is_valid': result.is_valid,
-                    'risk_score': result.risk_score,
-                    'comment': result.comment
-                }
-                for scanner, result in zip(self.output_scanners, results)
-            }
-            
+            # Output scanners take the prompt and the output
+            results_dict = self.output_scanners.run(prompt, text)
+            is_valid, feedback = self._verdict(results_dict)
             return is_valid, feedback, results_dict
             
         except Exception as e:
-            return False, f"Error during output scanning: {str(e)}", {}
\ No newline at end of file
+            return False, f"Error during output scanning: {str(e)}", {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-scanner timing metrics, showing where guard latency goes."""
+        return {
+            "input": self.input_scanners.stats(),
+            "output": self.output_scanners.stats()
+        }
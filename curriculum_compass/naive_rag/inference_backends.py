@@ -0,0 +1,210 @@
+import asyncio
+import os
+import threading
+from typing import Iterator
+
+import torch
+from transformers import AutoModelForCausalLM
+
+from streaming import stream_generate
+from generation_profiles import generation_kwargs, JsonCompleteCriteria
+from prefix_cache import get_prefix_cache
+from generation_scheduler import get_generation_scheduler
+from speculative import with_draft_model
+
+LLM_BACKENDS = ("hf", "int8", "gguf")
+
+
+class InferenceBackend:
+    """
+    One generate/stream interface over a local LLM runtime.
+
+    Callers pass the system prompt and user prompt; the backend applies the chat template,
+    the generation profile (token budget, sampling and stop rules) and any runtime-specific
+    optimizations, so pipelines and agents never touch the model or tokenizer directly.
+    """
+    tokenizer = None
+
+    def generate(self, system_prompt: str, user_prompt: str, profile: str = "long_answer",
+                 temperature: float = None) -> str:
+        """Return the model's reply to one chat turn."""
+        raise NotImplementedError
+
+    def stream(self, system_prompt: str, user_prompt: str, profile: str = "long_answer",
+               temperature: float = None) -> Iterator[str]:
+        """Yield the model's reply to one chat turn as text chunks."""
+        raise NotImplementedError
+
+    async def agenerate(self, system_prompt: str, user_prompt: str, profile: str = "long_answer",
+                        temperature: float = None) -> str:
+        """Generate without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate, system_prompt, user_prompt, profile, temperature)
+
+
+class HFBackend(InferenceBackend):
+    """
+    transformers causal LM, in full precision or int8-quantized.
+
+    Generation resumes from the prefilled system-prompt cache, uses the draft model when
+    speculative decoding is enabled, and goes through the continuous-batching scheduler
+    when one is registered for the model. Scheduled requests skip the prefix cache and
+    the draft model (see GenerationScheduler).
+    """
+    def __init__(self, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prefix_cache = get_prefix_cache(model, tokenizer)
+
+    def encode(self, system_prompt: str, user_prompt: str) -> dict:
+        """Apply the chat template and tokenize the prompt onto the model's device."""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        text = self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+        model_inputs = self.tokenizer([text], return_tensors="pt")
+        return {key: value.to(self.model.device) for key, value in model_inputs.items()}
+
+    def _generate_kwargs(self, system_prompt: str, model_inputs: dict, profile: str, temperature: float) -> dict:
+        prompt_length = model_inputs["input_ids"].shape[1]
+        return {
+            # Drafted by the small model when speculative decoding is enabled
+            **with_draft_model(self.model, generation_kwargs(profile, self.tokenizer, prompt_length, temperature)),
+            # Resume from the cached system-prompt prefix instead of re-encoding it
+            **self.prefix_cache.generate_kwargs(system_prompt, model_inputs["input_ids"])
+        }
+
+    def generate(self, system_prompt: str, user_prompt: str, profile: str = "long_answer",
+                 temperature: float = None) -> str:
+        model_inputs = self.encode(system_prompt, user_prompt)
+        prompt_length = model_inputs["input_ids"].shape[1]
+        scheduler = get_generation_scheduler(self.model)
+        if scheduler is not None:
+            # Continuous batching: decode together with the other in-flight requests
+            return scheduler.generate(model_inputs["input_ids"],
+                                      **generation_kwargs(profile, self.tokenizer, prompt_length, temperature))
+        output_ids = self.model.generate(**model_inputs,
+                                         **self._generate_kwargs(system_prompt, model_inputs, profile, temperature))
+        return self.tokenizer.decode(output_ids[0, prompt_length:], skip_special_tokens=True)
+
+    def stream(self, system_prompt: str, user_prompt: str, profile: str = "long_answer",
+               temperature: float = None) -> Iterator[str]:
+        model_inputs = self.encode(system_prompt, user_prompt)
+        prompt_length = model_inputs["input_ids"].shape[1]
+        scheduler = get_generation_scheduler(self.model)
+        if scheduler is not None:
+            yield from scheduler.stream(model_inputs["input_ids"],
+                                        **generation_kwargs(profile, self.tokenizer, prompt_length, temperature))
+            return
+        yield from stream_generate(self.model, self.tokenizer, model_inputs,
+                                   **self._generate_kwargs(system_prompt, model_inputs, profile, temperature))
+
+    async def agenerate(self, system_prompt: str, user_prompt: str, profile: str = "long_answer",
+                        temperature: float = None) -> str:
+        scheduler = get_generation_scheduler(self.model)
+        if scheduler is None:
+            return await super().agenerate(system_prompt, user_prompt, profile, temperature)
+        # Awaiting the request lets concurrent callers share decode steps
+        model_inputs = self.encode(system_prompt, user_prompt)
+        prompt_length = model_inputs["input_ids"].shape[1]
+        request = scheduler.submit(model_inputs["input_ids"],
+                                   **generation_kwargs(profile, self.tokenizer, prompt_length, temperature))
+        return await asyncio.wrap_future(request.future)
+
+
+class GGUFBackend(InferenceBackend):
+    """
+    Quantized GGUF model served by llama.cpp (requires llama-cpp-python).
+
+    Generation profiles map onto llama.cpp sampling options; JSON profiles stop as soon as
+    the first JSON object is closed, like JsonCompleteCriteria does for transformers.
+    """
+    def __init__(self, model_path: str, tokenizer=None, n_ctx: int = 4096, n_threads: int = None):
+        """
+        Args:
+            model_path: Local .gguf file, or "<hub repo id>/<file name>" to download it.
+            tokenizer: Tokenizer of the original model, used for token counting (context packing).
+            n_ctx: Context window in tokens.
+            n_threads: CPU threads (llama.cpp picks a default when None).
+        """
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise ImportError("The 'gguf' LLM backend requires llama-cpp-python "
+                              "(pip install 'curriculum_compass[gguf]')") from e
+        if os.path.exists(model_path):
+            self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        else:
+            repo_id, filename = model_path.rsplit("/", 1)
+            self.llm = Llama.from_pretrained(repo_id=repo_id, filename=filename, n_ctx=n_ctx,
+                                             n_threads=n_threads, verbose=False)
+        self.model_path = model_path
+        self.tokenizer = tokenizer
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _completion_kwargs(settings: dict) -> dict:
+        """Translate transformers generation settings into llama.cpp completion arguments."""
+        kwargs = {"max_tokens": settings["max_new_tokens"], "stop": settings.get("stop_strings") or None}
+        if settings["do_sample"]:
+            kwargs["temperature"] = settings.get("temperature") or 1.0
+            kwargs["top_p"] = settings.get("top_p") or 1.0
+            if settings.get("top_k"):
+                kwargs["top_k"] = settings["top_k"]
+        else:
+            kwargs["temperature"] = 0.0
+        return kwargs
+
+    def stream(self, system_prompt: str, user_prompt: str, profile: str = "long_answer",
+               temperature: float = None) -> Iterator[str]:
+        settings = generation_kwargs(profile, self.tokenizer, 0, temperature)
+        json_scanner = JsonCompleteCriteria(self.tokenizer, 0) if settings.get("stopping_criteria") else None
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        # A llama.cpp context serves one generation at a time
+        with self._lock:
+            for chunk in self.llm.create_chat_completion(messages=messages, stream=True,
+                                                         **self._completion_kwargs(settings)):
+                text = chunk["choices"][0]["delta"].get("content")
+                if not text:
+                    continue
+                closed_at = json_scanner.feed(text) if json_scanner is not None else 0
+                if closed_at:
+                    # Drop whatever follows the closing bracket in the same chunk
+                    yield text[:closed_at]
+                    break
+                yield text
+
+    def generate(self, system_prompt: str, user_prompt: str, profile: str = "long_answer",
+                 temperature: float = None) -> str:
+        return "".join(self.stream(system_prompt, user_prompt, profile, temperature))
+
+
+def load_int8_model(model_name: str):
+    """Load a causal LM on CPU with its Linear layers dynamically quantized to int8."""
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(model, tokenizer) -> InferenceBackend:
+    """
+    Return the inference backend for a loaded model.
+
+    GGUF models are loaded as backends already; transformers models (full precision or
+    int8) are wrapped in a shared HFBackend.
+    """
+    if isinstance(model, InferenceBackend):
+        return model
+    with _backends_lock:
+        backend = _backends.get(id(model))
+        if backend is None or backend.model is not model:
+            backend = _backends[id(model)] = HFBackend(model, tokenizer)
+        return backend
@@ -1,30 +1,91 @@
+import asyncio
+import atexit
+import re
 import weave
 from validator import Validator
+from relevance_classifier import load_relevance_classifier
 from course_retriever import CourseRAGPipeline
 from review_retriever import ReviewsRAGPipeline
-from reranker import Reranker
-from retriever_utils import load_course_data
+from cascade_reranker import build_reranker
+from retriever_utils import load_course_records
+from schedule_builder import ScheduleBuilder, extract_course_codes, course_subjects
+from schedule_index import parse_schedule_constraints
+from prerequisite_graph import PrerequisiteGraph
+from fusion import fuse_ranked_lists, is_scored
+from response_cache import ResponseCache
 from utils import get_device
 from utils import load_config
 from utils import load_embedding_model
 from utils import generate_llm_response
+from utils import stream_llm_response, astream_llm_response
 from utils import load_model_and_tokenizer
 from utils import initialize_chromadb_client
+from model_registry import model_registry
+from generation_scheduler import enable_continuous_batching
+from speculative import enable_speculative_decoding
 
 
 
+PREREQUISITE_INTENT = re.compile(
+    r'prereq|pre-req|requirement|need (?:to take )?before|take before|unlock|lead(?:s)? to|open(?:s)? up|after (?:taking|finishing)',
+    re.IGNORECASE
+)
+
 # Initialize weave
 weave.init(project_name="Course_RAG_System")
 
 class IntegratedRAGPipeline:
-    def __init__(self, course_rag: CourseRAGPipeline, review_rag: ReviewsRAGPipeline,config:dict,device:str): 
+    def __init__(self, course_rag: CourseRAGPipeline, review_rag: ReviewsRAGPipeline,config:dict,device:str,
+                 schedule_builder: ScheduleBuilder = None, prerequisite_graph: PrerequisiteGraph = None): 
         self.course_rag = course_rag
         self.review_rag = review_rag
+        self.schedule_builder = schedule_builder
+        self.prerequisite_graph = prerequisite_graph
+        self.known_subjects = self._catalog_subjects()
         self.LLM = config['llm']
-        self.model, self.tokenizer = load_model_and_tokenizer(self.LLM)
-        self.final_reranker = Reranker(config['reranker_model_name'],device) 
+        self.model, self.tokenizer = load_model_and_tokenizer(self.LLM, backend=config['llm_backend'],
+                                                              gguf_model=config['gguf_model'])
+        # Batching and draft models apply to transformers backends; llama.cpp schedules its own decoding
+        hf_backend = config['llm_backend'] != "gguf"
+        if config['continuous_batching'] and config['speculative_decoding'] and hf_backend:
+            # Scheduled requests decode one token per step and never consult the draft model
+            raise ValueError("continuous_batching and speculative_decoding cannot both be enabled")
+        if config['continuous_batching'] and hf_backend:
+            # Concurrent queries (and the validator, when it shares this model) are decoded in shared batches
+            enable_continuous_batching(self.model, self.tokenizer, config['generation_batch_size'])
+        if config['speculative_decoding'] and hf_backend:
+            # The small model drafts tokens that the main model verifies in one forward pass
+            draft_model, _ = load_model_and_tokenizer(config['draft_llm'])
+            enable_speculative_decoding(self.model, draft_model, config['draft_num_tokens'], config['draft_schedule'])
+        # Shares the course pipeline's reranker (and its score cache) for re-scoring during fusion
+        self.final_reranker = course_rag.re_ranker
+        self.fusion_method = config['fusion_method']
         self.system_prompt = config["system_prompt"]
+        self.context_token_budget = config['context_token_budget']
+        self.response_cache = ResponseCache(
+            review_rag.embedding_model,
+            maxsize=config['response_cache_size'],
+            ttl=config['response_cache_ttl'],
+            similarity_threshold=config['response_cache_similarity_threshold'],
+            max_token_edits=config['response_cache_max_token_edits']
+        ) if config['response_cache_size'] else None
         
+    def _catalog_subjects(self):
+        """Subjects of every course the tools and the course index know, or None if there is no catalog."""
+        codes = set()
+        records = self.course_rag.course_search_system.records
+        if records is not None:
+            codes.update(record.course_code for record in records)
+        if self.schedule_builder is not None:
+            codes.update(self.schedule_builder.sections_by_course)
+        if self.prerequisite_graph is not None:
+            codes.update(self.prerequisite_graph.direct_prerequisites)
+        return course_subjects(codes) if codes else None
+
+    def course_codes(self, query: str) -> list:
+        """Course codes mentioned in a query, restricted to the catalog's subjects"""
+        return extract_course_codes(query, self.known_subjects)
+
     @weave.op(name="get_course_info")
     def get_course_information(self, query: str, top_k: int = 5):
         """Get relevant course information"""
@@ -36,34 +97,68 @@ class IntegratedRAGPipeline:
         return self.review_rag.retrieve(query, top_k=top_k)[0]  # Assuming similar structure to course_rag
         
     @weave.op(name="combine_and_rerank_integrated")
-    def combine_and_rerank(self, query: str, course_docs: list, review_docs: list, final_k:int):
-        """Combine and rerank all documents"""
-        # Combine both types of documents with clear separation
-        combined_docs = []
-        for doc in course_docs:
-            combined_docs.append(f"[COURSE INFO] {doc}")
-        for doc in review_docs:
-            combined_docs.append(f"[STUDENT REVIEW] {doc}")
-            
-        # Rerank the combined documents
+    def combine_and_rerank(self, query: str, course_results: list, review_results: list, final_k:int):
+        """
+        Fuse the already-reranked course and review results into one ranking.
+
+        Both sources arrive as (document, score) tuples from the shared cross-encoder, so
+        they are merged by score (or rank) instead of running the model a third time.
+        Candidates the cascade's first stage cut (scored -inf) are dropped, and documents
+        with no score (e.g. a source whose reranking failed) are re-scored by the cross-encoder.
+        """
+        sources = {"[COURSE INFO]": course_results, "[STUDENT REVIEW]": review_results}
+        # A cascade would cut the same candidates again, so re-score with its cross-encoder directly
+        cross_encoder = getattr(self.final_reranker, "second_stage", self.final_reranker)
         try:
-            reranked_docs = self.final_reranker.rerank(query, combined_docs, final_k)
-            print(f"Successfully reranked {len(reranked_docs)} combined documents")
-            return reranked_docs
+            for label, results in sources.items():
+                results = [(doc, score) for doc, score in results if score != float('-inf')]
+                unscored = [doc for doc, score in results if not is_scored(score)]
+                if unscored:
+                    print(f"Re-scoring {len(unscored)} {label} documents without usable scores")
+                    rescored = dict(zip(unscored, cross_encoder.score(query, unscored)))
+                    results = [(doc, score if is_scored(score) else rescored[doc]) for doc, score in results]
+                sources[label] = sorted(((doc, score) for doc, score in results if is_scored(score)),
+                                        key=lambda item: item[1], reverse=True)
+
+            fused = fuse_ranked_lists(sources, final_k, method=self.fusion_method)
+            print(f"Successfully fused {len(fused)} combined documents")
+            return [f"{label} {doc}" for label, doc, _ in fused]
         except Exception as e:
             print(f"Error during final reranking: {str(e)}")
             # Fall back to original combined docs
+            combined_docs = [f"{label} {doc}" for label, results in sources.items() for doc, _ in results]
             return combined_docs[:final_k]
             
+    @weave.op(name="get_schedule_options")
+    def get_schedule_options(self, query: str):
+        """Run the schedule builder tool when the query combines two or more known courses"""
+        if self.schedule_builder is None:
+            return []
+        course_codes = [code for code in self.course_codes(query)
+                        if code in self.schedule_builder.sections_by_course]
+        if len(course_codes) < 2:
+            return []
+        campus = self.course_rag.course_search_system.preprocess_query(query)['campus']
+        result = self.schedule_builder(course_codes, campus=campus)
+        return [ScheduleBuilder.format_schedules(result)]
+
+    @weave.op(name="get_prerequisite_info")
+    def get_prerequisite_info(self, query: str):
+        """Answer prerequisite/unlock questions for named courses from the prerequisite graph"""
+        if self.prerequisite_graph is None or not PREREQUISITE_INTENT.search(query):
+            return []
+        return self.prerequisite_graph(self.course_codes(query))
+
     @weave.op(name="generate_integrated_response")
     def generate_response(self, query: str, combined_docs: list):
         """Generate final response using combined context"""
         # Use the course_rag's LLM for response generation
-        return generate_llm_response(self.system_prompt, query,combined_docs,self.model,self.tokenizer)
+        return generate_llm_response(self.system_prompt, query,combined_docs,self.model,self.tokenizer,
+                                     context_budget=self.context_token_budget)
         
-    @weave.op(name="process_integrated_query")
-    def __call__(self, query: str, course_k, review_k, final_k):
-        """Process a query through the integrated pipeline"""
+    @weave.op(name="prepare_integrated_context")
+    def prepare_context(self, query: str, course_k, review_k, final_k):
+        """Retrieve, fuse and augment the context documents for a query"""
         print(f"Processing query: {query}")
         
         # Get course information and reviews in parallel
@@ -71,19 +166,123 @@ class IntegratedRAGPipeline:
         # course_docs = self.get_course_information(query, top_k=course_k)
         # review_docs = self.get_reviews(query, top_k=review_k)
 
-        course_docs = self.course_rag(query,course_k,final_k)
+        course_results = self.course_rag(query,course_k,final_k,return_scores=True)
 
-        review_docs = self.review_rag(query,review_k,final_k)
+        review_results = self.review_rag(query,review_k,final_k,return_scores=True)
         
-        # Combine and rerank
+        # Fuse the per-source rankings
         print("Combining and reranking all documents...")
-        combined_docs = self.combine_and_rerank(query, course_docs, review_docs, final_k)
+        combined_docs = self.combine_and_rerank(query, course_results, review_results, final_k)
+
+        # Exact answers from the schedule builder and prerequisite graph tools go ahead of retrieved text
+        return self.get_schedule_options(query) + self.get_prerequisite_info(query) + combined_docs
+
+    def index_version(self):
+        """Version of the indexes answers are built from; changes whenever courses or reviews are updated"""
+        # Both are counters bumped on mutation, so a cache lookup never queries the vector store
+        return (self.course_rag.course_search_system.index.version, self.review_rag.version)
+
+    def cache_scope(self, query: str):
+        """
+        Constraints a cached answer must share exactly to be reused for a near-duplicate query:
+        the course codes, the day/time filter and whether prerequisite information was asked for.
+        "ML courses on Monday" and "ML courses on Friday" embed almost identically but need different answers.
+        """
+        schedule = tuple(sorted((key, tuple(value) if isinstance(value, list) else value)
+                                for key, value in parse_schedule_constraints(query).items()))
+        return (tuple(sorted(self.course_codes(query))), schedule, bool(PREREQUISITE_INTENT.search(query)))
+
+    def cached_response(self, query: str, combined_docs: list = None):
+        """
+        Look up a cached answer: before retrieval (combined_docs=None) by same or near-duplicate
+        query, after retrieval by query and context. Returns None on a miss.
+        """
+        if self.response_cache is None:
+            return None
+        try:
+            if combined_docs is None:
+                response = self.response_cache.lookup_semantic(query, self.index_version(),
+                                                               scope=self.cache_scope(query))
+            else:
+                response = self.response_cache.lookup_exact(query, combined_docs, self.index_version())
+        except Exception as e:
+            print(f"Error reading the response cache: {str(e)}")
+            return None
+        if response is not None:
+            print("Returning cached response")
+        return response
+
+    def cache_response(self, query: str, combined_docs: list, response: str):
+        """Store a generated answer in the response cache"""
+        if self.response_cache is None or not response:
+            return
+        try:
+            self.response_cache.store(query, combined_docs, self.index_version(), response,
+                                      scope=self.cache_scope(query))
+        except Exception as e:
+            print(f"Error writing the response cache: {str(e)}")
+
+    @weave.op(name="process_integrated_query")
+    def __call__(self, query: str, course_k, review_k, final_k):
+        """Process a query through the integrated pipeline"""
+        response = self.cached_response(query)
+        if response is not None:
+            return response
+
+        combined_docs = self.prepare_context(query, course_k, review_k, final_k)
+        response = self.cached_response(query, combined_docs)
+        if response is not None:
+            return response
         
         # Generate final response
         print("Generating integrated response...")
         response = self.generate_response(query, combined_docs)
+        self.cache_response(query, combined_docs, response)
         
         return response
+
+    def stream(self, query: str, course_k, review_k, final_k):
+        """Process a query like __call__, yielding the response text as it is generated"""
+        response = self.cached_response(query)
+        if response is not None:
+            yield response
+            return
+
+        combined_docs = self.prepare_context(query, course_k, review_k, final_k)
+        response = self.cached_response(query, combined_docs)
+        if response is not None:
+            yield response
+            return
+
+        print("Streaming integrated response...")
+        chunks = []
+        for chunk in stream_llm_response(self.system_prompt, query, combined_docs, self.model, self.tokenizer,
+                                         context_budget=self.context_token_budget):
+            chunks.append(chunk)
+            yield chunk
+        self.cache_response(query, combined_docs, "".join(chunks))
+
+    async def astream(self, query: str, course_k, review_k, final_k):
+        """Async variant of stream; retrieval runs off the event loop"""
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, self.cached_response, query)
+        if response is not None:
+            yield response
+            return
+
+        combined_docs = await loop.run_in_executor(None, self.prepare_context, query, course_k, review_k, final_k)
+        response = await loop.run_in_executor(None, self.cached_response, query, combined_docs)
+        if response is not None:
+            yield response
+            return
+
+        print("Streaming integrated response...")
+        chunks = []
+        async for chunk in astream_llm_response(self.system_prompt, query, combined_docs, self.model, self.tokenizer,
+                                                context_budget=self.context_token_budget):
+            chunks.append(chunk)
+            yield chunk
+        self.cache_response(query, combined_docs, "".join(chunks))
     
 
 def main():
@@ -96,52 +295,81 @@ def main():
 # ===== Initialize the re-ranker ===========
     device = get_device()
     print(f"Using device: {device}")
-    reranker = Reranker(config['reranker_model_name'],device)
+    embedding_model = load_embedding_model(config['embedding_model_name'])
+    reranker = build_reranker(config, device, embedding_model=embedding_model)
 
 # ===== Initialize the CourseRagPipeline ===========
 
-    course_data = load_course_data(config['course_data_path'])
+    course_records = load_course_records(config['course_data_path'])
     course_rag = CourseRAGPipeline(reranker)
-    course_rag.intiliaze_course_search_system(course_data)
+    course_rag.initialize_course_records(course_records)
 
 # ===== Initialize the NaiveReviewsRAGPipeline ===========
 
     #TODO : Initialize the NaiveReviewsRAGPipeline with the appropriate parameters
-    embedding_model = load_embedding_model(config['embedding_model_name'])
     collection = chromadb_client.get_or_create_collection("naive_rag_embeddings")
     review_rag = ReviewsRAGPipeline(embedding_model, collection,reranker)
     
 # ===== Initialize the IntegratedRAGPipeline ===========
-    integrated_rag = IntegratedRAGPipeline(course_rag, review_rag,config,device)
+    schedule_builder = ScheduleBuilder.from_records(course_records)
+    prerequisite_graph = PrerequisiteGraph.from_records(course_records)
+    integrated_rag = IntegratedRAGPipeline(course_rag, review_rag,config,device,
+                                           schedule_builder=schedule_builder,
+                                           prerequisite_graph=prerequisite_graph)
 
 # ===== Initlialize the Query Validator ===========
-    query_validator = Validator(model_name=config['query_validator_model_name'],device=device,banned_substrings=config['banned_substrings'],relevance_prompt=config['relavency_prompt'])
+    query_validator = Validator(model_name=config['query_validator_model_name'],device=device,banned_substrings=config['banned_substrings'],relevance_prompt=config['relavency_prompt'],
+                                backend=config['llm_backend'],gguf_model=config['gguf_model'],
+                                guard_scan_mode=config['guard_scan_mode'],
+                                relevance_classifier=load_relevance_classifier(config, embedding_model),
+                                llm_rejection_responses=config['llm_rejection_responses'],
+                                verdict_cache_size=config['validation_cache_size'],
+                                verdict_cache_ttl=config['validation_cache_ttl'],
+                                banned_whole_words=config['banned_whole_words'])
+
+    print("Loaded models:")
+    model_registry.print_memory_report()
+    # Cache hit rate and scanner latency are only meaningful over many queries, so report them once at exit
+    atexit.register(lambda: print(f"Validation stats: {query_validator.stats()}"))
 
 # ===== Example usage of the IntegratedRAGPipeline ===========
     
     # Example usage with weave tracing
     with weave.attributes({'user_id': 'test_user', 'env': 'testing'}):
         query = "Can i do cheating in exams at NEU?"
-        input_status, reason= query_validator.validate_input(query)
-        if input_status:
-            try:
-                response = integrated_rag(query,config['course_k'],
-                                        config['review_k'],
-                                        config['final_k'])
-                # print(f"\nQuery: {query}")
-                # print(f"Response: {response}")
-
-                # output_status, _, _ = query_validator.validate_output(response,query)
-                # if output_status:
-                print(f"Response: {response}")
-                # else:
-                #     #TODO : Add a response for invalid responses
-                #     # print(f"\{reason}")
-                #     print("Invalid Response")
-            except Exception as e:
-                print(f"Error during processing: {str(e)}")
-        else:
-            print(f"{reason}")
+        asyncio.run(answer_query(query, query_validator, integrated_rag, config))
+
+
+async def answer_query(query: str, query_validator: Validator, integrated_rag: IntegratedRAGPipeline, config: dict):
+    """
+    Validate a query and stream its answer, or print why it was rejected.
+    Validation runs on the async path, so rejections are LLM-phrased when llm_rejection_responses is set.
+    """
+    input_status, reason = await query_validator.avalidate_input(query)
+    if input_status:
+        try:
+            # Stream the answer so the user sees tokens as soon as they are generated
+            print("Response: ", end="", flush=True)
+            response = ""
+            async for chunk in integrated_rag.astream(query,config['course_k'],
+                                                      config['review_k'],
+                                                      config['final_k']):
+                response += chunk
+                print(chunk, end="", flush=True)
+            print()
+            # print(f"\nQuery: {query}")
+            # print(f"Response: {response}")
+
+            # output_status, _, _ = query_validator.validate_output(response,query)
+            # if output_status:
+            # else:
+            #     #TODO : Add a response for invalid responses
+            #     # print(f"\{reason}")
+            #     print("Invalid Response")
+        except Exception as e:
+            print(f"Error during processing: {str(e)}")
+    else:
+        print(f"{reason}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
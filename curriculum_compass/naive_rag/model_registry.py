@@ -0,0 +1,69 @@
+import threading
+import torch
+
+
+def module_memory_bytes(model) -> int:
+    """Bytes held by a model's parameters and buffers (0 for non-PyTorch objects)."""
+    if not isinstance(model, torch.nn.Module):
+        return 0
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of loaded models.
+
+    Entries are keyed by (kind, model name, dtype, device) so every component asking
+    for the same weights gets the same object. Models are loaded on first request,
+    and concurrent first requests for one key load it only once.
+    """
+    def __init__(self):
+        self._models = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: tuple, loader):
+        """
+        Return the model registered under `key`, loading it with `loader()` on first use.
+
+        Args:
+            key: (kind, model_name, dtype, device) tuple identifying the weights.
+            loader: Zero-argument callable that loads and returns the model.
+        """
+        if key in self._models:
+            return self._models[key]
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._models:
+                print(f"Loading model {key[1]} ({key[0]}, dtype={key[2]}, device={key[3]})")
+                self._models[key] = loader()
+        return self._models[key]
+
+    def __contains__(self, key):
+        return key in self._models
+
+    def release(self, key: tuple) -> bool:
+        """Drop a model from the registry so it can be garbage collected."""
+        with self._lock:
+            return self._models.pop(key, None) is not None
+
+    def memory_report(self) -> dict:
+        """Return the memory held by each loaded model in MB, plus the total."""
+        report = {}
+        for key, model in list(self._models.items()):
+            # Models are stored alone or as (model, tokenizer) tuples
+            modules = model if isinstance(model, tuple) else (model,)
+            report[" | ".join(str(part) for part in key)] = sum(module_memory_bytes(m) for m in modules) / 2**20
+        report["total"] = sum(report.values())
+        return report
+
+    def print_memory_report(self) -> None:
+        """Print the memory held by each loaded model."""
+        for name, megabytes in self.memory_report().items():
+            print(f"{name}: {megabytes:.1f} MB")
+
+
+# Shared by every pipeline, validator and agent in the process
+model_registry = ModelRegistry()
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+
+import torch
+from transformers import DynamicCache
+
+_SENTINEL = "\x00PREFIX_SPLIT\x00"
+
+
+class PrefixCache:
+    """
+    Past-key-values cache for static system prompts.
+
+    The chat-template text that precedes the user message (system turn plus the user
+    header) is prefilled once per system prompt; later generations start from a copy
+    of that cache, so only the user message is encoded.
+    """
+    def __init__(self, model, tokenizer, maxsize: int = 16):
+        """
+        Args:
+            model: The causal language model.
+            tokenizer: The model's tokenizer (with a chat template).
+            maxsize: Number of system prompts whose caches are kept.
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _prefix_ids(self, system_prompt: str) -> torch.Tensor:
+        """Tokenize the chat-template text that comes before the user message."""
+        text = self.tokenizer.apply_chat_template(
+            [{"role": "system", "content": system_prompt}, {"role": "user", "content": _SENTINEL}],
+            tokenize=False,
+            add_generation_prompt=False
+        )
+        prefix_text = text[:text.index(_SENTINEL)]
+        return self.tokenizer([prefix_text], return_tensors="pt", add_special_tokens=False)["input_ids"]
+
+    def _prefill(self, prefix_ids: torch.Tensor) -> DynamicCache:
+        with torch.no_grad():
+            outputs = self.model(input_ids=prefix_ids.to(self.model.device),
+                                 past_key_values=DynamicCache(), use_cache=True)
+        return outputs.past_key_values
+
+    def get(self, system_prompt: str):
+        """Return (prefix_ids, past_key_values) for a system prompt, prefilling it on first use."""
+        with self._lock:
+            entry = self._entries.get(system_prompt)
+            if entry is not None:
+                self._entries.move_to_end(system_prompt)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        prefix_ids = self._prefix_ids(system_prompt)
+        entry = (prefix_ids, self._prefill(prefix_ids))
+        with self._lock:
+            self._entries[system_prompt] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def generate_kwargs(self, system_prompt: str, input_ids: torch.Tensor) -> dict:
+        """
+        Return `model.generate` arguments that resume from the cached system-prompt prefix.
+
+        Args:
+            system_prompt: The system prompt used to build the inputs.
+            input_ids: The full tokenized prompt (batch of one).
+
+        Returns:
+            {"past_key_values": cache copy} when the prompt starts with the cached prefix,
+            otherwise {} (the prompt is encoded from scratch).
+        """
+        if input_ids.shape[0] != 1:
+            return {}
+        try:
+            prefix_ids, past_key_values = self.get(system_prompt)
+        except Exception as e:
+            print(f"Error prefilling system prompt cache: {str(e)}")
+            return {}
+        length = prefix_ids.shape[1]
+        if input_ids.shape[1] <= length or not torch.equal(input_ids[0, :length].cpu(), prefix_ids[0]):
+            return {}
+        return {"past_key_values": self._fork(past_key_values)}
+
+    @staticmethod
+    def _fork(past_key_values: DynamicCache) -> DynamicCache:
+        """
+        Return a cache that generate() can extend without changing the cached prefix.
+
+        DynamicCache grows by concatenating into new tensors (and crops by re-slicing), never
+        by writing into the existing ones, so the fork only needs its own per-layer lists; the
+        prefix key/value tensors are shared instead of copied on every call.
+        """
+        return DynamicCache.from_legacy_cache(past_key_values.to_legacy_cache())
+
+    def stats(self) -> dict:
+        """Return cache hit metrics."""
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0, "size": len(self._entries)}
+
+
+_prefix_caches = {}
+_prefix_caches_lock = threading.Lock()
+
+
+def get_prefix_cache(model, tokenizer) -> PrefixCache:
+    """Return the shared PrefixCache for a model, creating it on first use."""
+    with _prefix_caches_lock:
+        cache = _prefix_caches.get(id(model))
+        if cache is None or cache.model is not model:
+            cache = _prefix_caches[id(model)] = PrefixCache(model, tokenizer)
+        return cache
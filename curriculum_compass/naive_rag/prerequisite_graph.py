@@ -0,0 +1,171 @@
+import ast
+import weave
+
+# Subject descriptions used by NU Banner mapped to their course code prefixes
+SUBJECT_CODES = {
+    'computer science': 'CS',
+    'data science': 'DS',
+    'mathematics': 'MATH',
+    'electrical and comp engineerng': 'EECE',
+    'electrical and computer engineering': 'EECE',
+    'information science': 'IS',
+    'english writing': 'ENGW',
+    'english': 'ENGL',
+    'economics': 'ECON',
+    'psychology': 'PSYC',
+    'art - design': 'ARTG',
+    'earth & environmental sciences': 'EESC',
+    'cybersecurity': 'CY',
+    'physics': 'PHYS'
+}
+
+
+def subject_to_code(subject: str) -> str:
+    """Map a Banner subject description (e.g. 'Computer Science') to its code prefix (e.g. 'CS')."""
+    subject = subject.strip()
+    code = SUBJECT_CODES.get(subject.lower())
+    if code:
+        return code
+    return ''.join(word[0] for word in subject.replace('-', ' ').split() if word[0].isalnum()).upper()
+
+
+def parse_prerequisites(raw) -> list:
+    """
+    Parse the scraped Prerequisites column into requirement groups.
+
+    The column is a list of {'and_or', 'subject', 'course_number'} entries read left to right:
+    'And' starts a new requirement and 'Or' adds an alternative to the current one.
+
+    Args:
+        raw: The Prerequisites cell, e.g. "[{'and_or': '', 'subject': 'Computer Science', 'course_number': '5800'}]"
+
+    Returns:
+        List of requirement groups; every group must be satisfied by taking any one course in it.
+    """
+    if not raw or not isinstance(raw, str) or raw.strip() in ('', '[]'):
+        return []
+    try:
+        entries = ast.literal_eval(raw)
+    except (ValueError, SyntaxError):
+        return []
+
+    groups = []
+    for entry in entries:
+        subject = (entry.get('subject') or '').strip()
+        number = (entry.get('course_number') or '').strip()
+        if not subject or not number:
+            continue
+        code = f"{subject_to_code(subject)}{number}"
+        if not groups or (entry.get('and_or') or '').strip().lower() == 'and':
+            groups.append([])
+        if code not in groups[-1]:
+            groups[-1].append(code)
+    return [tuple(group) for group in groups if group]
+
+
+def format_prerequisites(groups) -> str:
+    """Render requirement groups as text, e.g. '(CS5004 or CS5010) and CS5500'."""
+    return ' and '.join(group[0] if len(group) == 1 else '(' + ' or '.join(group) + ')' for group in groups)
+
+
+class PrerequisiteGraph:
+    """
+    Directed prerequisite graph over course codes with precomputed transitive closure.
+
+    Direct edges, reverse edges and both closures are materialised as frozensets at build
+    time, so "what do I need before X" and "what does X unlock" are single dict lookups.
+    """
+    def __init__(self, requirements: dict):
+        """
+        Build the graph and its closures.
+
+        Args:
+            requirements: Mapping of course code to its requirement groups (see parse_prerequisites).
+        """
+        self.requirements = {code: list(groups) for code, groups in requirements.items()}
+
+        direct = {}
+        for code, groups in self.requirements.items():
+            direct[code] = frozenset(prereq for group in groups for prereq in group if prereq != code)
+        nodes = set(direct) | {prereq for prereqs in direct.values() for prereq in prereqs}
+
+        reverse = {node: set() for node in nodes}
+        for code, prereqs in direct.items():
+            for prereq in prereqs:
+                reverse[prereq].add(code)
+
+        self.direct_prerequisites = {node: direct.get(node, frozenset()) for node in nodes}
+        self.direct_unlocks = {node: frozenset(unlocks) for node, unlocks in reverse.items()}
+        self.all_prerequisites = self._closure(self.direct_prerequisites)
+        self.all_unlocks = self._closure(self.direct_unlocks)
+
+    @staticmethod
+    def _closure(edges: dict) -> dict:
+        """Compute reachability sets for every node (cycle-safe iterative DFS)."""
+        closure = {}
+        for start in edges:
+            seen = set()
+            stack = list(edges[start])
+            while stack:
+                node = stack.pop()
+                if node in seen or node == start:
+                    continue
+                seen.add(node)
+                if node in closure:
+                    seen |= closure[node] - {start}
+                else:
+                    stack.extend(edges.get(node, ()))
+            closure[start] = frozenset(seen)
+        return closure
+
+    @classmethod
+    def from_records(cls, records) -> "PrerequisiteGraph":
+        """Build the graph from a CourseRecordStore."""
+        requirements = {}
+        for record in records:
+            code = record.course_code.upper()
+            groups = parse_prerequisites(record.prerequisites)
+            if groups and not requirements.get(code):
+                requirements[code] = groups
+            else:
+                requirements.setdefault(code, groups)
+        return cls(requirements)
+
+    def __contains__(self, code):
+        return code.upper() in self.direct_prerequisites
+
+    def prerequisites(self, code: str, transitive: bool = False) -> frozenset:
+        """Courses that must (or may, for alternatives) be taken before `code`."""
+        table = self.all_prerequisites if transitive else self.direct_prerequisites
+        return table.get(code.upper(), frozenset())
+
+    def unlocks(self, code: str, transitive: bool = False) -> frozenset:
+        """Courses that list `code` as a prerequisite, directly or through a chain."""
+        table = self.all_unlocks if transitive else self.direct_unlocks
+        return table.get(code.upper(), frozenset())
+
+    def requires(self, code: str, other: str) -> bool:
+        """Whether `other` appears anywhere in the prerequisite chain of `code`."""
+        return other.upper() in self.all_prerequisites.get(code.upper(), frozenset())
+
+    def describe(self, code: str) -> str:
+        """Render prerequisite and unlock information for a course as plain text."""
+        code = code.upper()
+        groups = self.requirements.get(code, [])
+        requirement = format_prerequisites(groups) if groups else 'None required'
+        lines = [f"=== PREREQUISITES: {code} ===", f"Requires: {requirement}"]
+
+        earlier = self.prerequisites(code, transitive=True) - self.prerequisites(code)
+        if earlier:
+            lines.append(f"Earlier courses in the chain: {', '.join(sorted(earlier))}")
+        unlocks = self.unlocks(code)
+        lines.append(f"Directly unlocks: {', '.join(sorted(unlocks)) if unlocks else 'None'}")
+        later = self.unlocks(code, transitive=True) - unlocks
+        if later:
+            lines.append(f"Later courses it leads to: {', '.join(sorted(later))}")
+        return "\n".join(lines)
+
+    @weave.op(name="lookup_prerequisites")
+    def __call__(self, course_codes) -> list:
+        """Tool entry point: describe prerequisites and unlocks for known course codes."""
+        return [self.describe(code) for code in course_codes if code in self]
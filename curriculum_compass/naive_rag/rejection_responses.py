@@ -0,0 +1,129 @@
+import threading
+import zlib
+
+# Topics the suggested questions are drawn from
+SUGGESTION_TOPICS = [
+    "Machine Learning",
+    "Algorithms",
+    "Database Management Systems",
+    "Artificial Intelligence",
+    "Data Structures",
+    "Software Engineering",
+    "Computer Networks",
+    "Operating Systems"
+]
+
+# One template per kind of question students ask about a course
+SUGGESTION_TEMPLATES = [
+    "What topics are covered in NEU's {topic} course?",
+    "How do professors teach {topic} at NEU?",
+    "How challenging is the {topic} course at NEU according to student reviews?",
+    "What projects and assignments are included in {topic}?",
+    "Which NEU professors specialize in {topic}?"
+]
+
+# Guard scanner -> rejection category
+SCANNER_CATEGORIES = {
+    "BanSubstrings": "offensive language",
+    "Toxicity": "offensive language",
+    "Gibberish": "unclear input",
+    "PromptInjection": "instruction override",
+    "TokenLimit": "message length"
+}
+
+CATEGORY_EXPLANATIONS = {
+    "offensive language": "Your message contains language we can't respond to; please keep questions respectful.",
+    "unclear input": "We couldn't make out a question in your message; please rephrase it in plain words.",
+    "instruction override": "Your message tries to change how the assistant works rather than ask about courses.",
+    "message length": "Your message is too long to process; please ask a shorter, focused question.",
+    "scan error": "We couldn't check your message right now; please try asking again."
+}
+
+RELEVANCE_EXPLANATION = ("This assistant only answers questions about Northeastern University courses, "
+                         "professors and course reviews, and your question isn't about those.")
+
+
+def stable_index(text: str, size: int) -> int:
+    """Index into a list of `size` items that is the same for the same text across runs."""
+    return zlib.crc32(" ".join(text.casefold().split()).encode("utf-8")) % size
+
+
+class RejectionResponder:
+    """
+    Deterministic three-line responses for queries rejected by the guard or the relevancy check.
+
+    The response names the problem from the failing scanner's category and suggests a question
+    from a curated bank, picked from the query text so repeats get the same answer. An LLM can
+    optionally phrase the response instead (arefine); at most `max_llm_responses` of those run
+    at a time, and rejections arriving while they are busy get the template, so a burst of
+    rejected queries never queues up LLM work ahead of legitimate requests.
+    """
+    def __init__(self, topics: list = None, templates: list = None, max_llm_responses: int = 1):
+        """
+        Args:
+            topics: Course topics suggested questions are about (defaults to SUGGESTION_TOPICS).
+            templates: Question templates with a {topic} placeholder (defaults to SUGGESTION_TEMPLATES).
+            max_llm_responses: LLM-phrased responses allowed to run concurrently.
+        """
+        self.topics = topics or SUGGESTION_TOPICS
+        self.templates = templates or SUGGESTION_TEMPLATES
+        self._llm_slots = threading.BoundedSemaphore(max_llm_responses)
+        self.llm_responses = 0
+        self.llm_busy = 0
+
+    def suggest(self, query: str = "") -> str:
+        """Suggest a course question, about a topic the query mentions when there is one."""
+        folded = query.casefold()
+        topic = next((topic for topic in self.topics if topic.casefold() in folded), None)
+        if topic is None:
+            topic = self.topics[stable_index(query, len(self.topics))]
+        return self.templates[stable_index(query[::-1], len(self.templates))].format(topic=topic)
+
+    @staticmethod
+    def guard_category(guard_results: dict) -> str:
+        """Category of the first scanner that failed ("scan error" if none reported a result)."""
+        failed = [name for name, result in (guard_results or {}).items() if not result.get("is_valid", True)]
+        if not failed:
+            return "scan error"
+        return SCANNER_CATEGORIES.get(failed[0], "offensive language")
+
+    def guard_fail(self, guard_results: dict, query: str = "") -> str:
+        """Response for a query rejected by the guard scanners."""
+        explanation = CATEGORY_EXPLANATIONS[self.guard_category(guard_results)]
+        return f"CONTENT POLICY VIOLATION\n{explanation}\nSuggested rephrasing: {self.suggest(query)}"
+
+    def relevance_fail(self, query: str) -> str:
+        """Response for a query that is not about NEU courses or professors."""
+        return f"NOT RELEVANT\n{RELEVANCE_EXPLANATION}\nSuggested question: {self.suggest(query)}"
+
+    async def arefine(self, backend, system_prompt: str, user_prompt: str, fallback: str,
+                      temperature: float = None) -> str:
+        """
+        Have the LLM phrase a rejection, returning `fallback` (the template response) if every
+        LLM slot is busy or generation fails.
+
+        Args:
+            backend: InferenceBackend to generate with.
+            system_prompt: Instructions for the three-line response.
+            user_prompt: Details of the rejected query.
+            fallback: Template response.
+            temperature: Sampling temperature.
+        """
+        if not self._llm_slots.acquire(blocking=False):
+            self.llm_busy += 1
+            return fallback
+        try:
+            response = (await backend.agenerate(system_prompt, user_prompt, "short_explanation", temperature)).strip()
+            if not response:
+                return fallback
+            self.llm_responses += 1
+            return response
+        except Exception as e:
+            print(f"LLM rejection response failed, using the template: {e}")
+            return fallback
+        finally:
+            self._llm_slots.release()
+
+    def stats(self) -> dict:
+        """LLM-phrased responses, and rejections that got the template because every LLM slot was busy."""
+        return {"llm_responses": self.llm_responses, "llm_busy": self.llm_busy}
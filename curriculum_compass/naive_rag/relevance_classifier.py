@@ -0,0 +1,229 @@
+import json
+import os
+import pickle
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+
+def load_relevance_training_data(relevant_path: str, off_topic_path: str, extra_relevant_path: str = None):
+    """
+    Load labelled queries for the relevance classifier.
+
+    Args:
+        relevant_path: Pickled list of course/professor questions (the SFT dataset queries).
+        off_topic_path: JSON list of known off-topic queries.
+        extra_relevant_path: Optional JSON list of relevant queries the SFT dataset lacks
+                             (schedule, meeting time and prerequisite questions).
+
+    Returns:
+        Tuple of (queries, labels) with label 1 for relevant and 0 for off-topic.
+    """
+    with open(relevant_path, 'rb') as f:
+        relevant = [query for query in pickle.load(f) if isinstance(query, str) and query.strip()]
+    if extra_relevant_path:
+        with open(extra_relevant_path, 'r') as f:
+            relevant += json.load(f)
+    with open(off_topic_path, 'r') as f:
+        off_topic = json.load(f)
+    return relevant + off_topic, [1] * len(relevant) + [0] * len(off_topic)
+
+
+def calibrate_thresholds(probabilities: np.ndarray, labels: np.ndarray, target_precision: float = 0.99) -> tuple:
+    """
+    Pick the widest thresholds whose confident decisions still meet a precision target.
+
+    Args:
+        probabilities: Held-out probabilities of being relevant.
+        labels: Held-out labels (1 relevant, 0 off-topic).
+        target_precision: Minimum share of correct decisions on each side of the band.
+
+    Returns:
+        (relevant_threshold, irrelevant_threshold). A side that cannot meet the target
+        gets a threshold no probability reaches (1.0 above, 0.0 below), leaving those
+        queries to the LLM.
+    """
+    probabilities, labels = np.asarray(probabilities, dtype=np.float64), np.asarray(labels)
+
+    def widest(order, positive_label):
+        # Walk from the most confident query outwards while the running precision holds
+        correct = np.cumsum(labels[order] == positive_label)
+        precision = correct / np.arange(1, len(order) + 1)
+        meets = np.flatnonzero(precision >= target_precision)
+        return probabilities[order[meets[-1]]] if meets.size else None
+
+    relevant = widest(np.argsort(-probabilities, kind="stable"), 1)
+    irrelevant = widest(np.argsort(probabilities, kind="stable"), 0)
+    relevant_threshold = 1.0 if relevant is None else float(relevant)
+    irrelevant_threshold = 0.0 if irrelevant is None else float(irrelevant)
+    if irrelevant_threshold >= relevant_threshold:
+        # A loose target can make the bands overlap; meet in the middle instead
+        irrelevant_threshold = relevant_threshold = (irrelevant_threshold + relevant_threshold) / 2
+    return relevant_threshold, irrelevant_threshold
+
+
+class RelevanceClassifier:
+    """
+    Logistic regression over sentence embeddings that decides query relevancy without the LLM.
+
+    A query with probability of being relevant at or above `relevant_threshold` is accepted,
+    one at or below `irrelevant_threshold` is rejected, and anything in between is left to
+    the LLM relevancy check. Scoring is a single dot product over the query embedding.
+    """
+    def __init__(self, embedding_model, relevant_threshold: float = 0.9, irrelevant_threshold: float = 0.1):
+        """
+        Args:
+            embedding_model: SentenceTransformer used to embed queries (the retrieval embedding model).
+            relevant_threshold: Probability at or above which a query is accepted as relevant.
+            irrelevant_threshold: Probability at or below which a query is rejected as off-topic.
+        """
+        if not 0.0 <= irrelevant_threshold <= relevant_threshold <= 1.0:
+            raise ValueError("Expected 0 <= irrelevant_threshold <= relevant_threshold <= 1")
+        self.embedding_model = embedding_model
+        self.relevant_threshold = relevant_threshold
+        self.irrelevant_threshold = irrelevant_threshold
+        self.coef = None
+        self.intercept = 0.0
+
+    def embed(self, queries: list) -> np.ndarray:
+        return np.asarray(self.embedding_model.encode(list(queries), normalize_embeddings=True), dtype=np.float32)
+
+    def fit(self, queries: list, labels: list, regularization: float = 1.0, embeddings: np.ndarray = None):
+        """
+        Train the classifier.
+
+        Args:
+            queries: Training queries.
+            labels: 1 for relevant, 0 for off-topic.
+            regularization: Inverse regularization strength (sklearn's C).
+            embeddings: Precomputed query embeddings, to skip re-encoding.
+
+        Returns:
+            The fitted classifier.
+        """
+        embeddings = self.embed(queries) if embeddings is None else embeddings
+        # Off-topic examples are far fewer than the SFT queries, so weight the classes equally
+        model = LogisticRegression(C=regularization, class_weight="balanced", max_iter=1000)
+        model.fit(embeddings, labels)
+        self.coef = model.coef_[0].astype(np.float32)
+        self.intercept = float(model.intercept_[0])
+        return self
+
+    def probabilities(self, embeddings: np.ndarray) -> np.ndarray:
+        """Probability of being relevant for each row of precomputed embeddings."""
+        if self.coef is None:
+            raise RuntimeError("RelevanceClassifier has not been trained or loaded")
+        return 1.0 / (1.0 + np.exp(-(embeddings @ self.coef + self.intercept)))
+
+    def probability(self, query: str) -> float:
+        """Probability that a query is relevant."""
+        return float(self.probabilities(self.embed([query]))[0])
+
+    def decide(self, probability: float):
+        """Map a probability to True (relevant), False (off-topic) or None (uncertain)."""
+        if probability >= self.relevant_threshold:
+            return True
+        if probability <= self.irrelevant_threshold:
+            return False
+        return None
+
+    def predict(self, query: str):
+        """
+        Classify a query.
+
+        Returns:
+            True if confidently relevant, False if confidently off-topic, or None when the
+            probability falls in the uncertain band and the LLM should decide.
+        """
+        return self.decide(self.probability(query))
+
+    def save(self, path: str, embedding_model_name: str = "") -> None:
+        """Write the trained weights and thresholds, tagged with the embedding model they belong to."""
+        np.savez(path, coef=self.coef, intercept=np.float32(self.intercept),
+                 thresholds=np.float32([self.relevant_threshold, self.irrelevant_threshold]),
+                 embedding_model_name=np.str_(embedding_model_name))
+
+    @staticmethod
+    def saved_embedding_model(path: str) -> str:
+        """Name of the embedding model a saved classifier was trained with ('' if untagged)."""
+        with np.load(path) as weights:
+            return str(weights["embedding_model_name"]) if "embedding_model_name" in weights else ""
+
+    @classmethod
+    def load(cls, path: str, embedding_model, relevant_threshold: float = None, irrelevant_threshold: float = None):
+        """Load a classifier saved with save(); thresholds that are not given come from the file."""
+        with np.load(path) as weights:
+            saved = weights["thresholds"].tolist() if "thresholds" in weights else [0.9, 0.1]
+            classifier = cls(embedding_model,
+                             saved[0] if relevant_threshold is None else relevant_threshold,
+                             saved[1] if irrelevant_threshold is None else irrelevant_threshold)
+            classifier.coef = weights["coef"]
+            classifier.intercept = float(weights["intercept"])
+        return classifier
+
+
+def train_relevance_classifier(queries: list, labels: list, embedding_model, target_precision: float = 0.99,
+                               regularization: float = 1.0, test_size: float = 0.2, embeddings: np.ndarray = None):
+    """
+    Train a classifier and calibrate its thresholds on held-out queries.
+
+    The thresholds are fitted to the probabilities of the embedding model the classifier
+    runs with, on a stratified held-out split; the classifier is then refit on all queries.
+
+    Args:
+        queries: Labelled queries.
+        labels: 1 for relevant, 0 for off-topic.
+        embedding_model: SentenceTransformer the classifier embeds queries with.
+        target_precision: Precision each confident decision band must reach on held-out queries.
+        regularization: Inverse regularization strength (sklearn's C).
+        test_size: Share of queries held out for calibration.
+        embeddings: Precomputed query embeddings, to skip re-encoding.
+
+    Returns:
+        The fitted RelevanceClassifier with calibrated thresholds.
+    """
+    labels = np.asarray(labels)
+    classifier = RelevanceClassifier(embedding_model)
+    embeddings = classifier.embed(queries) if embeddings is None else embeddings
+    train_idx, test_idx = train_test_split(np.arange(len(labels)), test_size=test_size,
+                                           stratify=labels, random_state=0)
+    classifier.fit([queries[i] for i in train_idx], labels[train_idx], regularization, embeddings[train_idx])
+    thresholds = calibrate_thresholds(classifier.probabilities(embeddings[test_idx]), labels[test_idx],
+                                      target_precision)
+    classifier.fit(queries, labels, regularization, embeddings)
+    classifier.relevant_threshold, classifier.irrelevant_threshold = thresholds
+    return classifier
+
+
+def load_relevance_classifier(config: dict, embedding_model):
+    """
+    Load the relevance classifier configured in config.json, training and saving it on first use.
+
+    Args:
+        config: Application config.
+        embedding_model: SentenceTransformer the classifier embeds queries with.
+
+    Returns:
+        A RelevanceClassifier, or None if the classifier is disabled.
+    """
+    if not config['relevance_classifier']:
+        return None
+    # Explicit thresholds in the config override the calibrated ones
+    thresholds = {
+        "relevant_threshold": config['relevance_relevant_threshold'],
+        "irrelevant_threshold": config['relevance_irrelevant_threshold']
+    }
+    path = config['relevance_classifier_path']
+    if os.path.exists(path):
+        if RelevanceClassifier.saved_embedding_model(path) == config['embedding_model_name']:
+            return RelevanceClassifier.load(path, embedding_model, **thresholds)
+        print(f"Relevance classifier at {path} was trained with another embedding model; retraining")
+    queries, labels = load_relevance_training_data(config['relevance_training_queries'],
+                                                   config['relevance_off_topic_queries'],
+                                                   config['relevance_extra_queries'])
+    classifier = train_relevance_classifier(queries, labels, embedding_model, config['relevance_target_precision'])
+    print(f"Calibrated relevance thresholds for {config['embedding_model_name']}: "
+          f"relevant >= {classifier.relevant_threshold:.3f}, irrelevant <= {classifier.irrelevant_threshold:.3f}")
+    classifier.save(path, config['embedding_model_name'])
+    return RelevanceClassifier.load(path, embedding_model, **thresholds)
@@ -1,18 +1,257 @@
 # Reranker Class
+import os
+from types import SimpleNamespace
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
 import torch
+from cache import LRUCache, content_hash
+from batching import MicroBatcher
+from model_registry import model_registry
+
+RERANKER_BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+
+
+class OnnxCrossEncoder:
+    """
+    ONNX Runtime wrapper exposing the same call signature as the PyTorch cross-encoder.
+
+    The model is exported once to `export_dir` (optionally with dynamic int8 weight
+    quantization) and reused on later runs.
+    """
+    def __init__(self, model, model_name, input_names, export_dir="onnx_models", quantize=False):
+        import onnxruntime
+
+        os.makedirs(export_dir, exist_ok=True)
+        base_name = model_name.replace("/", "--")
+        path = os.path.join(export_dir, f"{base_name}.onnx")
+        if not os.path.exists(path):
+            print(f"Exporting {model_name} to ONNX: {path}")
+            dummy = {name: torch.ones((1, 8), dtype=torch.long) for name in input_names}
+            axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            torch.onnx.export(model.cpu().eval(), tuple(dummy[name] for name in input_names), path,
+                              input_names=list(input_names), output_names=["logits"],
+                              dynamic_axes={**axes, "logits": {0: "batch"}}, opset_version=14,
+                              dynamo=False)
+        if quantize:
+            quantized_path = os.path.join(export_dir, f"{base_name}-int8.onnx")
+            if not os.path.exists(quantized_path):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+            path = quantized_path
+
+        self.input_names = list(input_names)
+        self.session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+
+    def __call__(self, **inputs):
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        logits = self.session.run(["logits"], feed)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
 
 class Reranker:
-    def __init__(self, reranker_model_name="cross-encoder/ms-marco-MiniLM-L-12-v2", device="cpu"):
+    def __init__(self, reranker_model_name="cross-encoder/ms-marco-MiniLM-L-12-v2", device="cpu",
+                 cache_size=4096, cache_ttl=None, micro_batch_size=0, micro_batch_wait_ms=5.0,
+                 batch_size=32, max_batch_tokens=16384, token_cache_size=8192, max_length=512,
+                 backend="torch", onnx_dir="onnx_models"):
         """
         Initialize the Reranker with a cross-encoder model.
         Args:
             reranker_model_name: Name of the Hugging Face model for reranking.
             device: Device to run the model on ("cpu" or "cuda").
+            cache_size: Maximum number of cached (query, document) scores (0 disables the cache).
+            cache_ttl: Optional lifetime of cached scores in seconds.
+            micro_batch_size: If > 0, pairs from concurrent callers are batched into shared
+                              forward passes of up to this many pairs.
+            micro_batch_wait_ms: How long the batcher waits for more callers before running a batch.
+            batch_size: Maximum number of pairs per forward pass.
+            max_batch_tokens: Maximum padded tokens (pairs x longest pair) per forward pass.
+            token_cache_size: Number of tokenized documents kept for reuse across queries (0 disables).
+            max_length: Maximum pair length in tokens; longer pairs are truncated.
+            backend: "torch" (full precision), "int8" (PyTorch dynamic quantization),
+                     "onnx" or "onnx-int8" (ONNX Runtime); quantized backends run on CPU.
+            onnx_dir: Directory where exported ONNX models are stored.
         """
+        if backend not in RERANKER_BACKENDS:
+            raise ValueError(f"Unknown reranker backend '{backend}', expected one of {RERANKER_BACKENDS}")
+        if backend != "torch" and device != "cpu":
+            print(f"Reranker backend '{backend}' runs on CPU; ignoring device '{device}'")
+            device = "cpu"
         self.device = device
-        self.tokenizer = AutoTokenizer.from_pretrained(reranker_model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(reranker_model_name).to(device)
+        self.backend = backend
+        self.model_name = reranker_model_name
+        self.tokenizer = model_registry.get_or_load(("tokenizer", reranker_model_name, None, None),
+                                                    lambda: AutoTokenizer.from_pretrained(reranker_model_name))
+        try:
+            self.model = model_registry.get_or_load(
+                ("cross-encoder", reranker_model_name, backend, device),
+                lambda: self._load_model(reranker_model_name, backend, onnx_dir))
+        except Exception as e:
+            if not backend.startswith("onnx"):
+                raise
+            # Register the fallback under its own key so the onnx key never holds a PyTorch model
+            print(f"Error loading ONNX reranker ({e}); falling back to the PyTorch backend")
+            self.backend = "torch"
+            self.model = model_registry.get_or_load(
+                ("cross-encoder", reranker_model_name, "torch", device),
+                lambda: self._load_model(reranker_model_name, "torch", onnx_dir))
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_length = max_length
+        self.score_cache = LRUCache(maxsize=cache_size, ttl=cache_ttl) if cache_size else None
+        self.token_cache = LRUCache(maxsize=token_cache_size) if token_cache_size else None
+        self.batcher = (MicroBatcher(self._score_pairs, max_batch_size=micro_batch_size,
+                                     max_wait_ms=micro_batch_wait_ms)
+                        if micro_batch_size else None)
+
+    def _load_model(self, model_name, backend, onnx_dir):
+        """Load the cross-encoder for the selected backend."""
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        if backend == "torch":
+            return model.to(self.device)
+        if backend == "int8":
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                       if name in self.tokenizer.model_input_names]
+        return OnnxCrossEncoder(model, model_name, input_names, export_dir=onnx_dir,
+                                quantize=backend == "onnx-int8")
+
+    def _tokenize(self, text, cache=None):
+        """Tokenize text without special tokens, reusing cached token ids when available."""
+        ids = cache.get(text) if cache is not None else None
+        if ids is None:
+            ids = self.tokenizer(text, add_special_tokens=False, truncation=True,
+                                 max_length=self.max_length)["input_ids"]
+            if cache is not None:
+                cache.set(text, ids)
+        return ids
+
+    def _truncate_pair(self, query_ids, doc_ids):
+        """Trim a pair to max_length the way the tokenizer's 'longest_first' strategy does."""
+        budget = self.max_length - self.tokenizer.num_special_tokens_to_add(pair=True)
+        if len(query_ids) + len(doc_ids) <= budget:
+            return query_ids, doc_ids
+        if len(query_ids) <= budget // 2:
+            return query_ids, doc_ids[:budget - len(query_ids)]
+        if len(doc_ids) <= budget // 2:
+            return query_ids[:budget - len(doc_ids)], doc_ids
+        return query_ids[:budget - budget // 2], doc_ids[:budget // 2]
+
+    def _encode_pairs(self, pairs):
+        """Build model inputs (with special tokens and truncation) for each query-document pair."""
+        query_ids = {}
+        encoded = []
+        for query, doc in pairs:
+            if query not in query_ids:
+                query_ids[query] = self._tokenize(query)
+            ids, pair_ids = self._truncate_pair(query_ids[query], self._tokenize(doc, self.token_cache))
+            encoded.append(self.tokenizer.prepare_for_model(ids, pair_ids, truncation=False))
+        return encoded
+
+    def _length_buckets(self, lengths):
+        """Group pair indices, sorted by length, into batches bounded by pair and padded-token counts."""
+        order = sorted(range(len(lengths)), key=lambda idx: lengths[idx])
+        batches, current = [], []
+        for idx in order:
+            # Lengths are ascending, so the padded width of a batch is its newest pair's length
+            if current and (len(current) >= self.batch_size or
+                            (len(current) + 1) * lengths[idx] > self.max_batch_tokens):
+                batches.append(current)
+                current = []
+            current.append(idx)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _collate(self, encoded):
+        """Pad a batch of encoded pairs to its longest member."""
+        width = max(len(item["input_ids"]) for item in encoded)
+        pad_id = self.tokenizer.pad_token_id or 0
+        inputs = {"input_ids": torch.full((len(encoded), width), pad_id, dtype=torch.long),
+                  "attention_mask": torch.zeros((len(encoded), width), dtype=torch.long)}
+        if "token_type_ids" in encoded[0]:
+            inputs["token_type_ids"] = torch.zeros((len(encoded), width), dtype=torch.long)
+        for row, item in enumerate(encoded):
+            length = len(item["input_ids"])
+            inputs["input_ids"][row, :length] = torch.tensor(item["input_ids"])
+            inputs["attention_mask"][row, :length] = 1
+            if "token_type_ids" in inputs:
+                inputs["token_type_ids"][row, :length] = torch.tensor(item["token_type_ids"])
+        return {key: value.to(self.device) for key, value in inputs.items()}
+
+    def _score_pairs(self, pairs):
+        """
+        Run the cross-encoder over query-document pairs.
+
+        Pairs are sorted by token length and scored in bounded sub-batches so short
+        reviews are not padded to the length of the longest course description.
+        Args:
+            pairs: List of [query, document] pairs.
+        Returns:
+            List of relevance scores, one per pair.
+        """
+        encoded = self._encode_pairs(pairs)
+        scores = [0.0] * len(pairs)
+        for batch in self._length_buckets([len(item["input_ids"]) for item in encoded]):
+            inputs = self._collate([encoded[idx] for idx in batch])
+
+            # Predict relevance scores
+            with torch.no_grad():
+                outputs = self.model(**inputs)
+            for idx, score in zip(batch, outputs.logits.view(-1).tolist()):
+                scores[idx] = score
+        return scores
+
+    def _run_pairs(self, pairs):
+        """Score pairs directly, or through the shared micro-batcher when enabled."""
+        if self.batcher is not None:
+            return self.batcher(pairs)
+        return self._score_pairs(pairs)
+
+    def score(self, query, documents):
+        """
+        Score documents against the query, reusing cached scores where available.
+        Args:
+            query: The input query string.
+            documents: List of documents to score.
+        Returns:
+            List of relevance scores aligned with documents.
+        """
+        if not documents:
+            return []
+        if self.score_cache is None:
+            return self._run_pairs([[query, doc] for doc in documents])
+
+        # Keyed on the exact query that is scored: the cross-encoder sees case and punctuation
+        keys = [(self.model_name, self.backend, query, content_hash(doc)) for doc in documents]
+        scores = [self.score_cache.get(key) for key in keys]
+        missing = [idx for idx, score in enumerate(scores) if score is None]
+        if missing:
+            computed = self._run_pairs([[query, documents[idx]] for idx in missing])
+            for idx, score in zip(missing, computed):
+                scores[idx] = score
+                self.score_cache.set(keys[idx], score)
+        return scores
+
+    def cache_stats(self):
+        """Return hit-rate metrics for the score cache."""
+        return self.score_cache.stats() if self.score_cache is not None else {}
+
+    def token_cache_stats(self):
+        """Return hit-rate metrics for the document tokenization cache."""
+        return self.token_cache.stats() if self.token_cache is not None else {}
+
+    def rerank_with_scores(self, query, documents, top_k=None):
+        """
+        Rerank the documents and keep their relevance scores.
+        Args:
+            query: The input query string.
+            documents: List of documents to rerank.
+            top_k: Number of top documents to return (default: all).
+        Returns:
+            List of (document, score) tuples sorted by descending score.
+        """
+        scores = self.score(query, documents)
+        ranked = sorted(zip(documents, scores), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k] if top_k else ranked
 
     def rerank(self, query, documents, top_k=None):
         """
@@ -24,21 +263,16 @@ class Reranker:
         Returns:
             List of reranked documents.
         """
-        # Prepare query-document pairs
-        pairs = [[query, doc] for doc in documents]
-        
-        # Tokenize inputs for the cross-encoder
-        inputs = self.tokenizer(pairs, padding=True, truncation=True, return_tensors="pt", max_length=512)
-        inputs = {key: value.to(self.device) for key, value in inputs.items()}
-        
-        # Predict relevance scores
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            scores = outputs.logits.squeeze(-1)  # Extract scores from logits
-        
-        # Sort documents by scores in descending order
-        ranked_indices = scores.argsort(descending=True)
-        ranked_documents = [documents[idx] for idx in ranked_indices]
-        
-        # Return the top_k documents if specified
-        return ranked_documents[:top_k] if top_k else ranked_documents
\ No newline at end of file
+        return [doc for doc, _ in self.rerank_with_scores(query, documents, top_k)]
+
+    @classmethod
+    def from_config(cls, config, device="cpu", model_name=None):
+        """Build a reranker from the settings in config.json (model_name overrides reranker_model_name)."""
+        return cls(model_name or config['reranker_model_name'], device,
+                   cache_size=config['reranker_cache_size'], cache_ttl=config['reranker_cache_ttl'],
+                   micro_batch_size=config['reranker_micro_batch_size'],
+                   micro_batch_wait_ms=config['reranker_micro_batch_wait_ms'],
+                   batch_size=config['reranker_batch_size'],
+                   max_batch_tokens=config['reranker_max_batch_tokens'],
+                   token_cache_size=config['reranker_token_cache_size'],
+                   backend=config['reranker_backend'], onnx_dir=config['reranker_onnx_dir'])
@@ -0,0 +1,144 @@
+import re
+import threading
+import numpy as np
+from cache import LRUCache, normalize_query, content_hash
+
+# Words that do not change what a course question asks ("what is the workload of CS5800" / "CS5800 workload")
+FILLER_WORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "of", "for", "to", "in",
+    "on", "at", "about", "please", "can", "could", "would", "you", "me", "i", "my", "tell", "s", "like"
+})
+
+
+def content_tokens(query: str) -> list:
+    """Words of a query that carry its meaning, in order (fillers dropped, plurals folded)."""
+    tokens = re.findall(r"\w+", query.lower())
+    return [token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+            for token in tokens if token not in FILLER_WORDS]
+
+
+def token_edit_distance(left: list, right: list) -> int:
+    """Levenshtein distance between two token sequences."""
+    previous = list(range(len(right) + 1))
+    for i, left_token in enumerate(left, start=1):
+        current = [i]
+        for j, right_token in enumerate(right, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (left_token != right_token)))
+        previous = current
+    return previous[-1]
+
+
+class ResponseCache:
+    """
+    Two-tier cache of generated answers for the integrated pipeline.
+
+    - Semantic tier: checked before retrieval. A query that normalizes to a cached one,
+      or whose embedding is within `similarity_threshold` (cosine) of a cached query with
+      the same scope (e.g. the same course codes), returns the stored answer directly.
+      Embeddings rate opposite questions ("Is CS5800 hard?" / "Is CS5800 easy?") as near
+      duplicates, so a near-duplicate must also have the same content words, in the same
+      order, up to `max_token_edits` word edits.
+    - Exact tier: checked after retrieval, keyed on the normalized query and a hash of the
+      retrieved context, so only the LLM call is skipped.
+
+    Both tiers are LRU/TTL bounded, and all entries are dropped when the index version
+    (course index and review collection) changes.
+    """
+    def __init__(self, embedding_model=None, maxsize: int = 512, ttl: float = 3600,
+                 similarity_threshold: float = 0.95, max_token_edits: int = 0):
+        """
+        Args:
+            embedding_model: SentenceTransformer used for the semantic tier (None disables it).
+            maxsize: Maximum number of entries per tier.
+            ttl: Time-to-live of an answer in seconds.
+            similarity_threshold: Minimum cosine similarity for a semantic hit.
+            max_token_edits: Content-word edits (insertions, deletions, substitutions) allowed
+                             between a query and a semantic hit.
+        """
+        self.embedding_model = embedding_model
+        self.similarity_threshold = similarity_threshold
+        self.max_token_edits = max_token_edits
+        self.exact = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.semantic = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.index_version = None
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _check_version(self, index_version) -> None:
+        """Drop every answer when the indexes have changed since they were cached."""
+        with self._lock:
+            if index_version != self.index_version:
+                if self.index_version is not None:
+                    self.invalidate()
+                self.index_version = index_version
+
+    def _embed(self, query: str) -> np.ndarray:
+        return np.asarray(self.embedding_model.encode([query], normalize_embeddings=True)[0], dtype=np.float32)
+
+    def lookup_semantic(self, query: str, index_version, scope=()):
+        """
+        Return a cached answer for the same or a near-duplicate query, or None.
+
+        Args:
+            query: The user query.
+            index_version: Current version of the indexes the answers were built from.
+            scope: Hashable constraint that must match exactly (e.g. the course codes in the query).
+        """
+        self._check_version(index_version)
+        key = normalize_query(query)
+        entry = self.semantic.get(key, record=False)
+        if entry is not None and entry[2] == scope:
+            self.semantic.get(key)
+            return entry[1]
+        if self.embedding_model is None:
+            self.semantic.misses += 1
+            return None
+
+        tokens = content_tokens(key)
+        candidates = [(cached_key, value) for cached_key, value in self.semantic.items()
+                      if value[2] == scope and token_edit_distance(tokens, value[3]) <= self.max_token_edits]
+        if candidates:
+            try:
+                embedding = self._embed(key)
+            except Exception as e:
+                print(f"Error embedding query for the response cache: {str(e)}")
+                return None
+            similarities = np.stack([value[0] for _, value in candidates]) @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.similarity_threshold:
+                self.semantic.get(candidates[best][0])
+                return candidates[best][1][1]
+        self.semantic.misses += 1
+        return None
+
+    def lookup_exact(self, query: str, context_docs: list, index_version):
+        """Return the answer cached for this query and retrieved context, or None."""
+        self._check_version(index_version)
+        return self.exact.get((normalize_query(query), content_hash("\n".join(context_docs))))
+
+    def store(self, query: str, context_docs: list, index_version, response: str, scope=()) -> None:
+        """Cache a generated answer in both tiers."""
+        self._check_version(index_version)
+        key = normalize_query(query)
+        self.exact.set((key, content_hash("\n".join(context_docs))), response)
+        try:
+            embedding = self._embed(key) if self.embedding_model is not None else None
+        except Exception as e:
+            print(f"Error embedding query for the response cache: {str(e)}")
+            return
+        self.semantic.set(key, (embedding, response, scope, content_tokens(key)))
+
+    def invalidate(self) -> None:
+        """Drop all cached answers."""
+        self.exact.clear()
+        self.semantic.clear()
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Return per-tier hit metrics."""
+        return {
+            "exact": self.exact.stats(),
+            "semantic": self.semantic.stats(),
+            "invalidations": self.invalidations
+        }
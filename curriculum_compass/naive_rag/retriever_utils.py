@@ -11,4 +11,18 @@ def load_course_data(file_path: str):
         return CourseDataProcessor.process_course_data(file_path)
     except Exception as e:
         print(f"Error loading course data: {str(e)}")
+        return None
+
+
+def load_course_records(file_path: str):
+    """Load course data into a compact record store.
+    Args:
+        file_path (str): Path to the course data CSV file 
+    Returns:
+        CourseRecordStore: Course records keyed by CRN, rendered to text on demand
+    """
+    try:
+        return CourseDataProcessor.process_course_records(file_path)
+    except Exception as e:
+        print(f"Error loading course records: {str(e)}")
         return None
\ No newline at end of file
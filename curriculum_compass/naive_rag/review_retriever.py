@@ -49,6 +49,20 @@ class ReviewsRAGPipeline:
         # self.model = model
         # self.tokenizer = tokenizer
         self.reranker = reranker
+        # Bumped on every change to the collection, so caches built on the reviews can tell they are stale
+        self.version = 0
+
+    def add_reviews(self, ids: list, documents: list):
+        """Embed and add (or replace) reviews in the collection"""
+        embeddings = self.embedding_model.encode(documents)
+        self.collection.upsert(ids=[str(review_id) for review_id in ids], documents=list(documents),
+                               embeddings=[embedding.tolist() for embedding in embeddings])
+        self.version += 1
+
+    def remove_reviews(self, ids: list):
+        """Delete reviews from the collection"""
+        self.collection.delete(ids=[str(review_id) for review_id in ids])
+        self.version += 1
 
     @weave.op(name="retrieve_reviews")
     def retrieve(self, query, top_k=5):
@@ -64,11 +78,13 @@ class ReviewsRAGPipeline:
         return results["documents"]
 
     @weave.op(name="rerank_reviews")
-    def rerank(self, query, retrieved_docs, top_k):
+    def rerank(self, query, retrieved_docs, top_k, return_scores=False):
         # Flatten the list of retrieved documents
         flattened_docs = [doc for sublist in retrieved_docs for doc in sublist]
         
-        # Rerank using the reranker
+        # Rerank using the reranker, keeping the scores if requested
+        if return_scores:
+            return self.reranker.rerank_with_scores(query, flattened_docs, top_k=top_k)
         reranked_docs = self.reranker.rerank(query, flattened_docs, top_k=top_k)
         return reranked_docs
 
@@ -105,14 +121,14 @@ class ReviewsRAGPipeline:
     #     return response
 
     @weave.op(name="process_review_query")
-    def __call__(self, query: str, initial_k: int = 10, final_k: int = 5):
+    def __call__(self, query: str, initial_k: int = 10, final_k: int = 5, return_scores: bool = False):
         print("Retrieving")
         # Step 1: Retrieve relevant documents
         retrieved_docs = self.retrieve(query, initial_k)
 
         print("Reranking")
         # Step 2: Rerank the retrieved documents
-        reranked_docs = self.rerank(query, retrieved_docs, final_k)
+        reranked_docs = self.rerank(query, retrieved_docs, final_k, return_scores=return_scores)
 
         # print("Generating Response")
         # # Step 3: Generate a response
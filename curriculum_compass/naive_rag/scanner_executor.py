@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+SCAN_MODES = ("cost_ordered", "concurrent")
+
+
+class ScannerExecutor:
+    """
+    Runs a list of llm_guard scanners and records how long each one takes.
+
+    Every scanner is called as `scanner.scan(*args)` and returns llm_guard's
+    (sanitized_text, is_valid, risk_score) tuple. Two modes are supported:
+    - "cost_ordered": scanners run one at a time, cheapest first by measured mean
+      latency (the constructor order until each has been timed), stopping at the
+      first failure.
+    - "concurrent": all scanners start on a thread pool (model inference releases the
+      GIL) and the scan returns on the first failure, cancelling scanners not yet started.
+    """
+    def __init__(self, scanners: list, mode: str = "cost_ordered", max_workers: int = None):
+        """
+        Args:
+            scanners: Scanner instances, listed cheapest first if their cost is known.
+            mode: "cost_ordered" or "concurrent".
+            max_workers: Thread pool size for concurrent mode (defaults to one per scanner).
+        """
+        if mode not in SCAN_MODES:
+            raise ValueError(f"Unknown scan mode '{mode}', expected one of {SCAN_MODES}")
+        self.scanners = list(scanners)
+        self.mode = mode
+        self._timings = {type(scanner).__name__: {"calls": 0, "failures": 0, "skipped": 0,
+                                                  "total_seconds": 0.0, "max_seconds": 0.0}
+                         for scanner in self.scanners}
+        self._lock = threading.Lock()
+        self._pool = None
+        if mode == "concurrent" and self.scanners:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers or len(self.scanners),
+                                            thread_name_prefix="guard-scanner")
+
+    def _record(self, name: str, seconds: float, is_valid: bool) -> None:
+        with self._lock:
+            timing = self._timings[name]
+            timing["calls"] += 1
+            timing["failures"] += not is_valid
+            timing["total_seconds"] += seconds
+            timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+    def _run_one(self, scanner, args: tuple) -> dict:
+        start = time.perf_counter()
+        sanitized, is_valid, risk_score = scanner.scan(*args)
+        seconds = time.perf_counter() - start
+        self._record(type(scanner).__name__, seconds, is_valid)
+        return {"is_valid": is_valid, "risk_score": risk_score, "comment": sanitized,
+                "latency_ms": round(seconds * 1000, 2)}
+
+    def _by_cost(self) -> list:
+        with self._lock:
+            # Untimed scanners keep their constructor position ahead of any timed ones
+            def cost(item):
+                position, scanner = item
+                timing = self._timings[type(scanner).__name__]
+                return (1, timing["total_seconds"] / timing["calls"]) if timing["calls"] else (0, position)
+            return [scanner for _, scanner in sorted(enumerate(self.scanners), key=cost)]
+
+    def run(self, *args) -> dict:
+        """
+        Scan with every scanner until one fails.
+
+        Args:
+            *args: Arguments passed to each scanner's scan() (the text for input scanners,
+                   the prompt and output for output scanners).
+
+        Returns:
+            Dictionary mapping scanner name to {is_valid, risk_score, comment, latency_ms},
+            covering the scanners that ran. Scanners skipped after a failure are left out.
+        """
+        if self.mode == "concurrent" and self._pool is not None:
+            return self._run_concurrent(args)
+        results = {}
+        for scanner in self._by_cost():
+            results[type(scanner).__name__] = self._run_one(scanner, args)
+            if not results[type(scanner).__name__]["is_valid"]:
+                break
+        self._skip(name for name in self._timings if name not in results)
+        return results
+
+    def _skip(self, names) -> None:
+        with self._lock:
+            for name in names:
+                self._timings[name]["skipped"] += 1
+
+    def _run_concurrent(self, args: tuple) -> dict:
+        futures = {self._pool.submit(self._run_one, scanner, args): type(scanner).__name__
+                   for scanner in self.scanners}
+        results = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+            if any(not result["is_valid"] for result in results.values()):
+                # Scanners already running finish in the background and are still timed
+                self._skip(futures[future] for future in pending if future.cancel())
+                break
+        # Preserve the scanners' declared order
+        return {type(scanner).__name__: results[type(scanner).__name__]
+                for scanner in self.scanners if type(scanner).__name__ in results}
+
+    def stats(self) -> dict:
+        """Per-scanner call, failure and skip counts with mean/max/total latency in milliseconds."""
+        with self._lock:
+            return {
+                name: {
+                    "calls": timing["calls"],
+                    "failures": timing["failures"],
+                    "skipped": timing["skipped"],
+                    "mean_ms": timing["total_seconds"] / timing["calls"] * 1000 if timing["calls"] else 0.0,
+                    "max_ms": timing["max_seconds"] * 1000,
+                    "total_ms": timing["total_seconds"] * 1000
+                }
+                for name, timing in self._timings.items()
+            }
+
+    def close(self) -> None:
+        """Shut down the concurrent mode's thread pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
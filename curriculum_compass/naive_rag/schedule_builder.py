@@ -0,0 +1,239 @@
+import re
+import weave
+import pandas as pd
+from schedule_index import ScheduleIndex
+from time_utils import DAY_BITS, format_time
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+COURSE_CODE_PATTERN = re.compile(r'\b([A-Za-z]{2,4})\s?-?(\d{4})\b')
+
+
+def normalize_course_code(code: str) -> str:
+    """Normalize course codes like 'cs 5800' or 'CS-5800' to the 'CS5800' form used in the course data."""
+    return re.sub(r'[\s-]', '', code).upper()
+
+
+def course_subjects(course_codes) -> frozenset:
+    """Subject prefixes ('CS', 'DS', ...) of the given catalog course codes."""
+    subjects = set()
+    for code in course_codes:
+        match = COURSE_CODE_PATTERN.fullmatch(normalize_course_code(code))
+        if match:
+            subjects.add(match.group(1))
+    return frozenset(subjects)
+
+
+def extract_course_codes(query: str, known_subjects=None) -> list:
+    """
+    Find distinct course codes mentioned in a query, in order of appearance.
+
+    Args:
+        query: The user's query.
+        known_subjects: Subject prefixes of the catalog (see course_subjects). When given, only
+                        codes with a catalog subject are kept, so "FALL2024" or "GRE 2024" are not
+                        read as courses while an unknown number of a real subject still is.
+    """
+    codes = []
+    for subject, number in COURSE_CODE_PATTERN.findall(query):
+        subject = subject.upper()
+        if known_subjects is not None and subject not in known_subjects:
+            continue
+        code = f"{subject}{number}"
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+def meeting_bitmask(days_mask: int, begin: int, end: int) -> int:
+    """
+    Encode a weekly meeting as a bitset of 5-minute slots.
+
+    Two meetings conflict exactly when their bitsets share a bit, so an overlap test is a single AND.
+    """
+    if not days_mask or begin is None or end is None or end <= begin:
+        return 0
+    first_slot = begin // SLOT_MINUTES
+    last_slot = -(-end // SLOT_MINUTES)
+    day_bits = ((1 << (last_slot - first_slot)) - 1) << first_slot
+    mask = 0
+    for day_index, day in enumerate(WEEKDAYS):
+        if days_mask & DAY_BITS[day]:
+            mask |= day_bits << (day_index * SLOTS_PER_DAY)
+    return mask
+
+
+def minutes_to_text(minutes: int) -> str:
+    """Render minutes after midnight in the same AM/PM format used for course documents."""
+    return format_time(f"{minutes // 60:02d}{minutes % 60:02d}")
+
+
+class ScheduleBuilder:
+    """
+    Enumerates conflict-free section combinations for a set of desired courses.
+
+    Sections with identical meeting patterns are collapsed into a single option so the
+    search branches over distinct time slots rather than over every CRN, courses are
+    assigned most-constrained first, and each partial schedule is forward-checked so a
+    branch is abandoned as soon as some remaining course has no compatible slot left.
+    """
+    def __init__(self, sections=()):
+        """
+        Initialize the schedule builder.
+
+        Args:
+            sections: Iterable of dicts with 'crn', 'course_code', 'title', 'faculty', 'campus',
+                      'days', 'begin' and 'end' keys (days as a bitmask, times in minutes).
+        """
+        self.sections_by_course = {}
+        for section in sections:
+            section = {**section, 'mask': meeting_bitmask(section['days'], section['begin'], section['end'])}
+            code = normalize_course_code(section['course_code'])
+            self.sections_by_course.setdefault(code, []).append(section)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "ScheduleBuilder":
+        """Build a schedule builder from the scraped course DataFrame."""
+        def to_section(row):
+            crn, days, begin, end = ScheduleIndex.section_from_row(row)
+            return {
+                'crn': crn,
+                'course_code': row.get('Subject Course', ''),
+                'title': row.get('Course Title', ''),
+                'faculty': row.get('Faculty Name', '') if isinstance(row.get('Faculty Name', ''), str) else '',
+                'campus': row.get('Campus Description', ''),
+                'days': days,
+                'begin': begin,
+                'end': end
+            }
+        return cls(to_section(row) for _, row in df.iterrows())
+
+    @classmethod
+    def from_records(cls, records) -> "ScheduleBuilder":
+        """Build a schedule builder from a CourseRecordStore."""
+        return cls({
+            'crn': record.crn,
+            'course_code': record.course_code,
+            'title': record.title,
+            'faculty': record.faculty,
+            'campus': record.campus,
+            'days': record.days,
+            'begin': record.begin,
+            'end': record.end
+        } for record in records)
+
+    @classmethod
+    def from_csv(cls, file_path) -> "ScheduleBuilder":
+        """Build a schedule builder from the course data CSV file."""
+        return cls.from_dataframe(pd.read_csv(file_path))
+
+    def _slot_options(self, code: str, campus: str = None) -> list:
+        """Group a course's sections (optionally on one campus) by meeting bitmask."""
+        options = {}
+        for section in self.sections_by_course.get(code, []):
+            if campus and section.get('campus', '').lower() != campus.lower():
+                continue
+            options.setdefault(section['mask'], []).append(section)
+        return list(options.items())
+
+    def build(self, course_codes, max_results: int = 10, campus: str = None) -> dict:
+        """
+        Enumerate non-conflicting section combinations.
+
+        Args:
+            course_codes: Course codes to combine (e.g. ["CS5800", "CS5200"]).
+            max_results: Maximum number of schedules to return.
+            campus: Only combine sections offered on this campus (e.g. "Boston").
+
+        Returns:
+            Dictionary with:
+            - schedules: List of schedules; each is a list of per-course entries listing
+              every interchangeable CRN for the chosen time slot
+            - missing_courses: Requested codes with no sections in the catalog
+            - truncated: Whether more than max_results combinations exist
+        """
+        codes = []
+        for code in course_codes:
+            code = normalize_course_code(code)
+            if code not in codes:
+                codes.append(code)
+        slot_options = {code: self._slot_options(code, campus) for code in codes}
+        missing = [code for code in codes if not slot_options[code]]
+
+        # Most constrained course first keeps the search tree narrow
+        options = sorted(((code, slots) for code, slots in slot_options.items() if slots), key=lambda item: len(item[1]))
+        schedules = []
+        truncated = False
+
+        def search(depth, occupied, chosen):
+            nonlocal truncated
+            if depth == len(options):
+                if len(schedules) >= max_results:
+                    # A further valid combination exists beyond the ones returned
+                    truncated = True
+                else:
+                    schedules.append(list(chosen))
+                return
+            code, slots = options[depth]
+            for mask, sections in slots:
+                if mask & occupied:
+                    continue
+                combined = occupied | mask
+                # Forward check: every remaining course must still have a free slot
+                if all(any(not (later_mask & combined) for later_mask, _ in later_slots)
+                       for _, later_slots in options[depth + 1:]):
+                    chosen.append((code, sections))
+                    search(depth + 1, combined, chosen)
+                    chosen.pop()
+                if truncated:
+                    return
+
+        if options and not missing:
+            search(0, 0, [])
+
+        return {
+            'schedules': [[self._describe(code, sections) for code, sections in schedule] for schedule in schedules],
+            'missing_courses': missing,
+            'truncated': truncated
+        }
+
+    @staticmethod
+    def _describe(code: str, sections: list) -> dict:
+        first = sections[0]
+        if first['mask']:
+            days = ', '.join(day.capitalize() for day in WEEKDAYS if first['days'] & DAY_BITS[day])
+            meeting = f"{days} {minutes_to_text(first['begin'])} to {minutes_to_text(first['end'])}"
+        else:
+            meeting = "Flexible/Self-paced"
+        return {
+            'course_code': code,
+            'title': first['title'],
+            'meeting': meeting,
+            'crns': [section['crn'] for section in sections],
+            'faculty': sorted({section['faculty'] for section in sections if section['faculty']})
+        }
+
+    @staticmethod
+    def format_schedules(result: dict) -> str:
+        """Render a build() result as plain text suitable for the LLM context."""
+        lines = ["=== SCHEDULE OPTIONS ==="]
+        if result['missing_courses']:
+            lines.append(f"No sections found for: {', '.join(result['missing_courses'])}")
+        elif not result['schedules']:
+            lines.append("No conflict-free combination of the requested courses exists.")
+        for number, schedule in enumerate(result['schedules'], start=1):
+            lines.append(f"Option {number}:")
+            for entry in schedule:
+                faculty = f" ({'; '.join(entry['faculty'])})" if entry['faculty'] else ""
+                lines.append(f"- {entry['course_code']} {entry['title']}: {entry['meeting']}, "
+                             f"CRN {' / '.join(entry['crns'])}{faculty}")
+        if result['truncated']:
+            lines.append("More combinations are available.")
+        return "\n".join(lines)
+
+    @weave.op(name="build_schedule")
+    def __call__(self, course_codes, max_results: int = 10, campus: str = None) -> dict:
+        """Tool entry point: enumerate conflict-free schedules for the given course codes."""
+        return self.build(course_codes, max_results=max_results, campus=campus)
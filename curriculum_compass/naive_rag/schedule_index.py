@@ -0,0 +1,342 @@
+import re
+import numpy as np
+import pandas as pd
+from time_utils import DAY_BITS, clean_time, time_to_minutes, parse_days
+
+DAY_ALIASES = {
+    'monday': 'monday', 'mon': 'monday',
+    'tuesday': 'tuesday', 'tues': 'tuesday', 'tue': 'tuesday',
+    'wednesday': 'wednesday', 'wed': 'wednesday',
+    'thursday': 'thursday', 'thurs': 'thursday', 'thu': 'thursday',
+    'friday': 'friday', 'fri': 'friday'
+}
+
+# Periods of the day expressed as [start_after, start_before) in minutes after midnight
+DAY_PERIODS = {
+    'morning': (0, 12 * 60),
+    'afternoon': (12 * 60, 17 * 60),
+    'evening': (17 * 60, 24 * 60),
+    'night': (17 * 60, 24 * 60)
+}
+
+DAY_PATTERN = r'\b(' + '|'.join(sorted(DAY_ALIASES, key=len, reverse=True)) + r')s?\b'
+TIME_PATTERN = r'(noon|midnight|\d{1,2}(?::\d{2})?(?!\d)\s*(?:am|pm|a\.m\.|p\.m\.)?)'
+NEGATION_PATTERN = r'\b(?:no|not|nothing|without|except|avoid)\b'
+# A day (or list of days) followed by "free"/"off", as in "fridays free" or "monday and friday off"
+TRAILING_NEGATION_PATTERN = rf'^(?:\s*(?:,|and|or|&)?\s*{DAY_PATTERN})*\s*(?:(?:is|are|to be|be|kept|stay|staying)\s+)?(?:free|off|clear)\b'
+TIME_NEGATION_PATTERN = r'\b(?:no|not|nothing|none|avoid)\b'
+# Words that may follow a bare hour ("after 5 on tuesday"); any other word means the number is a count
+BARE_HOUR_FOLLOWERS = {"o'clock", "oclock", "on", "and", "or", "in", "at", "every", "each", "please"}
+# Punctuation and conjunctions that start a new clause; negation does not carry across them
+CLAUSE_BOUNDARY_PATTERN = r'[.,;:!?]|\b(?:but|so|because|since|though|although|while|then|however|yet)\b'
+# Separators inside a list of days or periods ("monday, wednesday or friday")
+LIST_JOINER_PATTERN = r'^\s*(?:,|and|or|&|/)?\s*(?:and|or)?\s*$'
+PERIOD_WORD_PATTERN = r'\b(' + '|'.join(DAY_PERIODS) + r')s?\b'
+PERIOD_RUN_PATTERN = rf'{PERIOD_WORD_PATTERN}(?:\s*(?:,|and|or|&|/)\s*(?:and|or)?\s*{PERIOD_WORD_PATTERN})*'
+# A period word only constrains the schedule in a scheduling context: "in the morning",
+# "monday afternoon", "evening classes", "mornings only" (not "good morning" or "I work mornings")
+PERIOD_PRECEDING_CONTEXT = rf'(?:\bin the|\bduring the|\bduring|\bon|\bonly|{DAY_PATTERN})\s*$'
+PERIOD_FOLLOWING_CONTEXT = (r'^\s*(?:class|section|course|lecture|meeting|lab|slot|time|schedule|option|only)'
+                            r'(?:s|es)?\b')
+# "from 9 to 11", "between 2pm and 4pm"
+TIME_RANGE_PATTERN = rf'\b(?:from|between)\s+{TIME_PATTERN}\s*(?:to|until|till|and|-)\s*{TIME_PATTERN}'
+
+
+def parse_clock_time(text):
+    """Parse a spoken clock time such as '10am', '6:30 pm' or 'noon' into minutes after midnight."""
+    text = text.strip().lower().replace('.', '')
+    if text == 'noon':
+        return 12 * 60
+    if text == 'midnight':
+        return 0
+    match = re.match(r'(\d{1,2})(?::(\d{2}))?\s*(am|pm)?$', text)
+    if not match:
+        return None
+    hours, minutes, period = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if hours > 23 or minutes > 59:
+        return None
+    if period == 'pm' and hours < 12:
+        hours += 12
+    elif period == 'am' and hours == 12:
+        hours = 0
+    elif period is None and 1 <= hours <= 7:
+        # Bare hours like "before 5" almost always mean the afternoon on a class timetable
+        hours += 12
+    return hours * 60 + minutes
+
+
+def is_clock_time(text: str, following: str) -> bool:
+    """
+    Whether a number matched after before/after/from is a clock time rather than a count.
+
+    Times with am/pm or minutes ("10am", "6:30") always are; bare numbers ("before 5") only when
+    they are a plausible hour and not followed by a noun ("after 2 semesters", "from 1 professor").
+    """
+    text = text.strip()
+    if text in ('noon', 'midnight') or ':' in text or re.search(r'[ap]\.?m\.?$', text):
+        return True
+    if not 1 <= int(text) <= 12:
+        return False
+    next_word = re.match(r"\s*([a-z']+)", following)
+    return next_word is None or next_word.group(1) in BARE_HOUR_FOLLOWERS
+
+
+def clause_tail(text: str) -> str:
+    """The part of `text` after its last clause boundary."""
+    boundaries = list(re.finditer(CLAUSE_BOUNDARY_PATTERN, text))
+    return text[boundaries[-1].end():] if boundaries else text
+
+
+def subtract_windows(windows: list, removed: list) -> list:
+    """Remove the `removed` [start, end) windows from `windows`."""
+    for cut_start, cut_end in removed:
+        remaining = []
+        for start, end in windows:
+            if start < cut_start:
+                remaining.append((start, min(end, cut_start)))
+            if end > cut_end:
+                remaining.append((max(start, cut_end), end))
+        windows = remaining
+    return [(start, end) for start, end in windows if start < end]
+
+
+def merge_windows(windows: list) -> list:
+    """Union [start, end) windows, merging overlapping or touching ones."""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_schedule_constraints(query: str) -> dict:
+    """
+    Extract day and time-window constraints from a natural language query.
+
+    Args:
+        query: The user's query, e.g. "evening classes on Tuesday" or "nothing before 10am".
+
+    Returns:
+        Keyword arguments for ScheduleIndex.filter, or an empty dict if the query has no schedule constraints.
+    """
+    query = query.lower()
+    constraints = {}
+
+    days, exclude_days = 0, 0
+    previous_end, previous_negated = None, False
+    for match in re.finditer(DAY_PATTERN, query):
+        bit = DAY_BITS[DAY_ALIASES[match.group(1)]]
+        if previous_end is not None and re.match(LIST_JOINER_PATTERN, query[previous_end:match.start()]):
+            # "no monday or friday classes": later days in a list share the first one's negation
+            negated = previous_negated
+        else:
+            preceding = clause_tail(query[max(0, match.start() - 25):match.start()])
+            negated = bool(re.search(NEGATION_PATTERN, preceding))
+        negated = negated or bool(re.match(TRAILING_NEGATION_PATTERN, query[match.end():]))
+        if negated:
+            exclude_days |= bit
+        else:
+            days |= bit
+        previous_end, previous_negated = match.end(), negated
+    if days:
+        constraints['days'] = days
+    if exclude_days:
+        constraints['exclude_days'] = exclude_days
+
+    # Several periods ("morning or afternoon") allow a start in any of them; negated ones ("no morning classes") are removed
+    allowed, removed = [], []
+    for match in re.finditer(PERIOD_RUN_PATTERN, query):
+        if not (re.search(PERIOD_PRECEDING_CONTEXT, query[:match.start()])
+                or re.match(PERIOD_FOLLOWING_CONTEXT, query[match.end():])):
+            continue
+        periods = [DAY_PERIODS[period] for period in re.findall(PERIOD_WORD_PATTERN, match.group(0))]
+        preceding = clause_tail(query[max(0, match.start() - 25):match.start()])
+        (removed if re.search(NEGATION_PATTERN, preceding) else allowed).extend(periods)
+    if allowed or removed:
+        windows = subtract_windows(merge_windows(allowed or [(0, 24 * 60)]), removed)
+        if len(windows) == 1:
+            constraints['start_after'], constraints['start_before'] = windows[0]
+        elif windows:
+            constraints['start_windows'] = windows
+
+    ranges = []
+    for match in re.finditer(TIME_RANGE_PATTERN, query):
+        start, end = match.group(1), match.group(2)
+        if not (is_clock_time(start, "") and is_clock_time(end, query[match.end():])):
+            continue
+        start_minutes, end_minutes = parse_clock_time(start), parse_clock_time(end)
+        if start_minutes is None or end_minutes is None or end_minutes <= start_minutes:
+            continue
+        constraints['start_after'] = max(constraints.get('start_after', 0), start_minutes)
+        constraints['end_before'] = min(constraints.get('end_before', 24 * 60), end_minutes)
+        ranges.append(match.span())
+
+    for match in re.finditer(rf'\b(before|after|by|until|from)\s+{TIME_PATTERN}', query):
+        if any(start <= match.start() < end for start, end in ranges):
+            continue
+        if not is_clock_time(match.group(2), query[match.end():]):
+            continue
+        minutes = parse_clock_time(match.group(2))
+        if minutes is None:
+            continue
+        negated = re.search(TIME_NEGATION_PATTERN, query[max(0, match.start() - 20):match.start()])
+        keyword = match.group(1)
+        if (keyword == 'before' and negated) or (keyword in ('after', 'from') and not negated):
+            constraints['start_after'] = max(constraints.get('start_after', 0), minutes)
+        else:
+            constraints['end_before'] = min(constraints.get('end_before', 24 * 60), minutes)
+
+    return constraints
+
+
+class ScheduleIndex:
+    """
+    Compact numeric representation of section meeting times.
+
+    Each section is stored as a day bitmask plus begin/end minutes after midnight in
+    parallel numpy arrays, so day and time-window filters are a handful of vectorised
+    comparisons instead of text matching over rendered course documents.
+
+    Like CourseIndex, single-section changes are incremental: an update patches the
+    section's row in place, a removal tombstones it, and new sections collect in a small
+    delta segment that is compacted into the arrays on the next filter (or once it grows
+    past `merge_threshold`).
+    """
+    def __init__(self, sections=(), merge_threshold: int = 64):
+        """
+        Initialize the schedule index.
+
+        Args:
+            sections: Iterable of (crn, days_mask, begin_minutes, end_minutes) tuples.
+                      Sections without a fixed meeting time use 0 for days and None for times.
+            merge_threshold: Number of new sections kept in the delta segment before compaction.
+        """
+        self.merge_threshold = merge_threshold
+        self._delta = {}
+        self._set_sections(list(sections))
+
+    def _set_sections(self, sections: list) -> None:
+        self.crns = np.array([str(crn) for crn, _, _, _ in sections], dtype=object)
+        self.days = np.array([days for _, days, _, _ in sections], dtype=np.uint8)
+        self.begin = np.array([-1 if begin is None else begin for _, _, begin, _ in sections], dtype=np.int16)
+        self.end = np.array([-1 if end is None else end for _, _, _, end in sections], dtype=np.int16)
+        self.scheduled = (self.days > 0) & (self.begin >= 0) & (self.end >= 0)
+        self.alive = np.ones(len(sections), dtype=bool)
+        self._positions = {crn: idx for idx, crn in enumerate(self.crns)}
+
+    def __len__(self):
+        return int(self.alive.sum()) + len(self._delta)
+
+    def __contains__(self, crn):
+        crn = str(crn)
+        return crn in self._delta or (crn in self._positions and bool(self.alive[self._positions[crn]]))
+
+    def upsert(self, record) -> None:
+        """
+        Add or update one section.
+
+        Args:
+            record: CourseRecord (or any object with crn, days, begin and end attributes).
+        """
+        crn = str(record.crn)
+        idx = self._positions.get(crn)
+        if idx is not None and self.alive[idx]:
+            self.days[idx] = record.days
+            self.begin[idx] = -1 if record.begin is None else record.begin
+            self.end[idx] = -1 if record.end is None else record.end
+            self.scheduled[idx] = (self.days[idx] > 0) & (self.begin[idx] >= 0) & (self.end[idx] >= 0)
+            return
+        self._delta[crn] = (crn, record.days, record.begin, record.end)
+        if len(self._delta) >= self.merge_threshold:
+            self.merge()
+
+    def remove(self, crn) -> bool:
+        """
+        Drop one section.
+
+        Returns:
+            True if the section was indexed, False otherwise.
+        """
+        crn = str(crn)
+        if self._delta.pop(crn, None) is not None:
+            return True
+        idx = self._positions.get(crn)
+        if idx is None or not self.alive[idx]:
+            return False
+        self.alive[idx] = False
+        return True
+
+    def merge(self) -> None:
+        """Fold the delta segment into the arrays and drop tombstoned rows."""
+        sections = [(crn, int(days), None if begin < 0 else int(begin), None if end < 0 else int(end))
+                    for crn, days, begin, end, alive in zip(self.crns, self.days, self.begin, self.end, self.alive)
+                    if alive]
+        self._set_sections(sections + list(self._delta.values()))
+        self._delta = {}
+
+    @staticmethod
+    def section_from_row(row):
+        """Convert a course data row into a (crn, days_mask, begin_minutes, end_minutes) tuple."""
+        return (
+            str(row.get('CRN', '')),
+            parse_days(row.get('Days', '')),
+            time_to_minutes(clean_time(row.get('Begin Time', ''))),
+            time_to_minutes(clean_time(row.get('End Time', '')))
+        )
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "ScheduleIndex":
+        """Build a schedule index from the scraped course DataFrame."""
+        return cls(cls.section_from_row(row) for _, row in df.iterrows())
+
+    @classmethod
+    def from_records(cls, records) -> "ScheduleIndex":
+        """Build a schedule index from a CourseRecordStore."""
+        return cls((record.crn, record.days, record.begin, record.end) for record in records)
+
+    @classmethod
+    def from_csv(cls, file_path) -> "ScheduleIndex":
+        """Build a schedule index from the course data CSV file."""
+        return cls.from_dataframe(pd.read_csv(file_path))
+
+    def filter(self, days: int = 0, exclude_days: int = 0, start_after: int = None,
+               start_before: int = None, end_before: int = None, start_windows: list = None,
+               include_unscheduled: bool = False) -> set:
+        """
+        Select sections whose meetings satisfy the given day and time constraints.
+
+        Args:
+            days: Bitmask of days; sections must meet on at least one of them.
+            exclude_days: Bitmask of days the section must not meet on.
+            start_after: Earliest allowed start time, in minutes after midnight.
+            start_before: Start time must be strictly earlier than this, in minutes after midnight.
+            end_before: Latest allowed end time, in minutes after midnight.
+            start_windows: [start_after, start_before) windows; the start time must fall in one of them.
+            include_unscheduled: Whether to keep online/self-paced sections with no meeting time.
+
+        Returns:
+            Set of matching CRNs.
+        """
+        if self._delta:
+            self.merge()
+        mask = self.scheduled & self.alive
+        if days:
+            mask &= (self.days & days) > 0
+        if exclude_days:
+            mask &= (self.days & exclude_days) == 0
+        if start_after is not None:
+            mask &= self.begin >= start_after
+        if start_before is not None:
+            mask &= self.begin < start_before
+        if end_before is not None:
+            mask &= self.end <= end_before
+        if start_windows:
+            in_window = np.zeros_like(mask)
+            for window_start, window_end in start_windows:
+                in_window |= (self.begin >= window_start) & (self.begin < window_end)
+            mask &= in_window
+        if include_unscheduled:
+            mask |= ~self.scheduled & self.alive
+        return set(self.crns[mask])
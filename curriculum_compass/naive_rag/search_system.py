@@ -1,15 +1,11 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-import numpy as np
+import re
+from course_index import CourseIndex
 
 class CourseSearchSystem:
     def __init__(self):
-        self.documents = None
-        self.vectorizer = TfidfVectorizer(
-            lowercase=True,
-            token_pattern=r'(?u)\b\w+\b|===\s*\w+\s*===',
-            ngram_range=(1, 2)
-        )
-        self.tfidf_matrix = None
+        self.documents = {}
+        self.records = None
+        self.index = CourseIndex()
 
     def preprocess_query(self, query):
         """Extract structured information from query"""
@@ -58,26 +54,86 @@ class CourseSearchSystem:
             
         return enhanced_query, query_parts
 
+    @staticmethod
+    def extract_crn(document, default=None):
+        """Read the CRN out of a rendered course document"""
+        match = re.search(r'^crn:\s*(\S+)', document, flags=re.MULTILINE | re.IGNORECASE)
+        return match.group(1) if match else default
+
     def add_course_sentences_to_db(self, course_data)->None:
         """Add processed course data to the search system"""
-        self.documents = [doc for doc in course_data if doc is not None]
-        self.tfidf_matrix = self.vectorizer.fit_transform(self.documents)
+        documents = [doc for doc in course_data if doc is not None]
+        self.documents = {}
+        for idx, doc in enumerate(documents):
+            crn = self.extract_crn(doc, default=str(idx))
+            if crn in self.documents:
+                print(f"Warning: duplicate CRN {crn} in course data; keeping the later section")
+            self.documents[crn] = doc
+        self.index.build(self.documents.items())
+
+    def add_course_records(self, records)->None:
+        """Index a CourseRecordStore; document text is rendered from the records on demand"""
+        self.records = records
+        self.documents = {}
+        self.index.build((record.crn, record.to_text()) for record in records)
+
+    def upsert_course(self, crn, document)->None:
+        """Add or replace a single course section without rebuilding the index"""
+        crn = str(crn)
+        self.documents[crn] = document
+        self.index.upsert(crn, document)
+
+    def upsert_course_record(self, record)->None:
+        """Add or replace a single course record without rebuilding the index"""
+        if self.records is not None:
+            self.records.upsert(record)
+        self.index.upsert(record.crn, record.to_text())
+
+    def remove_course(self, crn)->bool:
+        """Remove a single course section from the index"""
+        crn = str(crn)
+        self.documents.pop(crn, None)
+        if self.records is not None:
+            self.records.remove(crn)
+        return self.index.remove(crn)
 
-    def query_courses(self, query_text, n_results=5):
-        """Query courses based on enhanced query"""
+    def get_document(self, crn):
+        """Return the rendered course text for a CRN"""
+        if crn in self.documents:
+            return self.documents[crn]
+        record = self.records.get(crn) if self.records is not None else None
+        return record.to_text() if record is not None else None
+
+    @staticmethod
+    def record_matches(record, query_parts)->bool:
+        """Check extracted query constraints against structured record fields"""
+        fields = {
+            'course': record.title,
+            'professor': record.faculty,
+            'term': record.term,
+            'campus': record.campus
+        }
+        return all(not value or value in fields[field].lower() for field, value in query_parts.items())
+
+    def query_courses(self, query_text, n_results=5, allowed_crns=None):
+        """Query courses based on enhanced query, optionally restricted to a set of CRNs"""
         enhanced_query, query_parts = self.enhance_query(query_text)
         
         try:
-            if self.tfidf_matrix is None:
+            if not len(self.index):
                 return {"documents": [["No documents indexed"]]}
             
-            query_vec = self.vectorizer.transform([enhanced_query])
-            scores = (query_vec @ self.tfidf_matrix.T).toarray()[0]
-            top_n = np.argsort(scores)[-n_results:][::-1]
+            top_n = self.index.search(enhanced_query, n_results, allowed_crns=allowed_crns)
             
             filtered_results = []
-            for idx in top_n:
-                doc = self.documents[idx]
+            for crn, _ in top_n:
+                record = self.records.get(crn) if self.records is not None else None
+                if record is not None:
+                    if self.record_matches(record, query_parts):
+                        filtered_results.append(record.to_text())
+                    continue
+
+                doc = self.documents[crn]
                 doc_lower = doc.lower()
                 
                 matches_all = True
@@ -0,0 +1,64 @@
+import threading
+
+from transformers import StoppingCriteriaList, StopStringCriteria
+
+_draft_models = {}
+_draft_models_lock = threading.Lock()
+
+
+def enable_speculative_decoding(model, draft_model, num_draft_tokens: int = 5, schedule: str = "heuristic"):
+    """
+    Use a small draft model to propose tokens that `model` verifies (assisted generation).
+
+    The draft must share the target's tokenizer (e.g. Qwen2.5-0.5B-Instruct drafting for
+    Qwen2.5-3B-Instruct). With greedy decoding the output is identical to plain generation.
+
+    Args:
+        model: The target causal language model.
+        draft_model: The draft causal language model.
+        num_draft_tokens: Tokens drafted per verification step (the starting value for
+                          the "heuristic" schedule, fixed for "constant").
+        schedule: "heuristic" grows/shrinks the draft length with acceptance, "constant" keeps it fixed.
+    """
+    draft_model.generation_config.num_assistant_tokens = num_draft_tokens
+    draft_model.generation_config.num_assistant_tokens_schedule = schedule
+    with _draft_models_lock:
+        _draft_models[id(model)] = (model, draft_model)
+
+
+def disable_speculative_decoding(model) -> None:
+    """Return a model to plain decoding."""
+    with _draft_models_lock:
+        _draft_models.pop(id(model), None)
+
+
+def get_draft_model(model):
+    """Return the draft model registered for `model`, or None."""
+    entry = _draft_models.get(id(model))
+    return entry[1] if entry is not None and entry[0] is model else None
+
+
+def with_draft_model(model, generate_kwargs: dict) -> dict:
+    """
+    Add the registered draft model to `model.generate` arguments.
+
+    Args:
+        model: The target model.
+        generate_kwargs: Arguments built for plain generation (e.g. by generation_kwargs).
+
+    Returns:
+        The arguments unchanged if speculative decoding is disabled for `model`; otherwise a
+        copy with `assistant_model` set. Stop strings are passed as an explicit stopping
+        criterion, since the draft model's copy of the generation config has no tokenizer.
+    """
+    draft_model = get_draft_model(model)
+    if draft_model is None:
+        return generate_kwargs
+    generate_kwargs = dict(generate_kwargs, assistant_model=draft_model)
+    stop_strings = generate_kwargs.pop("stop_strings", None)
+    tokenizer = generate_kwargs.pop("tokenizer", None)
+    if stop_strings:
+        criteria = StoppingCriteriaList(generate_kwargs.get("stopping_criteria") or [])
+        criteria.append(StopStringCriteria(tokenizer=tokenizer, stop_strings=stop_strings))
+        generate_kwargs["stopping_criteria"] = criteria
+    return generate_kwargs
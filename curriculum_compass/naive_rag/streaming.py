@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Iterator
+
+from transformers import TextIteratorStreamer
+
+_DONE = object()
+
+
+def stream_generate(model, tokenizer, model_inputs: dict, /, **generate_kwargs) -> Iterator[str]:
+    """
+    Run `model.generate` on a background thread and yield decoded text as it is produced.
+
+    Args:
+        model: The causal language model.
+        tokenizer: The model's tokenizer.
+        model_inputs: Tokenized prompt (already on the model's device).
+        generate_kwargs: Extra arguments for `model.generate` (max_new_tokens, temperature, ...).
+
+    Yields:
+        Decoded text chunks, excluding the prompt and special tokens.
+    """
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    errors = []
+
+    def run():
+        try:
+            model.generate(**model_inputs, streamer=streamer, **generate_kwargs)
+        except Exception as e:
+            errors.append(e)
+            # Unblock the consumer; generate never reached its own end-of-stream
+            streamer.end()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    for chunk in streamer:
+        if chunk:
+            yield chunk
+    thread.join()
+    if errors:
+        raise errors[0]
+
+
+async def aiter_stream(iterator: Iterator[str]) -> AsyncIterator[str]:
+    """Expose a blocking text iterator as an async iterator without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    while True:
+        chunk = await loop.run_in_executor(None, next, iterator, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
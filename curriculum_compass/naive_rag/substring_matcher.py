@@ -0,0 +1,131 @@
+from collections import deque
+
+# Endings a whole-word pattern may carry and still count as a match ("spics", "nips"),
+# while longer continuations ("spic" in "spicy") do not
+INFLECTION_SUFFIXES = ("", "s", "es", "ed", "er", "ers", "ing", "in")
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold and collapse whitespace so patterns match regardless of case and spacing."""
+    return " ".join(text.casefold().split())
+
+
+class AhoCorasickMatcher:
+    """
+    Multi-pattern matcher built as an Aho-Corasick automaton.
+
+    A scan is a single pass over the text whatever the number of patterns, so the
+    banned list can grow to thousands of entries without slowing the check. Text and
+    patterns are case-folded with whitespace collapsed.
+
+    Patterns match anywhere, like llm_guard's BanSubstrings ("shit" in "bullshit"), with
+    two exceptions:
+    - Whole-word patterns are short terms that also occur inside innocent words ("spic" in
+      "spicy", "nip" in "turnip", "paki" in "pakistan"). They must start and end at a word
+      boundary, optionally followed by an inflection suffix.
+    - Multi-word phrases must start at a word boundary ("kill you" is not in "skill you").
+    """
+    def __init__(self, patterns: list, whole_words: list = ()):
+        """
+        Args:
+            patterns: Substrings to search for.
+            whole_words: Patterns (from `patterns` or additional) that only match as whole words.
+        """
+        whole_words = {normalize_text(word) for word in whole_words}
+        self.patterns = []
+        self._whole_word = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        seen = set()
+        for pattern in list(patterns) + sorted(whole_words):
+            pattern = normalize_text(pattern)
+            if pattern and pattern not in seen:
+                seen.add(pattern)
+                self._insert(pattern, pattern in whole_words)
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _insert(self, pattern: str, whole_word: bool) -> None:
+        state = 0
+        for char in pattern:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+        self._whole_word.append(whole_word)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Patterns ending at the fallback state also end here
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    @staticmethod
+    def _starts_word(text: str, start: int, pattern: str) -> bool:
+        return not (pattern[0].isalnum() and start > 0 and text[start - 1].isalnum())
+
+    def _is_whole_word(self, text: str, start: int, end: int, pattern: str) -> bool:
+        if not self._starts_word(text, start, pattern):
+            return False
+        if not pattern[-1].isalnum():
+            return True
+        tail = end
+        while tail < len(text) and text[tail].isalnum():
+            tail += 1
+        return text[end:tail] in INFLECTION_SUFFIXES
+
+    def iter_matches(self, text: str):
+        """Yield (start, end, pattern) for each match, with offsets into the normalized text."""
+        text = normalize_text(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                pattern = self.patterns[index]
+                start = position - len(pattern) + 1
+                if self._whole_word[index]:
+                    matched = self._is_whole_word(text, start, position + 1, pattern)
+                else:
+                    matched = " " not in pattern or self._starts_word(text, start, pattern)
+                if matched:
+                    yield start, position + 1, pattern
+
+    def search(self, text: str):
+        """Return the first match as (start, end, pattern), or None."""
+        return next(self.iter_matches(text), None)
+
+    def find_all(self, text: str) -> list:
+        """Return every matched pattern, in order of appearance."""
+        return [pattern for _, _, pattern in self.iter_matches(text)]
+
+
+class BannedSubstringScanner:
+    """
+    Zero-model replacement for llm_guard's BanSubstrings input scanner.
+
+    scan() follows the llm_guard contract, returning (prompt, is_valid, risk_score).
+    """
+    def __init__(self, substrings: list, whole_words: list = ()):
+        self.matcher = AhoCorasickMatcher(substrings, whole_words=whole_words)
+
+    def scan(self, prompt: str):
+        if self.matcher.search(prompt) is not None:
+            return prompt, False, 1.0
+        return prompt, True, -1.0
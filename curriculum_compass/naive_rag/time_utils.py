@@ -18,4 +18,31 @@ def format_time(time_str):
         hours -= 12
     elif hours == 0:
         hours = 12
-    return f"{hours}:{minutes} {period}"
\ No newline at end of file
+    return f"{hours}:{minutes} {period}"
+
+DAY_BITS = {
+    'monday': 1,
+    'tuesday': 2,
+    'wednesday': 4,
+    'thursday': 8,
+    'friday': 16,
+    'saturday': 32,
+    'sunday': 64
+}
+
+
+def time_to_minutes(time_str):
+    """Convert a 4-digit HHMM time string to minutes after midnight."""
+    if not time_str or len(time_str) != 4:
+        return None
+    return int(time_str[:2]) * 60 + int(time_str[2:])
+
+
+def parse_days(days):
+    """Convert a comma-separated list of day names (e.g. 'Monday, Thursday') to a bitmask."""
+    if not isinstance(days, str):
+        return 0
+    mask = 0
+    for day in days.split(','):
+        mask |= DAY_BITS.get(day.strip().lower(), 0)
+    return mask
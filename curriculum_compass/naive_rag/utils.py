@@ -1,9 +1,14 @@
 from transformers import AutoModelForCausalLM, AutoTokenizer
 import json
+import os
 from sentence_transformers import SentenceTransformer
 import chromadb
 import weave
 import torch
+from model_registry import model_registry
+from streaming import aiter_stream
+from context_packer import ContextPacker
+from inference_backends import get_backend, load_int8_model, GGUFBackend, LLM_BACKENDS
 
 
 def get_device():
@@ -18,26 +23,48 @@ def get_device():
     else:
         return 'cpu'
 
-def load_model_and_tokenizer(model_name: str):
+def load_model_and_tokenizer(model_name: str, torch_dtype="auto", device_map="auto", backend: str = "hf",
+                             gguf_model: str = None):
     """
-    Load a language model and its tokenizer with proper device mapping handled by Accelerate
+    Load a language model and its tokenizer with proper device mapping handled by Accelerate.
+    Models are shared through the model registry, so repeated calls return the same copy.
+
+    backend selects the runtime: "hf" (transformers), "int8" (transformers on CPU with
+    int8 dynamic quantization) or "gguf" (llama.cpp running gguf_model; the returned model
+    is then a GGUFBackend and the tokenizer is only used for token counting).
     """
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name,
-        torch_dtype="auto",
-        device_map="auto"  # Let Accelerate handle device placement
-    )
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    return model, tokenizer
-
-def load_embedding_model(model_name: str):
-    """Load a SentenceTransformer embedding model.
+    if backend == "gguf":
+        def gguf_loader():
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            return GGUFBackend(gguf_model, tokenizer), tokenizer
+        return model_registry.get_or_load(("gguf", gguf_model, "gguf", "cpu"), gguf_loader)
+    if backend == "int8":
+        return model_registry.get_or_load(
+            ("causal-lm", model_name, "qint8", "cpu"),
+            lambda: (load_int8_model(model_name), AutoTokenizer.from_pretrained(model_name)))
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}', expected one of {LLM_BACKENDS}")
+
+    def loader():
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            torch_dtype=torch_dtype,
+            device_map=device_map  # Let Accelerate handle device placement
+        )
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return model, tokenizer
+    return model_registry.get_or_load(("causal-lm", model_name, str(torch_dtype), str(device_map)), loader)
+
+def load_embedding_model(model_name: str, device: str = None):
+    """Load a SentenceTransformer embedding model (shared through the model registry).
     Args:
         model_name (str): The name of the embedding model.
+        device (str): Optional device; SentenceTransformer picks one when omitted.
     Returns:
         SentenceTransformer: The loaded embedding model.
     """
-    return SentenceTransformer(model_name)
+    return model_registry.get_or_load(("sentence-transformer", model_name, "float32", str(device)),
+                                      lambda: SentenceTransformer(model_name, device=device))
 
 
 def initialize_chromadb_client(db_path: str):
@@ -50,54 +77,62 @@ def initialize_chromadb_client(db_path: str):
     return chromadb.PersistentClient(path=db_path)
 
 
-def load_config(config_path='config.json'):
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+
+# Config entries naming files and directories; relative values are relative to the config file
+CONFIG_PATH_KEYS = ('course_data_path', 'reranker_onnx_dir', 'relevance_classifier_path',
+                    'relevance_training_queries', 'relevance_off_topic_queries', 'relevance_extra_queries')
+
+
+def load_config(config_path=DEFAULT_CONFIG_PATH):
+    """Load the config, resolving relative artifact paths against the config file's directory
+    so scripts find (and write) the same files whatever directory they are run from."""
     with open(config_path, 'r') as config_file:
         config = json.load(config_file)
+    config_dir = os.path.dirname(os.path.abspath(config_path))
+    for key in CONFIG_PATH_KEYS:
+        if config.get(key) and not os.path.isabs(config[key]):
+            config[key] = os.path.normpath(os.path.join(config_dir, config[key]))
     return config
 
-@weave.op(name="generate_llm_response")
-def load_model_and_tokenizer(model_name: str):
-    """
-    Load a language model and its tokenizer with proper device mapping handled by Accelerate
-    """
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name,
-        torch_dtype="auto",
-        device_map="auto" 
-    )
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    return model, tokenizer
+def format_user_prompt(query: str, retrieved_docs: list, tokenizer, context_budget: int = None) -> str:
+    """Render the retrieved context and query as the user turn.
+    With a context_budget, the retrieved docs are packed into that many tokens in rank order."""
+    if retrieved_docs and context_budget:
+        retrieved_docs = ContextPacker(tokenizer, context_budget).pack(retrieved_docs)["docs"]
+    if retrieved_docs:
+        context = "\n".join(retrieved_docs)
+        return f"Context:\n{context}\n\nQuery: {query}\n\nAnswer:"
+    return f"Query: {query}\n\nAnswer:"
+
+def build_chat_inputs(system_prompt: str, query: str, retrieved_docs: list, model, tokenizer,
+                      context_budget: int = None):
+    """Apply the chat template to the system prompt, retrieved context and query, and tokenize it (transformers models)"""
+    return get_backend(model, tokenizer).encode(system_prompt,
+                                                format_user_prompt(query, retrieved_docs, tokenizer, context_budget))
 
 
 @weave.op(name="LLM_output")
 def generate_llm_response(system_prompt: str, query: str, retrieved_docs: list, 
-                         model: AutoModelForCausalLM, tokenizer: AutoTokenizer,temperature:float=0.1):
-    """Generate response using the language model"""
-    if retrieved_docs:
-        context = "\n".join(retrieved_docs)
-        user_content = f"Context:\n{context}\n\nQuery: {query}\n\nAnswer:"
-    else:
-        user_content = f"Query: {query}\n\nAnswer:"
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_content}
-    ]
-    text = tokenizer.apply_chat_template(
-        messages,
-        tokenize=False,
-        add_generation_prompt=True
-    )
-    model_inputs = tokenizer([text], return_tensors="pt")
-    if hasattr(model, 'device'):
-        model_inputs = {k: v.to(model.device) for k, v in model_inputs.items()}
-    generated_ids = model.generate(
-        **model_inputs,
-        max_new_tokens=4098,
-        temperature=0.1
-    )
-    generated_ids = [
-    output_ids[len(input_ids):] 
-    for input_ids, output_ids in zip(model_inputs["input_ids"], generated_ids)
-]  
-    response = tokenizer.batch_decode(generated_ids, skip_special_tokens=True)[0]
-    return response
+                         model: AutoModelForCausalLM, tokenizer: AutoTokenizer,temperature:float=None,
+                         profile: str = "long_answer", context_budget: int = None):
+    """Generate response using the language model with the token budget and stop rules of a generation profile"""
+    user_prompt = format_user_prompt(query, retrieved_docs, tokenizer, context_budget)
+    return get_backend(model, tokenizer).generate(system_prompt, user_prompt, profile, temperature)
+
+
+def stream_llm_response(system_prompt: str, query: str, retrieved_docs: list,
+                        model: AutoModelForCausalLM, tokenizer: AutoTokenizer, temperature: float = None,
+                        profile: str = "long_answer", context_budget: int = None):
+    """Generate a response like generate_llm_response, yielding text chunks as they are decoded"""
+    user_prompt = format_user_prompt(query, retrieved_docs, tokenizer, context_budget)
+    yield from get_backend(model, tokenizer).stream(system_prompt, user_prompt, profile, temperature)
+
+
+def astream_llm_response(system_prompt: str, query: str, retrieved_docs: list,
+                         model: AutoModelForCausalLM, tokenizer: AutoTokenizer, temperature: float = None,
+                         profile: str = "long_answer", context_budget: int = None):
+    """Async iterator over the text chunks of stream_llm_response"""
+    return aiter_stream(stream_llm_response(system_prompt, query, retrieved_docs, model, tokenizer,
+                                            temperature=temperature, profile=profile,
+                                            context_budget=context_budget))
@@ -1,47 +1,201 @@
-from utils import load_model_and_tokenizer, generate_llm_response
+import asyncio
+import hashlib
+import json
+from cache import LRUCache, normalize_query, content_hash
+from utils import load_model_and_tokenizer, generate_llm_response, format_user_prompt
+from inference_backends import get_backend
 from guard import LLMGuard
+from rejection_responses import RejectionResponder
 import weave
 from typing import List
 
+# Prompts for LLM-phrased rejections (llm_rejection_responses); the user prompts are
+# str.format templates
+GUARD_FAIL_SYSTEM_PROMPT = (
+    "You are an AI designed to explain content policy rejections for queries about NEU courses and professors. "
+    "For each flagged query, respond with exactly three lines:\n"
+    "1. First line must state: 'CONTENT POLICY VIOLATION'\n"
+    "2. Second line: Brief, friendly explanation of why the content was flagged\n"
+    "3. Third line: 'Suggested rephrasing: ' followed by a more appropriate way to ask about:\n"
+    "   - Course content or structure\n"
+    "   - Teaching methods\n"
+    "   - Academic experiences\n"
+    "   - Professor expertise\n"
+    "Focus on academic and professional language."
+)
+
+GUARD_FAIL_USER_PROMPT = """Rejection reason: {rejection_reason}
+Scanner details: {guard_results}
+
+Instructions:
+Generate a 3-line response:
+Line 1: 'CONTENT POLICY VIOLATION'
+Line 2: Explain the issue in a helpful, constructive way
+Line 3: Suggest a better way to ask about the same topic using academic language
+
+Keep the total response under 50 words."""
+
+RELEVANCE_FAIL_SYSTEM_PROMPT = (
+    "You are an AI designed to provide information on Northeastern University courses and professors. "
+    "For off-topic queries, respond with exactly three lines:\n"
+    "1. First line must be exactly: 'NOT RELEVANT'\n"
+    "2. Second line: explanation properly why the query is irrelavent \n"
+    "3. Third line: 'Suggested question: ' followed by a question about NEU courses/professors. "
+    "Questions should vary between these types:\n"
+    "   - Course content questions (e.g., 'What topics are covered in NEU's Machine Learning course?')\n"
+    "   - Teaching style questions (e.g., 'How does Professor X teach Database Management?')\n"
+    "   - Course reviews/experience (e.g., 'How challenging is the Algorithms course at NEU?')\n"
+    "   - Course structure (e.g., 'What projects are included in Software Engineering?')\n"
+    "   - Professor expertise (e.g., 'Which professors specialize in AI at NEU?')\n"
+    "\nFocus on these CS topics:\n"
+    "   - Machine Learning\n"
+    "   - Algorithms\n"
+    "   - Database Management Systems\n"
+    "   - Artificial Intelligence\n"
+    "   - Data Structures\n"
+    "   - Software Engineering\n"
+    "   - Computer Networks\n"
+    "   - Operating Systems"
+)
+
+RELEVANCE_FAIL_USER_PROMPT = """User query: {query}
+
+Instructions:
+Generate a 3-line response with:
+Line 1: 'NOT RELEVANT'
+Line 2: Explain why this query isn't about NEU academics
+Line 3: Suggest a question about NEU courses/professors that covers either:
+    - Course content and topics
+    - Teaching methods and style
+    - Student experiences and reviews
+    - Course structure and assignments
+    - Professor expertise and approach
+Make the suggestion feel natural and focused on what students might want to know."""
+
+
 class Validator:
-    def __init__(self, model_name: str, device: str,banned_substrings: List[str],relevance_prompt:str):
+    def __init__(self, model_name: str, device: str,banned_substrings: List[str],relevance_prompt:str,
+                 backend: str = "hf", gguf_model: str = None, guard_scan_mode: str = "cost_ordered",
+                 relevance_classifier=None, llm_rejection_responses: bool = False,
+                 verdict_cache_size: int = 2048, verdict_cache_ttl: float = None,
+                 banned_whole_words: List[str] = ()):
         """
         Initialize the QueryValidator.
-        Note: We don't manually move the model to device since it's handled by Accelerate
+        Note: We don't manually move the model to device since it's handled by Accelerate.
+        The LLM is fetched from the shared model registry on first use, so a validator
+        configured with the same model (and backend) as the RAG pipeline reuses its copy.
+        With a relevance_classifier, confident relevancy decisions are made from the query
+        embedding and only uncertain queries reach the LLM.
+        Rejections are answered from templates; with llm_rejection_responses, the async
+        validation path has the LLM phrase them while it has a free slot.
+        Verdicts are cached per normalized query and configuration version, so repeated
+        and retried queries skip the guard scanners and the relevancy check.
         """
         self.model_name = model_name
-        self.model, self.tokenizer = load_model_and_tokenizer(model_name)
+        self.backend = backend
+        self.gguf_model = gguf_model
         self.device = device
-        self.model.eval()
-        self.guard = LLMGuard(banned_substrings)
+        self.guard = LLMGuard(banned_substrings, scan_mode=guard_scan_mode, banned_whole_words=banned_whole_words)
         self.relevency_prompt = relevance_prompt
+        self.relevance_classifier = relevance_classifier
+        self.rejection_responder = RejectionResponder()
+        self.llm_rejection_responses = llm_rejection_responses
+        self.verdict_cache = LRUCache(maxsize=verdict_cache_size, ttl=verdict_cache_ttl) if verdict_cache_size else None
+        self.config_version = self._config_version(banned_substrings, banned_whole_words)
+
+    def _config_version(self, banned_substrings: List[str], banned_whole_words: List[str]) -> str:
+        """Hash of everything that decides a verdict, so changing any of it invalidates cached verdicts."""
+        classifier = self.relevance_classifier
+        return content_hash(json.dumps({
+            "banned_substrings": sorted(banned_substrings),
+            "banned_whole_words": sorted(banned_whole_words),
+            "input_scanners": [type(scanner).__name__ for scanner in self.guard.input_scanners.scanners],
+            "relevance_prompt": self.relevency_prompt,
+            "relevance_classifier": None if classifier is None else [
+                classifier.relevant_threshold, classifier.irrelevant_threshold, classifier.intercept,
+                # Retraining changes the weights even when the intercept happens to stay the same
+                None if classifier.coef is None else hashlib.sha1(classifier.coef.tobytes()).hexdigest()],
+            "llm": [self.model_name, self.backend, self.gguf_model]
+        }, sort_keys=True))
+
+    def cached_verdict(self, user_query: str):
+        """Return the cached (is_valid, message) verdict for a query, or None."""
+        if self.verdict_cache is None:
+            return None
+        return self.verdict_cache.get((self.config_version, normalize_query(user_query)))
+
+    def cache_verdict(self, user_query: str, verdict: tuple) -> tuple:
+        """Store a verdict and return it."""
+        if self.verdict_cache is not None:
+            self.verdict_cache.set((self.config_version, normalize_query(user_query)), verdict)
+        return verdict
+
+    @property
+    def model(self):
+        return load_model_and_tokenizer(self.model_name, backend=self.backend, gguf_model=self.gguf_model)[0]
+
+    @property
+    def tokenizer(self):
+        return load_model_and_tokenizer(self.model_name, backend=self.backend, gguf_model=self.gguf_model)[1]
 
 
     @weave.op(name="validate_llm_input")
     def validate_input(self, user_query: str) -> str:
         """
         1) Validate user_query with LLMGuard
-        2) If it fails, generate an LLM-based user-friendly explanation
+        2) If it fails, build a template-based user-friendly explanation
         3) If it passes, do relevancy check
         4) Return outcome
+        Repeated queries are answered from the verdict cache.
         """
+        cached = self.cached_verdict(user_query)
+        if cached is not None:
+            return cached
+
         # ---- Step 1: Validate input with LLMGuard
         is_valid, guard_reason, guard_results = self.guard.validate_input(user_query)
         if not is_valid:
             # Generate a user-friendly explanation for why the input was rejected
             user_friendly_response = self.generate_explanation_for_guard_fail(
-                guard_reason, guard_results
+                guard_reason, guard_results, user_query
             )
-            return False, user_friendly_response
+            if not guard_results:
+                # Scanning errored; don't cache a transient failure
+                return False, user_friendly_response
+            return self.cache_verdict(user_query, (False, user_friendly_response))
         
         # ---- Step 2: Validate the relevancy of the query
         is_relevant = self.is_relavent(user_query)
         if not is_relevant:
             # Generate a user-friendly explanation for why the query is not relevant
             user_friendly_response = self.generate_explanation_for_relevance_fail(user_query)
-            return False, user_friendly_response
+            return self.cache_verdict(user_query, (False, user_friendly_response))
+
+        return self.cache_verdict(user_query, (True, "Query is valid and relevant"))
+
+    @weave.op(name="avalidate_llm_input")
+    async def avalidate_input(self, user_query: str):
+        """
+        validate_input without blocking the event loop; rejection explanations are
+        LLM-phrased when enabled.
+        """
+        cached = self.cached_verdict(user_query)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        is_valid, guard_reason, guard_results = await loop.run_in_executor(None, self.guard.validate_input, user_query)
+        if not is_valid:
+            explanation = await self.agenerate_explanation_for_guard_fail(guard_reason, guard_results, user_query)
+            if not guard_results:
+                return False, explanation
+            return self.cache_verdict(user_query, (False, explanation))
+
+        is_relevant = await loop.run_in_executor(None, self.is_relavent, user_query)
+        if not is_relevant:
+            return self.cache_verdict(user_query, (False, await self.agenerate_explanation_for_relevance_fail(user_query)))
 
-        return True, "Query is valid and relevant"
+        return self.cache_verdict(user_query, (True, "Query is valid and relevant"))
         
 
     @weave.op(name="is_relavent")
@@ -49,111 +203,71 @@ class Validator:
         """
         Check if a user query is relevant to Northeastern courses/professors.
         """
+        if self.relevance_classifier is not None:
+            verdict = self.relevance_classifier.predict(user_query)
+            if verdict is not None:
+                return verdict
         response = generate_llm_response(
             system_prompt=self.relevency_prompt,
             query=user_query,
             retrieved_docs=[],  
             model=self.model,
-            tokenizer=self.tokenizer
+            tokenizer=self.tokenizer,
+            profile="classification"
         )
-        return response.upper() == "RELEVANT"
+        return response.strip().upper() == "RELEVANT"
     
 
     @weave.op(name="generate_explanation_for_guard_fail")
-    def generate_explanation_for_guard_fail(self, rejection_reason: str, guard_results: dict) -> str:
-        """
-        Uses an LLM to produce a structured explanation for query rejection with suggested alternatives.
-        """
-        system_prompt = (
-            "You are an AI designed to explain content policy rejections for queries about NEU courses and professors. "
-            "For each flagged query, respond with exactly three lines:\n"
-            "1. First line must state: 'CONTENT POLICY VIOLATION'\n"
-            "2. Second line: Brief, friendly explanation of why the content was flagged\n"
-            "3. Third line: 'Suggested rephrasing: ' followed by a more appropriate way to ask about:\n"
-            "   - Course content or structure\n"
-            "   - Teaching methods\n"
-            "   - Academic experiences\n"
-            "   - Professor expertise\n"
-            "Focus on academic and professional language."
-        )
-
-        user_query = f"""
-        Rejection reason: {rejection_reason}
-        Scanner details: {guard_results}
+    def generate_explanation_for_guard_fail(self, rejection_reason: str, guard_results: dict, user_query: str = "") -> str:
+        """
+        Template explanation for query rejection: the failing scanner's category and a suggested alternative.
+        """
+        return self.rejection_responder.guard_fail(guard_results, user_query)
 
-        Instructions:
-        Generate a 3-line response:
-        Line 1: 'CONTENT POLICY VIOLATION'
-        Line 2: Explain the issue in a helpful, constructive way
-        Line 3: Suggest a better way to ask about the same topic using academic language
-        
-        Keep the total response under 50 words.
+    async def agenerate_explanation_for_guard_fail(self, rejection_reason: str, guard_results: dict,
+                                                   user_query: str = "") -> str:
         """
+        Uses an LLM to produce a structured explanation for query rejection with suggested alternatives,
+        when LLM rejection responses are enabled and an LLM slot is free; otherwise the template.
+        """
+        template = self.generate_explanation_for_guard_fail(rejection_reason, guard_results, user_query)
+        if not self.llm_rejection_responses:
+            return template
 
-        response = generate_llm_response(
-            system_prompt=system_prompt,
-            query=user_query,
-            retrieved_docs=[],
-            model=self.model,
-            tokenizer=self.tokenizer,
+        return await self.rejection_responder.arefine(
+            get_backend(self.model, self.tokenizer),
+            GUARD_FAIL_SYSTEM_PROMPT,
+            format_user_prompt(GUARD_FAIL_USER_PROMPT.format(rejection_reason=rejection_reason,
+                                                             guard_results=guard_results), [], self.tokenizer),
+            fallback=template,
             temperature=0.7
         )
 
-        return response.strip()
-
-        
-
 
     @weave.op(name="generate_explanation_for_relevance_fail")
     def generate_explanation_for_relevance_fail(self, query) -> str:
-        system_message = (
-            "You are an AI designed to provide information on Northeastern University courses and professors. "
-            "For off-topic queries, respond with exactly three lines:\n"
-            "1. First line must be exactly: 'NOT RELEVANT'\n"
-            "2. Second line: explanation properly why the query is irrelavent \n"
-            "3. Third line: 'Suggested question: ' followed by a question about NEU courses/professors. "
-            "Questions should vary between these types:\n"
-            "   - Course content questions (e.g., 'What topics are covered in NEU's Machine Learning course?')\n"
-            "   - Teaching style questions (e.g., 'How does Professor X teach Database Management?')\n"
-            "   - Course reviews/experience (e.g., 'How challenging is the Algorithms course at NEU?')\n"
-            "   - Course structure (e.g., 'What projects are included in Software Engineering?')\n"
-            "   - Professor expertise (e.g., 'Which professors specialize in AI at NEU?')\n"
-            "\nFocus on these CS topics:\n"
-            "   - Machine Learning\n"
-            "   - Algorithms\n"
-            "   - Database Management Systems\n"
-            "   - Artificial Intelligence\n"
-            "   - Data Structures\n"
-            "   - Software Engineering\n"
-            "   - Computer Networks\n"
-            "   - Operating Systems"
-        )
-
-        user_message = f"""
-        User query: {query}
+        """
+        Template explanation for an off-topic query, with a suggested question about NEU courses/professors.
+        """
+        return self.rejection_responder.relevance_fail(query)
 
-        Instructions:
-        Generate a 3-line response with:
-        Line 1: 'NOT RELEVANT'
-        Line 2: Explain why this query isn't about NEU academics
-        Line 3: Suggest a question about NEU courses/professors that covers either:
-            - Course content and topics
-            - Teaching methods and style
-            - Student experiences and reviews
-            - Course structure and assignments
-            - Professor expertise and approach
-        Make the suggestion feel natural and focused on what students might want to know.
+    async def agenerate_explanation_for_relevance_fail(self, query) -> str:
+        """
+        LLM-phrased explanation for an off-topic query when LLM rejection responses are enabled
+        and an LLM slot is free; otherwise the template.
         """
+        template = self.generate_explanation_for_relevance_fail(query)
+        if not self.llm_rejection_responses:
+            return template
 
-        response = generate_llm_response(
-            system_prompt=system_message,
-            query=user_message,
-            retrieved_docs=[],
-            model=self.model,
-            tokenizer=self.tokenizer,
-            temperature=0.9 # Lower the temperature for more controlled output
+        return await self.rejection_responder.arefine(
+            get_backend(self.model, self.tokenizer),
+            RELEVANCE_FAIL_SYSTEM_PROMPT,
+            format_user_prompt(RELEVANCE_FAIL_USER_PROMPT.format(query=query), [], self.tokenizer),
+            fallback=template,
+            temperature=0.9
         )
-        return response.strip()
     
 
 
@@ -164,3 +278,10 @@ class Validator:
         """
         return self.guard.validate_output(output_text, input_text)
 
+    def stats(self) -> dict:
+        """Verdict cache hit rate, guard scanner latency and LLM rejection-response counts."""
+        return {
+            "verdict_cache": self.verdict_cache.stats() if self.verdict_cache is not None else None,
+            "guard": self.guard.stats(),
+            "rejection_responses": self.rejection_responder.stats()
+        }
@@ -25,6 +25,10 @@ setup(
     packages=find_packages(exclude=["chromadb", "notebooks"]),
     python_requires=REQUIRES_PYTHON,
     install_requires=INSTALL_REQUIRES,
+    extras_require={
+        # llm_backend "gguf" (quantized models served by llama.cpp)
+        "gguf": ["llama-cpp-python"],
+    },
     include_package_data=True,
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# naive_rag modules import their siblings by flat name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "curriculum_compass", "naive_rag"))
@@ -0,0 +1,13 @@
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def test_orchestrator_imports_from_the_package_alone():
+    # A fresh interpreter with only the repository root importable, unlike this test session
+    code = "from curriculum_compass.agentic_rag.orchestrator import AgentOrchestrator"
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True,
+                            env={**os.environ, "PYTHONPATH": REPO_ROOT})
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,61 @@
+import pytest
+
+from batching import MicroBatcher
+
+
+class RecordingBatch:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        return [item * 10 for item in items]
+
+
+@pytest.fixture
+def recorder():
+    return RecordingBatch()
+
+
+def test_concurrent_requests_share_one_batch(recorder):
+    batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_ms=500)
+    try:
+        futures = [batcher.submit([1, 2]), batcher.submit([3]), batcher.submit([4, 5, 6])]
+        assert [future.result(timeout=5) for future in futures] == [[10, 20], [30], [40, 50, 60]]
+        assert recorder.batches == [[1, 2, 3, 4, 5, 6]]
+        assert batcher.stats() == {"batches": 1, "items": 6, "avg_batch_size": 6.0}
+    finally:
+        batcher.close()
+
+
+def test_full_batch_is_dispatched_without_waiting(recorder):
+    batcher = MicroBatcher(recorder, max_batch_size=3, max_wait_ms=60_000)
+    try:
+        first, second = batcher.submit([1, 2]), batcher.submit([3])
+        assert first.result(timeout=5) == [10, 20] and second.result(timeout=5) == [30]
+        assert recorder.batches == [[1, 2, 3]]
+    finally:
+        batcher.close()
+
+
+def test_batch_errors_reach_every_caller():
+    def fail(items):
+        raise ValueError("model unavailable")
+
+    batcher = MicroBatcher(fail, max_wait_ms=200)
+    try:
+        futures = [batcher.submit([1]), batcher.submit([2])]
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+    finally:
+        batcher.close()
+
+
+def test_empty_requests_resolve_immediately_and_closed_batcher_rejects(recorder):
+    batcher = MicroBatcher(recorder)
+    assert batcher([]) == []
+    batcher.close()
+    assert recorder.batches == []
+    with pytest.raises(RuntimeError):
+        batcher.submit([1])
@@ -0,0 +1,95 @@
+import pytest
+
+import cache as cache_module
+from cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", fake)
+    return fake
+
+
+def test_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "b" is now the least recently used
+    lru.set("c", 3)
+    assert "b" not in lru
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.stats()["evictions"] == 1
+
+
+def test_replacing_a_key_does_not_evict():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.set("a", 10)
+    assert len(lru) == 2 and lru.get("a") == 10 and lru.get("b") == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    lru = LRUCache(maxsize=4, ttl=10)
+    lru.set("a", 1)
+    clock.now += 9
+    assert lru.get("a") == 1
+    clock.now += 2
+    assert lru.get("a") is None
+    assert len(lru) == 0
+    stats = lru.stats()
+    assert stats["expirations"] == 1 and stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_reset_refreshes_ttl(clock):
+    lru = LRUCache(maxsize=4, ttl=10)
+    lru.set("a", 1)
+    clock.now += 8
+    lru.set("a", 2)
+    clock.now += 8
+    assert lru.get("a") == 2
+
+
+def test_items_skip_expired_entries(clock):
+    lru = LRUCache(maxsize=4, ttl=10)
+    lru.set("old", 1)
+    clock.now += 5
+    lru.set("new", 2)
+    clock.now += 6
+    assert lru.items() == [("new", 2)]
+
+
+def test_membership_does_not_count_as_lookup():
+    lru = LRUCache(maxsize=4)
+    lru.set("a", 1)
+    assert "a" in lru and "b" not in lru
+    assert lru.stats()["hits"] == 0 and lru.stats()["misses"] == 0
+
+
+def test_reranker_score_cache_keys_on_the_scored_query():
+    from reranker import Reranker
+
+    reranker = Reranker.__new__(Reranker)
+    reranker.model_name, reranker.backend = "ce", "torch"
+    reranker.score_cache = LRUCache(maxsize=16)
+    scored = []
+
+    def run_pairs(pairs):
+        scored.extend(pairs)
+        return [float(len(query)) for query, _ in pairs]
+
+    reranker._run_pairs = run_pairs
+    assert reranker.score("Who teaches CS5800?", ["doc"]) == [19.0]
+    # A differently cased query is scored by the model, not served the other query's score
+    assert reranker.score("who teaches cs5800", ["doc"]) == [18.0]
+    assert reranker.score("Who teaches CS5800?", ["doc"]) == [19.0]
+    assert scored == [["Who teaches CS5800?", "doc"], ["who teaches cs5800", "doc"]]
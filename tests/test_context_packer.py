@@ -0,0 +1,54 @@
+import re
+
+from context_packer import ContextPacker
+
+
+class WordTokenizer:
+    """
+    A word followed by a space is one token, anything else is one token per character, and
+    decoding strips trailing whitespace, so a decoded prefix can re-encode to more tokens.
+    """
+    def encode(self, text, add_special_tokens=False):
+        return re.findall(r"\w+ |\w|\W", text)
+
+    def decode(self, token_ids):
+        return "".join(token_ids).rstrip()
+
+
+def token_count(text):
+    return len(WordTokenizer().encode(text))
+
+
+def test_documents_past_the_budget_are_dropped():
+    packer = ContextPacker(WordTokenizer(), token_budget=6, min_chunk_tokens=4)
+    report = packer.pack(["a b c", "d e f g h"])
+    assert report["docs"] == ["a b c"]
+    assert report["dropped"] == [{"index": 1, "tokens": 5, "reason": "budget"}]
+    assert report["tokens"] == 3
+
+
+def test_truncation_counts_the_re_encoded_text():
+    packer = ContextPacker(WordTokenizer(), token_budget=8, min_chunk_tokens=2)
+    report = packer.pack(["alpha beta gamma delta epsilon zeta eta theta iota kappa"])
+    assert report["truncated"] == [0]
+    [text] = report["docs"]
+    # Cutting at 8 tokens leaves "theta" without its space, which re-encodes as 5 tokens
+    assert text == "alpha beta gamma delta"
+    assert report["tokens"] == token_count(text) == 8
+
+
+def test_duplicates_and_repeated_lines_are_dropped():
+    shared = "Prerequisite: CS5010 with a minimum grade of C-"
+    packer = ContextPacker(WordTokenizer(), token_budget=500)
+    first = f"=== Course Metadata ===\nTitle: Algorithms\n\n{shared}"
+    second = f"Title: Advanced Algorithms\n{shared}"
+    report = packer.pack([first, first, second])
+    assert report["docs"] == [f"Title: Algorithms\n{shared}", "Title: Advanced Algorithms"]
+    assert report["dropped"] == [{"index": 1, "tokens": 0, "reason": "duplicate"}]
+
+
+def test_report_is_not_printed_unless_verbose(capsys):
+    ContextPacker(WordTokenizer(), token_budget=1, min_chunk_tokens=4).pack(["a b c"])
+    assert capsys.readouterr().out == ""
+    ContextPacker(WordTokenizer(), token_budget=1, min_chunk_tokens=4, verbose=True).pack(["a b c"])
+    assert "Context packing" in capsys.readouterr().out
@@ -0,0 +1,24 @@
+import numpy as np
+
+from course_index import CourseIndex
+
+
+def test_query_is_idf_weighted_once():
+    index = CourseIndex(n_features=2 ** 10)
+    index.build([("1", "algorithms"), ("2", "algorithms databases"), ("3", "databases")])
+    query = index.vectorizer.transform(["algorithms databases"]).tocsr()
+    idf = np.log(4 / (1 + index.doc_freq[query.indices])) + 1
+    weights = query.data * idf
+    expected = weights / np.linalg.norm(weights)
+    row = index._vectorize(["algorithms databases"])[1].tocsr()
+    scores = dict(index.search("algorithms databases", n_results=3))
+    assert np.isclose(scores["2"], float(row[:, query.indices].toarray().ravel() @ expected))
+
+
+def test_build_keeps_last_document_for_duplicate_crns():
+    index = CourseIndex(n_features=2 ** 10)
+    index.build([("1", "algorithms"), ("1", "databases")])
+    assert len(index) == 1
+    assert index.search("algorithms") == [("1", 0.0)]
+    index.remove("1")
+    assert not index.doc_freq.any()
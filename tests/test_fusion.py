@@ -0,0 +1,64 @@
+import math
+
+import pytest
+
+from fusion import fuse_ranked_lists, is_scored, min_max_normalize, sigmoid
+
+
+def test_min_max_normalize():
+    assert min_max_normalize([2.0, 4.0, 3.0]) == [0.0, 1.0, 0.5]
+    assert min_max_normalize([]) == []
+
+
+@pytest.mark.parametrize("scores", [[-3.0], [1.5, 1.5, 1.5]])
+def test_min_max_without_spread_is_neutral(scores):
+    assert min_max_normalize(scores) == [0.5] * len(scores)
+
+
+def test_sigmoid_is_stable_for_large_logits():
+    assert sigmoid(0) == 0.5
+    assert sigmoid(1000) == 1.0 and sigmoid(-1000) == 0.0
+
+
+def test_is_scored():
+    assert is_scored(0.0) and is_scored(-2.5)
+    assert not is_scored(None) and not is_scored(float('-inf')) and not is_scored(math.nan)
+
+
+RANKED = {
+    "courses": [("c1", 4.0), ("c2", 1.0), ("c3", -2.0)],
+    "reviews": [("r1", -5.0)],
+}
+
+
+def test_score_fusion_compares_calibrated_scores():
+    fused = fuse_ranked_lists(RANKED, method="score")
+    assert [doc for _, doc, _ in fused] == ["c1", "c2", "c3", "r1"]
+    assert fused[0][2] == pytest.approx(sigmoid(4.0))
+
+
+def test_minmax_fusion_does_not_promote_a_single_weak_hit():
+    fused = fuse_ranked_lists(RANKED, method="minmax")
+    assert [doc for _, doc, _ in fused] == ["c1", "c2", "r1", "c3"]
+    assert dict((doc, score) for _, doc, score in fused)["r1"] == 0.5
+
+
+def test_rrf_fusion_uses_ranks_only():
+    fused = fuse_ranked_lists(RANKED, method="rrf", rrf_k=60)
+    scores = {doc: score for _, doc, score in fused}
+    assert scores["c1"] == scores["r1"] == pytest.approx(1 / 61)
+    assert scores["c3"] == pytest.approx(1 / 63)
+
+
+@pytest.mark.parametrize("method", ["score", "minmax"])
+def test_unusable_scores_are_not_fused(method):
+    ranked = {"courses": [("c1", 2.0), ("c2", 1.0), ("cut", float('-inf')), ("failed", None)]}
+    fused = fuse_ranked_lists(ranked, method=method)
+    assert [doc for _, doc, _ in fused] == ["c1", "c2"]
+    assert all(math.isfinite(score) for _, _, score in fused)
+
+
+def test_final_k_and_unknown_method():
+    assert len(fuse_ranked_lists(RANKED, final_k=2)) == 2
+    with pytest.raises(ValueError):
+        fuse_ranked_lists(RANKED, method="borda")
@@ -0,0 +1,64 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from generation_scheduler import GenerationScheduler
+
+
+class IdTokenizer:
+    """Decodes token ids to their numbers, enough to compare generated sequences."""
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(str(int(token)) for token in ids)
+
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    config = transformers.Qwen2Config(vocab_size=128, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+                                      num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=256,
+                                      eos_token_id=None, pad_token_id=0)
+    model = transformers.Qwen2ForCausalLM(config).eval()
+    model.generation_config.eos_token_id = None
+    model.generation_config.pad_token_id = 0
+    return model
+
+
+PROMPTS = [[5, 17, 33, 9], [40, 2, 2, 71, 90, 12, 8, 64, 3], [99], [7, 7, 7, 7, 7, 7]]
+
+
+def sequential(model, prompt, max_new_tokens):
+    output = model.generate(torch.tensor([prompt]), attention_mask=torch.ones((1, len(prompt)), dtype=torch.long),
+                            max_new_tokens=max_new_tokens, do_sample=False)
+    return IdTokenizer().decode(output[0, len(prompt):])
+
+
+def test_prefill_keeps_only_last_logits(model):
+    scheduler = GenerationScheduler(model, IdTokenizer())
+    try:
+        assert list(scheduler._prefill_kwargs.values()) == [1]
+    finally:
+        scheduler.close()
+
+
+def test_batched_output_matches_sequential_generate(model):
+    scheduler = GenerationScheduler(model, IdTokenizer(), max_batch_size=4)
+    try:
+        # Different lengths and budgets exercise left padding, merging and compaction
+        budgets = [6, 10, 3, 8]
+        requests = [scheduler.submit(prompt, max_new_tokens=budget, do_sample=False)
+                    for prompt, budget in zip(PROMPTS, budgets)]
+        results = [request.result(timeout=60) for request in requests]
+    finally:
+        scheduler.close()
+    assert results == [sequential(model, prompt, budget) for prompt, budget in zip(PROMPTS, budgets)]
+    assert scheduler.stats()["generated_tokens"] == sum(budgets)
+
+
+def test_stream_yields_the_generated_text(model):
+    scheduler = GenerationScheduler(model, IdTokenizer())
+    try:
+        chunks = list(scheduler.stream(PROMPTS[0], max_new_tokens=5, do_sample=False))
+    finally:
+        scheduler.close()
+    assert "".join(chunks) == sequential(model, PROMPTS[0], 5)
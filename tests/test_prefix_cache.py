@@ -0,0 +1,53 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from prefix_cache import PrefixCache
+
+
+class CharTokenizer:
+    """One token per character, with a minimal chat template."""
+    def apply_chat_template(self, messages, tokenize=False, add_generation_prompt=False):
+        text = "".join(f"<{message['role']}>{message['content']}</{message['role']}>" for message in messages)
+        return text + "<assistant>" if add_generation_prompt else text
+
+    def __call__(self, texts, return_tensors="pt", add_special_tokens=False):
+        return {"input_ids": torch.tensor([[ord(char) % 128 for char in text] for text in texts])}
+
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    config = transformers.Qwen2Config(vocab_size=128, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+                                      num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=256,
+                                      eos_token_id=None, pad_token_id=0)
+    model = transformers.Qwen2ForCausalLM(config).eval()
+    model.generation_config.eos_token_id = None
+    model.generation_config.pad_token_id = 0
+    return model
+
+
+def prompt_ids(tokenizer, system_prompt, user_prompt):
+    messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
+    return tokenizer([tokenizer.apply_chat_template(messages, add_generation_prompt=True)])["input_ids"]
+
+
+def test_resumed_generation_matches_uncached_and_leaves_prefix_intact(model):
+    tokenizer = CharTokenizer()
+    cache = PrefixCache(model, tokenizer)
+    prefix_length = cache._prefix_ids("be brief").shape[1]
+    for user_prompt in ("first question", "second"):
+        input_ids = prompt_ids(tokenizer, "be brief", user_prompt)
+        settings = {"attention_mask": torch.ones_like(input_ids), "max_new_tokens": 6, "do_sample": False}
+        expected = model.generate(input_ids, **settings)
+        resumed = model.generate(input_ids, **settings, **cache.generate_kwargs("be brief", input_ids))
+        assert torch.equal(resumed, expected)
+        assert cache.get("be brief")[1].get_seq_length() == prefix_length
+    assert cache.misses == 1 and cache.hits == 3
+
+
+def test_prompt_without_the_prefix_is_encoded_from_scratch(model):
+    tokenizer = CharTokenizer()
+    cache = PrefixCache(model, tokenizer)
+    assert cache.generate_kwargs("be brief", prompt_ids(tokenizer, "be verbose", "question")) == {}
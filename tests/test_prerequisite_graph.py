@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("weave")
+
+from prerequisite_graph import PrerequisiteGraph, parse_prerequisites
+
+
+def test_parse_groups_and_alternatives():
+    raw = ("[{'and_or': '', 'subject': 'Computer Science', 'course_number': '5004'}, "
+           "{'and_or': 'Or', 'subject': 'Computer Science', 'course_number': '5010'}, "
+           "{'and_or': 'And', 'subject': 'Data Science', 'course_number': '5110'}]")
+    assert parse_prerequisites(raw) == [("CS5004", "CS5010"), ("DS5110",)]
+    assert parse_prerequisites("[]") == [] and parse_prerequisites("not a list") == []
+
+
+@pytest.fixture
+def graph():
+    return PrerequisiteGraph({
+        "CS5010": [("CS5001",)],
+        "CS5800": [("CS5004", "CS5010")],
+        "CS6140": [("CS5800",), ("MATH5001",)],
+        "CS7140": [("CS6140",)]
+    })
+
+
+def test_transitive_prerequisites_follow_the_whole_chain(graph):
+    assert graph.prerequisites("CS7140") == {"CS6140"}
+    assert graph.prerequisites("cs7140", transitive=True) == {"CS6140", "CS5800", "MATH5001", "CS5004",
+                                                              "CS5010", "CS5001"}
+    assert graph.requires("CS7140", "cs5001")
+    assert not graph.requires("CS5800", "MATH5001")
+
+
+def test_transitive_unlocks_are_the_reverse_closure(graph):
+    assert graph.unlocks("CS5001") == {"CS5010"}
+    assert graph.unlocks("CS5001", transitive=True) == {"CS5010", "CS5800", "CS6140", "CS7140"}
+    assert graph.unlocks("CS7140", transitive=True) == frozenset()
+
+
+def test_cycles_terminate_and_exclude_the_course_itself():
+    graph = PrerequisiteGraph({"A1": [("B1",)], "B1": [("C1",)], "C1": [("A1",)], "D1": [("A1",)]})
+    assert graph.prerequisites("A1", transitive=True) == {"B1", "C1"}
+    assert graph.prerequisites("D1", transitive=True) == {"A1", "B1", "C1"}
+    assert graph.unlocks("C1", transitive=True) == {"A1", "B1", "D1"}
+
+
+def test_closure_reuses_earlier_results_without_leaking_the_start():
+    # B1's closure (computed first) contains A1; A1's own closure must not list A1
+    graph = PrerequisiteGraph({"B1": [("A1",)], "A1": [("B1",), ("C1",)]})
+    assert graph.prerequisites("A1", transitive=True) == {"B1", "C1"}
+    assert graph.prerequisites("B1", transitive=True) == {"A1", "C1"}
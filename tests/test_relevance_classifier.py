@@ -0,0 +1,104 @@
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from relevance_classifier import RelevanceClassifier, calibrate_thresholds, load_relevance_classifier
+
+RELEVANT = ["who teaches algorithms", "is cs5800 offered online", "prerequisites for databases",
+            "how hard is machine learning", "when does the compilers course meet", "reviews of professor smith"]
+OFF_TOPIC = ["best pizza in boston", "weather tomorrow", "write me a poem", "how to bake bread",
+             "who won the game last night", "cheap flights to paris"]
+COURSE_WORDS = {"teaches", "algorithms", "cs5800", "offered", "prerequisites", "databases", "hard", "learning",
+                "course", "meet", "compilers", "reviews", "professor", "machine"}
+
+
+class KeywordEmbedder:
+    """Embeds a query by how many course words it contains, plus a constant bias dimension."""
+    def encode(self, texts, normalize_embeddings=True):
+        rows = [[sum(word in COURSE_WORDS for word in text.split()), 1.0] for text in texts]
+        return np.asarray(rows, dtype=np.float32)
+
+
+def test_decide_uses_the_band():
+    classifier = RelevanceClassifier(KeywordEmbedder(), relevant_threshold=0.8, irrelevant_threshold=0.2)
+    assert classifier.decide(0.8) is True
+    assert classifier.decide(0.2) is False
+    assert classifier.decide(0.5) is None
+
+
+def test_thresholds_must_be_ordered():
+    with pytest.raises(ValueError):
+        RelevanceClassifier(KeywordEmbedder(), relevant_threshold=0.2, irrelevant_threshold=0.8)
+
+
+def test_calibration_widens_each_band_while_precision_holds():
+    probabilities = [0.99, 0.95, 0.9, 0.7, 0.6, 0.4, 0.3, 0.05, 0.01]
+    labels = [1, 1, 1, 0, 1, 0, 1, 0, 0]
+    assert calibrate_thresholds(probabilities, labels, target_precision=1.0) == (0.9, 0.05)
+    assert calibrate_thresholds(probabilities, labels, target_precision=0.75) == (0.6, 0.4)
+
+
+def test_calibration_leaves_an_unreliable_side_to_the_llm():
+    assert calibrate_thresholds([0.9, 0.8, 0.1], [0, 1, 0], target_precision=0.99) == (1.0, 0.1)
+
+
+@pytest.fixture
+def config(tmp_path):
+    with open(tmp_path / "questions.pkl", "wb") as f:
+        pickle.dump(RELEVANT * 5, f)
+    (tmp_path / "off_topic.json").write_text(json.dumps(OFF_TOPIC * 5))
+    (tmp_path / "extra.json").write_text(json.dumps([]))
+    return {
+        "relevance_classifier": True,
+        "relevance_classifier_path": str(tmp_path / "relevance_classifier.npz"),
+        "relevance_training_queries": str(tmp_path / "questions.pkl"),
+        "relevance_off_topic_queries": str(tmp_path / "off_topic.json"),
+        "relevance_extra_queries": str(tmp_path / "extra.json"),
+        "relevance_target_precision": 0.99,
+        "relevance_relevant_threshold": None,
+        "relevance_irrelevant_threshold": None,
+        "embedding_model_name": "keyword"
+    }
+
+
+def test_first_use_trains_calibrates_and_saves(config):
+    classifier = load_relevance_classifier(config, KeywordEmbedder())
+    assert classifier.irrelevant_threshold < classifier.relevant_threshold
+    assert all(classifier.predict(query) is True for query in RELEVANT)
+    assert all(classifier.predict(query) is False for query in OFF_TOPIC)
+
+    reloaded = load_relevance_classifier(config, KeywordEmbedder())
+    assert (reloaded.relevant_threshold, reloaded.irrelevant_threshold) == pytest.approx(
+        (classifier.relevant_threshold, classifier.irrelevant_threshold))
+    assert RelevanceClassifier.saved_embedding_model(config["relevance_classifier_path"]) == "keyword"
+
+
+def test_config_thresholds_override_calibrated_ones(config):
+    load_relevance_classifier(config, KeywordEmbedder())
+    config["relevance_relevant_threshold"] = 0.97
+    classifier = load_relevance_classifier(config, KeywordEmbedder())
+    assert classifier.relevant_threshold == 0.97
+
+
+def test_classifier_from_another_embedding_model_is_retrained(config):
+    RelevanceClassifier(KeywordEmbedder()).fit(RELEVANT + OFF_TOPIC, [1] * 6 + [0] * 6).save(
+        config["relevance_classifier_path"], "other-model")
+    load_relevance_classifier(config, KeywordEmbedder())
+    assert RelevanceClassifier.saved_embedding_model(config["relevance_classifier_path"]) == "keyword"
+
+
+def test_config_paths_resolve_against_the_config_file(tmp_path, monkeypatch):
+    for module in ("weave", "chromadb", "sentence_transformers"):
+        pytest.importorskip(module)
+    from utils import load_config
+
+    (tmp_path / "config.json").write_text(json.dumps({"relevance_classifier_path": "relevance_classifier.npz",
+                                                      "relevance_off_topic_queries": "../data/off_topic.json",
+                                                      "course_data_path": "/data/courses.csv"}))
+    monkeypatch.chdir("/")
+    config = load_config(str(tmp_path / "config.json"))
+    assert config["relevance_classifier_path"] == str(tmp_path / "relevance_classifier.npz")
+    assert config["relevance_off_topic_queries"] == str(tmp_path.parent / "data" / "off_topic.json")
+    assert config["course_data_path"] == "/data/courses.csv"
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from response_cache import ResponseCache, content_tokens, token_edit_distance
+
+
+class ConstantEmbedder:
+    """Rates every pair of queries as identical, so only the cache's own checks separate them."""
+    calls = 0
+
+    def encode(self, texts, normalize_embeddings=True):
+        ConstantEmbedder.calls += len(texts)
+        return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(ConstantEmbedder(), maxsize=8, ttl=None, similarity_threshold=0.95)
+
+
+def test_content_tokens_drop_fillers_and_fold_plurals():
+    assert content_tokens("What is the workload of CS5800?") == ["what", "workload", "cs5800"]
+    assert content_tokens("what's the workload for cs5800") == ["what", "workload", "cs5800"]
+    assert content_tokens("Which courses") == ["which", "course"]
+
+
+def test_token_edit_distance():
+    assert token_edit_distance(["is", "hard"], ["is", "easy"]) == 1
+    assert token_edit_distance(["a", "b"], ["b", "a"]) == 2
+    assert token_edit_distance([], ["a"]) == 1
+
+
+def test_semantic_tier_matches_rephrasings(cache):
+    cache.store("What is the workload of CS5800?", ["doc"], 1, "heavy", scope=("CS5800",))
+    assert cache.lookup_semantic("what's the workload for cs5800", 1, scope=("CS5800",)) == "heavy"
+    assert cache.lookup_semantic("  WHAT IS THE WORKLOAD OF CS5800 ", 1, scope=("CS5800",)) == "heavy"
+
+
+def test_semantic_tier_rejects_opposite_questions(cache):
+    cache.store("Is CS5800 hard?", ["doc"], 1, "yes", scope=("CS5800",))
+    assert cache.lookup_semantic("Is CS5800 easy?", 1, scope=("CS5800",)) is None
+    cache.store("Is CS5800 harder than CS5200?", ["doc"], 1, "yes", scope=("CS5200", "CS5800"))
+    assert cache.lookup_semantic("Is CS5200 harder than CS5800?", 1, scope=("CS5200", "CS5800")) is None
+
+
+def test_token_edit_allowance_is_configurable():
+    cache = ResponseCache(ConstantEmbedder(), ttl=None, max_token_edits=1)
+    cache.store("Who teaches CS5800", ["doc"], 1, "Prof", scope=("CS5800",))
+    assert cache.lookup_semantic("Who teaches CS5800 online", 1, scope=("CS5800",)) == "Prof"
+
+
+def test_semantic_tier_requires_same_scope(cache):
+    cache.store("ML courses on monday", ["doc"], 1, "A", scope=((), (('days', 1),), False))
+    assert cache.lookup_semantic("ML courses on monday", 1, scope=((), (('days', 16),), False)) is None
+
+
+def test_exact_tier_is_keyed_on_context(cache):
+    cache.store("Who teaches CS5800?", ["doc a"], 1, "Prof A")
+    assert cache.lookup_exact("who teaches cs5800", ["doc a"], 1) == "Prof A"
+    assert cache.lookup_exact("who teaches cs5800", ["doc b"], 1) is None
+
+
+def test_index_version_change_invalidates_both_tiers(cache):
+    cache.store("Who teaches CS5800?", ["doc"], 1, "Prof A")
+    assert cache.lookup_exact("Who teaches CS5800?", ["doc"], 2) is None
+    assert cache.lookup_semantic("Who teaches CS5800?", 2) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_misses_do_not_embed_without_candidates(cache):
+    ConstantEmbedder.calls = 0
+    assert cache.lookup_semantic("Who teaches CS5800?", 1) is None
+    assert ConstantEmbedder.calls == 0
@@ -0,0 +1,98 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("weave")
+
+from schedule_builder import ScheduleBuilder, course_subjects, extract_course_codes, meeting_bitmask
+from time_utils import DAY_BITS
+
+MONDAY, WEDNESDAY, FRIDAY = DAY_BITS['monday'], DAY_BITS['wednesday'], DAY_BITS['friday']
+SUBJECTS = course_subjects(["CS5800", "CS 5200", "DS-5110", "MATH1341"])
+
+
+def test_course_subjects():
+    assert SUBJECTS == {"CS", "DS", "MATH"}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Can I take cs 5800 and CS-5200 together?", ["CS5800", "CS5200"]),
+    ("Is CS5800 offered in FALL2024 or Spring 2025?", ["CS5800"]),
+    ("Do I need a GRE2024 score for DS5110?", ["DS5110"]),
+    ("CS5800, cs5800 and CS 5800", ["CS5800"]),
+    ("What about CS9999?", ["CS9999"]),
+])
+def test_extract_course_codes_keeps_catalog_subjects(query, expected):
+    assert extract_course_codes(query, SUBJECTS) == expected
+
+
+def test_extract_course_codes_without_catalog_keeps_every_match():
+    assert extract_course_codes("CS5800 in FALL2024") == ["CS5800", "FALL2024"]
+
+
+def test_meeting_bitmask_overlap():
+    monday_9 = meeting_bitmask(MONDAY, 9 * 60, 10 * 60)
+    assert monday_9 & meeting_bitmask(MONDAY | WEDNESDAY, 9 * 60 + 55, 11 * 60)
+    # Back-to-back meetings and other days do not conflict
+    assert not monday_9 & meeting_bitmask(MONDAY, 10 * 60, 11 * 60)
+    assert not monday_9 & meeting_bitmask(FRIDAY, 9 * 60, 10 * 60)
+    assert meeting_bitmask(0, None, None) == 0
+
+
+def section(crn, code, days, begin, end):
+    return {'crn': crn, 'course_code': code, 'title': code, 'faculty': '', 'campus': 'Boston',
+            'days': days, 'begin': begin, 'end': end}
+
+
+SECTIONS = [
+    section("1", "CS5800", MONDAY, 9 * 60, 10 * 60),
+    section("2", "CS5800", MONDAY, 13 * 60, 14 * 60),
+    section("3", "CS5800", MONDAY, 13 * 60, 14 * 60),
+    section("4", "CS5200", MONDAY, 9 * 60, 10 * 60),
+    section("5", "CS5200", MONDAY, 13 * 60, 14 * 60),
+    section("6", "CS5200", FRIDAY, 9 * 60, 10 * 60),
+    section("7", "DS5110", MONDAY, 9 * 60 + 30, 13 * 60 + 30),
+    section("8", "DS5110", WEDNESDAY, 9 * 60, 10 * 60),
+]
+
+
+def brute_force(codes):
+    """Every conflict-free choice of one meeting pattern per course."""
+    builder = ScheduleBuilder(SECTIONS)
+    slots = [builder._slot_options(code) for code in codes]
+    found = set()
+    for choice in itertools.product(*slots):
+        masks = [mask for mask, _ in choice]
+        if all(not a & b for a, b in itertools.combinations(masks, 2)):
+            found.add(frozenset(crn for _, sections in choice for crn in [s['crn'] for s in sections]))
+    return found
+
+
+def built(result):
+    return {frozenset(crn for entry in schedule for crn in entry['crns']) for schedule in result['schedules']}
+
+
+@pytest.mark.parametrize("codes", [["CS5800", "CS5200"], ["CS5800", "CS5200", "DS5110"], ["CS5800", "DS5110"]])
+def test_build_finds_every_conflict_free_combination(codes):
+    result = ScheduleBuilder(SECTIONS).build(codes)
+    assert built(result) == brute_force(codes)
+    assert not result['truncated'] and not result['missing_courses']
+
+
+def test_sections_with_the_same_meeting_are_one_option():
+    result = ScheduleBuilder(SECTIONS).build(["CS5800"])
+    assert sorted(sorted(entry['crns']) for schedule in result['schedules'] for entry in schedule) == [["1"], ["2", "3"]]
+
+
+def test_truncated_only_when_more_combinations_exist():
+    builder = ScheduleBuilder(SECTIONS)
+    total = len(brute_force(["CS5800", "CS5200"]))
+    exact = builder.build(["CS5800", "CS5200"], max_results=total)
+    assert len(exact['schedules']) == total and not exact['truncated']
+    fewer = builder.build(["CS5800", "CS5200"], max_results=total - 1)
+    assert len(fewer['schedules']) == total - 1 and fewer['truncated']
+
+
+def test_missing_courses_are_reported():
+    result = ScheduleBuilder(SECTIONS).build(["CS5800", "CS9999"])
+    assert result['missing_courses'] == ["CS9999"] and result['schedules'] == []
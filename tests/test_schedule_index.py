@@ -0,0 +1,150 @@
+import pytest
+
+from schedule_index import ScheduleIndex, parse_schedule_constraints
+from time_utils import DAY_BITS
+
+MONDAY, FRIDAY = DAY_BITS['monday'], DAY_BITS['friday']
+
+
+@pytest.mark.parametrize("query", [
+    "I want fridays free",
+    "keep friday off",
+    "any ML class with no friday meetings",
+    "I need fridays to be free",
+])
+def test_negated_days_are_excluded(query):
+    constraints = parse_schedule_constraints(query)
+    assert constraints.get('exclude_days', 0) & FRIDAY
+    assert not constraints.get('days', 0) & FRIDAY
+
+
+def test_listed_days_before_free_are_all_excluded():
+    constraints = parse_schedule_constraints("mondays and fridays off please")
+    assert constraints == {'exclude_days': MONDAY | FRIDAY}
+
+
+def test_required_day():
+    assert parse_schedule_constraints("classes on monday") == {'days': MONDAY}
+
+
+@pytest.mark.parametrize("query", [
+    "what can I take after 2 semesters",
+    "Is CS5800 taught from 1 professor?",
+    "which courses can I take after 3 credits of math",
+    "what should I take after 20 hours of study",
+])
+def test_counts_are_not_clock_times(query):
+    assert parse_schedule_constraints(query) == {}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("nothing before 10am", {'start_after': 600}),
+    ("classes after 6:30 pm", {'start_after': 1110}),
+    ("done by 5", {'end_before': 1020}),
+    ("anything after 5 on tuesday", {'start_after': 1020, 'days': DAY_BITS['tuesday']}),
+    ("courses ending before noon", {'end_before': 720}),
+])
+def test_clock_times(query, expected):
+    assert parse_schedule_constraints(query) == expected
+
+
+def test_contiguous_periods_are_unioned():
+    assert parse_schedule_constraints("monday morning or afternoon") == {
+        'days': MONDAY, 'start_after': 0, 'start_before': 17 * 60}
+
+
+def test_disjoint_periods_become_windows():
+    constraints = parse_schedule_constraints("morning or evening classes")
+    assert constraints == {'start_windows': [(0, 12 * 60), (17 * 60, 24 * 60)]}
+
+
+def test_filter_start_windows():
+    index = ScheduleIndex([
+        ("1", MONDAY, 9 * 60, 10 * 60),
+        ("2", MONDAY, 13 * 60, 14 * 60),
+        ("3", MONDAY, 18 * 60, 19 * 60),
+    ])
+    constraints = parse_schedule_constraints("morning or evening classes")
+    assert index.filter(**constraints) == {"1", "3"}
+    assert index.filter(**parse_schedule_constraints("monday morning or afternoon")) == {"1", "2"}
+
+
+@pytest.mark.parametrize("query", [
+    "Good morning! what are the prereqs for CS5800?",
+    "good evening, who teaches algorithms?",
+    "I study best at night, which ML course is easiest?",
+])
+def test_period_words_outside_scheduling_context_are_ignored(query):
+    assert parse_schedule_constraints(query) == {}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("afternoon classes only", (12 * 60, 17 * 60)),
+    ("mornings only", (0, 12 * 60)),
+    ("anything in the evening", (17 * 60, 24 * 60)),
+    ("I work mornings so afternoon classes only", (12 * 60, 17 * 60)),
+    ("no morning classes", (12 * 60, 24 * 60)),
+])
+def test_period_words_in_scheduling_context(query, expected):
+    constraints = parse_schedule_constraints(query)
+    assert (constraints['start_after'], constraints['start_before']) == expected
+
+
+def test_free_before_a_day_is_not_a_negation():
+    assert parse_schedule_constraints("I am free on monday, what can I take?") == {'days': MONDAY}
+
+
+def test_negation_stops_at_clause_boundary():
+    assert parse_schedule_constraints("classes on monday but not friday") == {'days': MONDAY, 'exclude_days': FRIDAY}
+    assert parse_schedule_constraints("I have no car, anything on monday?") == {'days': MONDAY}
+
+
+def test_negation_carries_through_a_list_of_days():
+    assert parse_schedule_constraints("no monday or friday classes") == {'exclude_days': MONDAY | FRIDAY}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("something from 9 to 11", {'start_after': 9 * 60, 'end_before': 11 * 60}),
+    ("between 2pm and 4pm", {'start_after': 14 * 60, 'end_before': 16 * 60}),
+    ("from 10:30 am - 1 pm", {'start_after': 10 * 60 + 30, 'end_before': 13 * 60}),
+])
+def test_time_ranges(query, expected):
+    assert parse_schedule_constraints(query) == expected
+
+
+def test_counts_in_ranges_are_not_clock_times():
+    assert parse_schedule_constraints("courses worth from 1 to 3 credits") == {}
+
+
+class Section:
+    def __init__(self, crn, days, begin, end):
+        self.crn, self.days, self.begin, self.end = crn, days, begin, end
+
+
+def test_upsert_patches_an_existing_section_in_place():
+    index = ScheduleIndex([("1", MONDAY, 9 * 60, 10 * 60), ("2", FRIDAY, 9 * 60, 10 * 60)])
+    crns = index.crns
+    index.upsert(Section("1", FRIDAY, 14 * 60, 15 * 60))
+    assert index.crns is crns
+    assert index.filter(days=MONDAY) == set()
+    assert index.filter(days=FRIDAY, start_after=12 * 60) == {"1"}
+
+
+def test_new_sections_are_compacted_lazily():
+    index = ScheduleIndex([("1", MONDAY, 9 * 60, 10 * 60)], merge_threshold=3)
+    index.upsert(Section("2", MONDAY, 13 * 60, 14 * 60))
+    assert "2" in index and len(index.crns) == 1
+    index.upsert(Section("3", MONDAY, 18 * 60, 19 * 60))
+    index.upsert(Section("4", MONDAY, 8 * 60, 9 * 60))
+    assert len(index.crns) == 4
+    assert index.filter(days=MONDAY, start_after=12 * 60) == {"2", "3"}
+
+
+def test_removed_sections_are_tombstoned():
+    index = ScheduleIndex([("1", MONDAY, 9 * 60, 10 * 60), ("2", 0, None, None)])
+    assert index.remove("1") and index.remove("2")
+    assert not index.remove("1")
+    assert index.filter(days=MONDAY, include_unscheduled=True) == set()
+    assert len(index) == 0
+    index.upsert(Section("1", MONDAY, 9 * 60, 10 * 60))
+    assert index.filter(days=MONDAY) == {"1"}
@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from substring_matcher import AhoCorasickMatcher, BannedSubstringScanner
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "curriculum_compass", "naive_rag", "config.json")
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+    return AhoCorasickMatcher(config['banned_substrings'], whole_words=config['banned_whole_words'])
+
+
+@pytest.mark.parametrize("query", [
+    "this is bullshit",
+    "shitty course",
+    "the prof is a bitchy grader",
+    "the labs are fucking long",
+    "what a MOTHERFUCKING exam",
+    "the prof is a retard",
+    "he called them spics",
+    "don't be a nip",
+    "is the professor a paki",
+    "I will kill you",
+])
+def test_banned_terms_match(matcher, query):
+    assert matcher.search(query) is not None
+
+
+@pytest.mark.parametrize("query", [
+    "which courses cover spicy food chemistry",
+    "is the turnip study in the biology elective",
+    "are there courses on Pakistan history",
+    "snipe a seat in CS5800 before it fills",
+    "the grading was conspicuous and auspicious",
+    "what skill you gain from the algorithms course",
+])
+def test_innocent_words_do_not_match(matcher, query):
+    assert matcher.search(query) is None
+
+
+def test_whole_words_accept_inflections_only():
+    matcher = AhoCorasickMatcher([], whole_words=["spic"])
+    assert matcher.find_all("spics and spic") == ["spic", "spic"]
+    assert matcher.find_all("spicy conspicuous") == []
+
+
+def test_substring_patterns_match_inside_words():
+    matcher = AhoCorasickMatcher(["shit"])
+    assert matcher.find_all("Bull SHIT and shitty") == ["shit", "shit"]
+
+
+def test_phrases_must_start_a_word():
+    matcher = AhoCorasickMatcher(["kill you"])
+    assert matcher.search("i'll   kill   you") is not None
+    assert matcher.search("what skill you need") is None
+
+
+def test_scanner_follows_llm_guard_contract():
+    scanner = BannedSubstringScanner(["shit"], whole_words=["nip"])
+    assert scanner.scan("bullshit") == ("bullshit", False, 1.0)
+    assert scanner.scan("turnip") == ("turnip", True, -1.0)
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+for module in ("weave", "llm_guard", "chromadb", "sentence_transformers"):
+    pytest.importorskip(module)
+
+import validator as validator_module
+from validator import Validator
+
+
+class FakeGuard:
+    """Stands in for LLMGuard: rejects queries containing a banned substring, counts scans."""
+    def __init__(self, banned_substrings, scan_mode="cost_ordered", banned_whole_words=()):
+        self.banned_substrings = banned_substrings
+        self.input_scanners = type("Scanners", (), {"scanners": []})()
+        self.calls = 0
+        self.fail_with_error = False
+
+    def validate_input(self, query):
+        self.calls += 1
+        if self.fail_with_error:
+            return False, "Scanner error", {}
+        if any(banned in query.lower() for banned in self.banned_substrings):
+            return False, "Banned substring", {"BanSubstrings": 1.0}
+        return True, "", {"BanSubstrings": -1.0}
+
+
+class FakeClassifier:
+    relevant_threshold, irrelevant_threshold, intercept = 0.9, 0.1, 0.0
+
+    def __init__(self, coef):
+        self.coef = np.asarray(coef, dtype=np.float32)
+
+    def predict(self, query):
+        return "course" in query.lower()
+
+
+@pytest.fixture(autouse=True)
+def fake_guard(monkeypatch):
+    monkeypatch.setattr(validator_module, "LLMGuard", FakeGuard)
+
+
+def make_validator(banned=("badword",), coef=(1.0, 2.0), relevance_prompt="Is it about courses?", **kwargs):
+    return Validator("llm", "cpu", list(banned), relevance_prompt,
+                     relevance_classifier=FakeClassifier(coef), **kwargs)
+
+
+def test_repeated_queries_skip_the_scanners():
+    validator = make_validator()
+    first = validator.validate_input("Which course covers algorithms?")
+    assert first == (True, "Query is valid and relevant")
+    assert validator.validate_input("  which COURSE covers algorithms ") == first
+    assert validator.guard.calls == 1
+    assert validator.verdict_cache.stats()["hits"] == 1
+
+
+def test_rejections_are_cached_too():
+    validator = make_validator()
+    assert validator.validate_input("what is the weather")[0] is False
+    assert validator.validate_input("What is the weather?")[0] is False
+    assert validator.guard.calls == 1
+
+
+def test_scanner_errors_are_not_cached():
+    validator = make_validator()
+    validator.guard.fail_with_error = True
+    validator.validate_input("which course")
+    validator.guard.fail_with_error = False
+    assert validator.validate_input("which course")[0] is True
+    assert validator.guard.calls == 2
+
+
+@pytest.mark.parametrize("changed", [
+    {"banned": ("badword", "worseword")},
+    {"coef": (1.0, 2.5)},
+    {"relevance_prompt": "Is it about professors?"}
+])
+def test_configuration_changes_invalidate_cached_verdicts(changed):
+    base = make_validator()
+    assert make_validator().config_version == base.config_version
+    assert make_validator(**changed).config_version != base.config_version
+
+
+def test_new_version_misses_entries_of_the_old_one():
+    validator = make_validator()
+    validator.validate_input("which course")
+    # A retrained classifier shares the cache but must not reuse verdicts made by the old weights
+    validator.relevance_classifier = FakeClassifier((3.0, 4.0))
+    validator.config_version = validator._config_version(["badword"], [])
+    assert validator.cached_verdict("which course") is None
+    validator.validate_input("which course")
+    assert validator.guard.calls == 2